@@ -70,21 +70,60 @@ CREATE TABLE deals (
     url_last_checked    TIMESTAMP,
     url_check_failures  INTEGER     DEFAULT 0,
     url_status          VARCHAR     DEFAULT 'unchecked',
-    url_flagged_at      TIMESTAMP
+    url_flagged_at      TIMESTAMP,
+    search_vector       TSVECTOR
 );
 
+-- search_vector is maintained by the deals_search_vector_trigger
+-- (see python_backend/migrations/0001_deal_search_vector.sql)
+CREATE INDEX ix_deals_search_vector ON deals USING GIN (search_vector);
+
+-- Public listing indexes: partial on listed deals, one per keyset ordering
+-- (see python_backend/migrations/0002_listed_deal_indexes.sql)
+CREATE INDEX ix_deals_listed_latest ON deals (created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+CREATE INDEX ix_deals_listed_type_latest ON deals (deal_type, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+CREATE INDEX ix_deals_listed_type_top ON deals (deal_type, COALESCE(popularity, 0) DESC, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+CREATE INDEX ix_deals_listed_type_hot ON deals (deal_type, COALESCE(click_count, 0) DESC, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+CREATE INDEX ix_deals_listed_category ON deals (lower(category), created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+CREATE INDEX ix_deals_listed_store ON deals (store, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+CREATE INDEX ix_deals_affiliate_url ON deals USING HASH (affiliate_url);
+
 -- ============================================================
 -- TABLE: deal_clicks
 -- ============================================================
+-- Range-partitioned by month (deal_clicks_YYYY_MM); partitions are created
+-- ahead and dropped after CLICK_RETENTION_MONTHS by the click rollup job
 CREATE TABLE deal_clicks (
-    id          VARCHAR     PRIMARY KEY,
+    id          VARCHAR     NOT NULL,
     deal_id     VARCHAR     NOT NULL REFERENCES deals(id),
     ip_address  VARCHAR,
     user_agent  TEXT,
     referrer    TEXT,
-    clicked_at  TIMESTAMP   DEFAULT now()
+    clicked_at  TIMESTAMP   NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, clicked_at)
+) PARTITION BY RANGE (clicked_at);
+
+CREATE INDEX ix_deal_clicks_deal_id ON deal_clicks (deal_id);
+
+-- ============================================================
+-- TABLE: deal_click_rollups
+-- ============================================================
+-- Clicks per deal per hour, kept after the raw partitions are dropped
+CREATE TABLE deal_click_rollups (
+    deal_id     VARCHAR     NOT NULL,
+    hour        TIMESTAMP   NOT NULL,
+    clicks      INTEGER     NOT NULL,
+    PRIMARY KEY (deal_id, hour)
 );
 
+CREATE INDEX ix_deal_click_rollups_hour ON deal_click_rollups (hour);
+
 -- ============================================================
 -- TABLE: social_shares
 -- ============================================================
@@ -97,6 +136,8 @@ CREATE TABLE social_shares (
     shared_at   TIMESTAMP   DEFAULT now()
 );
 
+CREATE INDEX ix_social_shares_deal_id ON social_shares (deal_id);
+
 -- ============================================================
 -- TABLE: short_urls
 -- ============================================================
@@ -105,11 +146,18 @@ CREATE TABLE short_urls (
     short_code      VARCHAR     NOT NULL,
     original_url    TEXT        NOT NULL,
     deal_id         VARCHAR     REFERENCES deals(id),
+    platform        VARCHAR,
     click_count     INTEGER     DEFAULT 0,
     created_at      TIMESTAMP   DEFAULT now()
 );
 
 CREATE UNIQUE INDEX ix_short_urls_short_code ON short_urls (short_code);
+CREATE INDEX ix_short_urls_deal_id ON short_urls (deal_id);
+-- One reusable share link per deal and platform (legacy rows have no platform)
+CREATE UNIQUE INDEX ux_short_urls_deal_platform ON short_urls (deal_id, platform) WHERE platform IS NOT NULL;
+
+-- Short code source; each nextval() reserves a block of 100 codes for one worker
+CREATE SEQUENCE short_url_code_seq START WITH 1 INCREMENT BY 100;
 
 -- ============================================================
 -- TABLE: banners
@@ -199,6 +247,8 @@ CREATE TABLE compliance_logs (
     created_at      TIMESTAMP   DEFAULT now()
 );
 
+CREATE INDEX ix_compliance_logs_deal_id ON compliance_logs (deal_id);
+
 -- ============================================================
 -- TABLE: task_logs
 -- ============================================================
@@ -87,6 +87,37 @@ echo ""
 echo "🔄 Step 5: Updating ECS service..."
 
 if aws ecs describe-services --cluster $CLUSTER_NAME --services $SERVICE_NAME --region $REGION &> /dev/null; then
+    # Apply schema migrations once, in a one-off task on the new image, before
+    # any task of the new revision starts
+    echo "🗄️ Running database migrations..."
+    NETWORK_CONFIG=$(aws ecs describe-services \
+        --cluster $CLUSTER_NAME \
+        --services $SERVICE_NAME \
+        --region $REGION \
+        --query 'services[0].networkConfiguration' \
+        --output json)
+    MIGRATE_TASK_ARN=$(aws ecs run-task \
+        --cluster $CLUSTER_NAME \
+        --task-definition $TASK_DEFINITION_ARN \
+        --launch-type FARGATE \
+        --network-configuration "$NETWORK_CONFIG" \
+        --overrides '{"containerOverrides":[{"name":"dealsphere-container","command":["python","-m","migrations"]}]}' \
+        --region $REGION \
+        --query 'tasks[0].taskArn' \
+        --output text)
+    aws ecs wait tasks-stopped --cluster $CLUSTER_NAME --tasks $MIGRATE_TASK_ARN --region $REGION
+    MIGRATE_EXIT_CODE=$(aws ecs describe-tasks \
+        --cluster $CLUSTER_NAME \
+        --tasks $MIGRATE_TASK_ARN \
+        --region $REGION \
+        --query 'tasks[0].containers[0].exitCode' \
+        --output text)
+    if [ "$MIGRATE_EXIT_CODE" != "0" ]; then
+        echo "❌ Migrations failed (exit code $MIGRATE_EXIT_CODE); see /ecs/dealsphere logs. Service not updated."
+        exit 1
+    fi
+    echo "✅ Migrations applied"
+
     # Update existing service
     aws ecs update-service \
         --cluster $CLUSTER_NAME \
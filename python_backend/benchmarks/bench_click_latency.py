@@ -0,0 +1,72 @@
+"""
+Click endpoint latency benchmark
+Fires POST /api/deals/{id}/click at a running server and reports latency
+percentiles. Run it once against a server started with
+EVENT_INGESTION_ENABLED=false (click rows inserted in the request) and once
+with the default queued ingestion to compare p99.
+
+Usage (from python_backend/):
+    python benchmarks/bench_click_latency.py --deal-id <id> [--url http://localhost:5000]
+        [--requests 5000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+def percentile(sorted_values, pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def worker(session, url: str, remaining: list, latencies: list, errors: list):
+    while remaining:
+        remaining.pop()
+        start = time.perf_counter()
+        try:
+            async with session.post(url) as response:
+                await response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+        except aiohttp.ClientError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Click endpoint latency benchmark")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--deal-id", required=True)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    options = parser.parse_args()
+
+    url = f"{options.url.rstrip('/')}/api/deals/{options.deal_id}/click"
+    latencies, errors = [], []
+    remaining = list(range(options.requests))
+    connector = aiohttp.TCPConnector(limit=options.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Warm up connections and the affiliate URL cache
+        async with session.post(url) as response:
+            await response.read()
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(session, url, remaining, latencies, errors) for _ in range(options.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{len(latencies)} requests, concurrency {options.concurrency}, {len(latencies) / elapsed:.0f} req/s")
+    print(f"p50 {percentile(latencies, 50):.1f} ms  p95 {percentile(latencies, 95):.1f} ms  "
+          f"p99 {percentile(latencies, 99):.1f} ms  max {latencies[-1]:.1f} ms  "
+          f"mean {statistics.fmean(latencies):.1f} ms")
+    if errors:
+        print(f"{len(errors)} errors, e.g. {errors[:5]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+HTTP throughput benchmark
+wrk-style load: keeps a fixed number of keep-alive connections busy for a
+fixed duration per path and reports requests/sec and latency percentiles.
+Run it against a server built before and after a change to compare.
+
+The API rate limit (100/min per client IP) would turn most requests into
+429s, so unless --keep-ip is given every request carries a distinct
+X-Forwarded-For address.
+
+Usage (from python_backend/):
+    python benchmarks/bench_http_throughput.py [--url http://localhost:5000]
+        [--paths /api/health /api/deals] [--duration 10] [--connections 64]
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+import aiohttp
+
+
+def percentile(sorted_values, pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def connection(session, url: str, deadline: float, latencies: list, statuses: Counter, ips, keep_ip: bool):
+    while time.perf_counter() < deadline:
+        headers = None if keep_ip else {"X-Forwarded-For": next(ips)}
+        start = time.perf_counter()
+        try:
+            async with session.get(url, headers=headers) as response:
+                await response.read()
+                statuses[response.status] += 1
+        except aiohttp.ClientError as e:
+            statuses[type(e).__name__] += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_path(url: str, duration: float, connections: int, keep_ip: bool):
+    latencies = []
+    statuses = Counter()
+    ips = (f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}" for n in itertools.count())
+    connector = aiohttp.TCPConnector(limit=connections)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Warm up connections and caches before measuring
+        await asyncio.gather(*(
+            connection(session, url, time.perf_counter() + 1, [], Counter(), ips, keep_ip)
+            for _ in range(connections)
+        ))
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            connection(session, url, deadline, latencies, statuses, ips, keep_ip)
+            for _ in range(connections)
+        ))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{url}")
+    print(f"  {len(latencies) / elapsed:,.0f} req/s over {elapsed:.1f}s with {connections} connections")
+    if latencies:
+        print(f"  latency ms: p50={percentile(latencies, 50):.2f} p90={percentile(latencies, 90):.2f} "
+              f"p99={percentile(latencies, 99):.2f} max={latencies[-1]:.2f}")
+    print(f"  responses: {dict(statuses)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--paths", nargs="+", default=["/api/health", "/api/deals"])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--keep-ip", action="store_true", help="send every request from the same client IP")
+    options = parser.parse_args()
+
+    for path in options.paths:
+        await run_path(options.url.rstrip("/") + path, options.duration, options.connections, options.keep_ip)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Metrics overhead benchmark
+Times HttpMetrics.record() on its own and a request through MetricsMiddleware
+against the same minimal ASGI app without it, to check that instrumentation
+stays well under 5 us per request.
+
+Usage (from python_backend/):
+    python benchmarks/bench_metrics_overhead.py [--requests 200000] [--routes 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import HttpMetrics, MetricsMiddleware
+
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+BODY = {"type": "http.response.body", "body": b'{"status": "healthy"}'}
+
+
+class Route:
+    def __init__(self, path: str):
+        self.path = path
+
+
+async def app(scope, receive, send):
+    scope["route"] = scope["_route"]
+    await send(dict(START))
+    await send(dict(BODY))
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def time_requests(handler, scopes) -> float:
+    start = time.perf_counter()
+    for scope in scopes:
+        await handler(dict(scope), receive, send)
+    return (time.perf_counter() - start) / len(scopes) * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--routes", type=int, default=50)
+    options = parser.parse_args()
+
+    routes = [Route(f"/api/route-{n}/{{item_id}}") for n in range(options.routes)]
+    scopes = [
+        {"type": "http", "method": "GET", "path": f"/api/route-{n % options.routes}/x",
+         "headers": [], "_route": routes[n % options.routes]}
+        for n in range(options.requests)
+    ]
+
+    metrics = HttpMetrics()
+    start = time.perf_counter()
+    for n in range(options.requests):
+        metrics.record("GET", routes[n % options.routes].path, 200, 0.0123, 2048)
+    print(f"record():             {(time.perf_counter() - start) / options.requests * 1e6:.2f} us")
+
+    bare = await time_requests(app, scopes)
+    instrumented = await time_requests(MetricsMiddleware(app, HttpMetrics()), scopes)
+    print(f"bare ASGI app:        {bare:.2f} us/request")
+    print(f"with middleware:      {instrumented:.2f} us/request")
+    print(f"middleware overhead:  {instrumented - bare:.2f} us/request")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render():             {(time.perf_counter() - start) * 1000:.1f} ms for {options.routes} routes, "
+          f"{len(text) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
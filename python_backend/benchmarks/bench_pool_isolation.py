@@ -0,0 +1,91 @@
+"""
+Connection pool isolation check
+Saturates the background and bulk pools with long-running statements (as a
+URL health check or a big import would) while timing short queries on the
+web pool, once without load and once under it. With separate pools the web
+p99 should not move; with everything on one pool it would climb to the
+length of the batch statements.
+
+Needs a reachable DATABASE_URL; only runs SELECTs.
+
+Usage (from python_backend/):
+    python benchmarks/bench_pool_isolation.py [--queries 2000] [--sleep 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import engine, background_engine, bulk_engine
+
+
+def percentile(sorted_values, pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def web_queries(count: int, concurrency: int) -> list:
+    latencies = []
+    remaining = iter(range(count))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies)
+
+
+async def batch_load(batch_engine, sleep: float, stop: asyncio.Event):
+    async def worker():
+        while not stop.is_set():
+            async with batch_engine.connect() as conn:
+                await conn.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": sleep})
+
+    # Twice the pool size, so checkouts queue the way they do when a job fans out
+    workers = [asyncio.create_task(worker()) for _ in range(batch_engine.pool.size() * 2)]
+    await stop.wait()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+
+def report(name: str, latencies: list):
+    print(f"{name}: p50={percentile(latencies, 50):.2f} ms p99={percentile(latencies, 99):.2f} ms "
+          f"max={latencies[-1]:.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sleep", type=float, default=0.5, help="seconds each batch statement holds its connection")
+    options = parser.parse_args()
+
+    await web_queries(100, options.concurrency)  # Open the web pool's connections first
+    report("web, idle batch pools", await web_queries(options.queries, options.concurrency))
+
+    stop = asyncio.Event()
+    load = [asyncio.create_task(batch_load(e, options.sleep, stop)) for e in (background_engine, bulk_engine)]
+    await asyncio.sleep(options.sleep)
+    report("web, saturated batch pools", await web_queries(options.queries, options.concurrency))
+    stop.set()
+    await asyncio.gather(*load)
+
+    for name, pool_engine in (("web", engine), ("background", background_engine), ("bulk", bulk_engine)):
+        wait = pool_engine.pool.wait
+        checkouts = sum(wait.counts)
+        print(f"{name} pool: {checkouts} checkouts, mean wait {wait.sum / max(1, checkouts) * 1000:.2f} ms, "
+              f"{pool_engine.pool.timeouts} timeouts")
+        await pool_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
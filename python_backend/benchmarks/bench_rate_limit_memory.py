@@ -0,0 +1,80 @@
+"""
+Rate limiter memory benchmark
+Sends one request each from 1M distinct client IPs through the memory
+rate-limit backend and through the old per-IP timestamp lists, and prints
+traced memory every 100k IPs. The token-bucket backend stays flat at
+RATE_LIMIT_MAX_KEYS buckets; the old lists grow with every new IP.
+
+Usage (from python_backend/):
+    python benchmarks/bench_rate_limit_memory.py [--ips 1000000] [--max-keys 100000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import MemoryRateLimitBackend, RateLimitRule
+
+
+class LegacyLimiter:
+    """The previous RateLimitMiddleware bookkeeping"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.requests = defaultdict(list)
+
+    async def hit(self, key: str, rule=None) -> bool:
+        now = time.time()
+        entries = self.requests[key]
+        while entries and entries[0] < now - self.window:
+            entries.pop(0)
+        if len(entries) >= self.limit:
+            return False
+        entries.append(now)
+        return True
+
+
+def ip(n: int) -> str:
+    return f"api:{10 + (n >> 24)}.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+
+async def measure(name: str, limiter, rule: RateLimitRule, ips: int, step: int):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    print(f"{name}:")
+    for n in range(ips):
+        await limiter.hit(ip(n), rule)
+        if (n + 1) % step == 0:
+            current = tracemalloc.get_traced_memory()[0] - baseline
+            print(f"  {n + 1:>9,} IPs  {current / 1024 / 1024:8.1f} MiB")
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    print(f"  {elapsed / ips * 1e6:.2f} us/request (including tracemalloc overhead)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ips", type=int, default=1_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    options = parser.parse_args()
+
+    rule = RateLimitRule("api", 100, 60)
+    step = max(1, options.ips // 10)
+    backend = MemoryRateLimitBackend(max_keys=options.max_keys)
+    await measure(f"token bucket, max {options.max_keys:,} keys", backend, rule, options.ips, step)
+    print(f"  {backend.stats()}")
+    if not options.skip_legacy:
+        await measure("legacy timestamp lists", LegacyLimiter(100, 60), rule, options.ips, step)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
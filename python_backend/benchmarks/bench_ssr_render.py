@@ -0,0 +1,100 @@
+"""
+SSR page render throughput benchmark
+Serves the same SEO page two ways in one in-process app, reading index.html
+and replacing </head> on every request (before) and rendering from the
+pre-split in-memory template (after), and reports requests per second.
+
+Usage (from python_backend/):
+    python benchmarks/bench_ssr_render.py [--html ../client/dist/index.html]
+        [--requests 5000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from seo_helper import generate_about_seo, inject_seo_into_html
+from utils.html_template import HtmlTemplate
+
+DEFAULT_HTML = "../client/dist/index.html" if os.path.exists("../client/dist/index.html") else "../client/index.html"
+
+
+def build_app(html_path: str) -> FastAPI:
+    app = FastAPI()
+    template = HtmlTemplate(html_path)
+
+    @app.get("/before/about")
+    async def before(request: Request):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        seo_tags = generate_about_seo(str(request.base_url).rstrip("/"))
+        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+
+    @app.get("/after/about")
+    async def after(request: Request):
+        seo_tags = generate_about_seo(str(request.base_url).rstrip("/"))
+        return Response(content=template.render(seo_tags), media_type="text/html")
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    remaining = list(range(requests))
+
+    async def worker():
+        while remaining:
+            remaining.pop()
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+def render_only(html_path: str, iterations: int = 20000):
+    seo_tags = generate_about_seo("https://example.com")
+    template = HtmlTemplate(html_path)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            inject_seo_into_html(f.read(), seo_tags).encode("utf-8")
+    before = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        template.render(seo_tags)
+    after = (time.perf_counter() - start) / iterations * 1e6
+
+    print(f"render only: before {before:.1f} us/page, after {after:.1f} us/page ({before / after:.1f}x)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--html", default=DEFAULT_HTML)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    options = parser.parse_args()
+
+    print(f"template: {options.html} ({os.path.getsize(options.html):,} bytes)")
+    render_only(options.html)
+
+    transport = httpx.ASGITransport(app=build_app(options.html))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/before/about", "/after/about"):
+            await run(client, path, 200, options.concurrency)  # warm-up
+        before = await run(client, "/before/about", options.requests, options.concurrency)
+        after = await run(client, "/after/about", options.requests, options.concurrency)
+    print(f"route: before {before:,.0f} req/s, after {after:,.0f} req/s ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Read replica routing check
+Runs a lag check, opens read sessions through database.read_replicas and
+prints which server answered each one, then repeats right after a simulated
+write and with a zero lag allowance, where every read must go to the primary.
+
+Works with two standalone local Postgres instances (a server that is not in
+recovery counts as a caught-up replica), e.g.:
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/dealsphere \\
+    DATABASE_REPLICA_URLS=postgresql://postgres@localhost:5433/dealsphere \\
+    python benchmarks/check_replica_routing.py
+
+Usage (from python_backend/):
+    python benchmarks/check_replica_routing.py [--reads 6]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import engines, read_replicas
+
+SERVER_SQL = text("SELECT current_setting('port') || CASE WHEN pg_is_in_recovery() THEN ' (standby)' ELSE '' END")
+
+
+async def route_reads(label: str, reads: int) -> Counter:
+    servers = Counter()
+    for _ in range(reads):
+        async with read_replicas.session() as session:
+            servers[f"port {await session.scalar(SERVER_SQL)}"] += 1
+    print(f"{label}: {dict(servers)}")
+    return servers
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--reads", type=int, default=6)
+    options = parser.parse_args()
+
+    if not read_replicas.replicas:
+        print("DATABASE_REPLICA_URLS is not set; every read goes to the primary")
+    await read_replicas.check()
+    for replica in read_replicas.replicas:
+        print(f"{replica.name}: healthy={replica.healthy} lag={replica.lag}")
+
+    await route_reads("round robin", options.reads)
+
+    read_replicas.wrote()
+    await route_reads("right after a write", options.reads)
+    read_replicas._primary_until = 0.0
+
+    max_lag = read_replicas.max_lag
+    read_replicas.max_lag = -1
+    await read_replicas.check()
+    await route_reads("all replicas over the lag limit", options.reads)
+    read_replicas.max_lag = max_lag
+
+    print(read_replicas.stats())
+    for pool_engine in engines.values():
+        await pool_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,204 @@
+"""
+EXPLAIN regression check for the deal indexes
+Seeds a throwaway schema with 1M deals, runs EXPLAIN on the queries the
+public listings, search and click lookups actually issue, and fails if any of
+them stops using its index.
+
+Point DATABASE_URL at a scratch database; everything is created in the
+"explain_deal_indexes" schema, which is dropped afterwards.
+
+Usage (from python_backend/):
+    python benchmarks/explain_deal_indexes.py [--rows 1000000] [--keep]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database import Base, DATABASE_URL, connect_args
+from migrations import apply_migrations
+from models import Deal as DealModel, DealClick as DealClickModel
+from services.deals_service import DealsService, DEAL_CARD_COLUMNS, encode_cursor
+from simple_server import _public_deals_query
+
+SCHEMA = "explain_deal_indexes"
+PAGE = 50
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+SEED_DEALS = """
+INSERT INTO deals (
+    id, title, description, original_price, sale_price, discount_percentage,
+    image_url, affiliate_url, store, category, is_active, is_ai_approved, status,
+    popularity, click_count, share_count, deal_type, url_status, created_at, updated_at
+)
+SELECT
+    'deal-' || i,
+    (ARRAY['Wireless Headphones', 'Gaming Laptop', 'Running Shoes', 'Air Fryer', 'Smart Watch'])[1 + i % 5] || ' ' || i,
+    'Limited time offer on item ' || i,
+    100 + i % 400, 50 + i % 200, 10 + i % 80,
+    'https://images.example.com/' || i || '.jpg',
+    'https://shop.example.com/p/' || i || '?tag=dealsphere-20',
+    'Store ' || (i % 50),
+    'Category ' || (i % 20),
+    i % 10 <> 0,
+    i % 7 <> 0,
+    CASE WHEN i % 7 = 0 THEN 'rejected' ELSE 'approved' END,
+    (i * 7919) % 10000,
+    (i * 104729) % 5000,
+    i % 100,
+    (ARRAY['latest', 'top', 'hot'])[1 + i % 3],
+    'healthy',
+    now() - (i || ' minutes')::interval,
+    now()
+FROM generate_series(1, CAST(:rows AS bigint)) AS i
+"""
+
+SEED_CLICKS = """
+INSERT INTO deal_clicks (id, deal_id, ip_address, clicked_at)
+SELECT 'click-' || i, 'deal-' || (1 + (i * 7919) % :rows), '10.0.0.1', now()
+FROM generate_series(1, CAST(:clicks AS bigint)) AS i
+"""
+
+
+def cases(rows: int):
+    service = DealsService(db=None)
+    cards = select(*DEAL_CARD_COLUMNS)
+
+    # A cursor halfway down the seeded timeline
+    middle = SimpleNamespace(id=f"deal-{rows // 2}", created_at=datetime.utcnow() - timedelta(minutes=rows // 2))
+    cursor = encode_cursor('latest', middle)
+
+    return [
+        ("latest listing", "ix_deals_listed_latest",
+         service._listing_query(cards).limit(PAGE)),
+        ("latest listing, cursor page", "ix_deals_listed_latest",
+         service._listing_query(cards, cursor=cursor).limit(PAGE)),
+        ("deal_type=latest", "ix_deals_listed_type_latest",
+         service._listing_query(cards, deal_type="latest").limit(PAGE)),
+        ("deal_type=top", "ix_deals_listed_type_top",
+         service._listing_query(cards, deal_type="top").limit(PAGE)),
+        ("deal_type=hot", "ix_deals_listed_type_hot",
+         service._listing_query(cards, deal_type="hot").limit(PAGE)),
+        ("category listing", "ix_deals_listed_category",
+         service._listing_query(cards, category="category 3").limit(PAGE)),
+        ("store listing", "ix_deals_listed_store",
+         service._listing_query(cards, store="Store 7").limit(PAGE)),
+        ("simple_server /api/deals", "ix_deals_listed_latest",
+         _public_deals_query().limit(PAGE)),
+        ("full-text search", "ix_deals_search_vector",
+         select(DealModel.id).where(service._search_filter("gaming laptop 4242"))),
+        ("import duplicate check", "ix_deals_affiliate_url",
+         select(DealModel).where(DealModel.affiliate_url == "https://shop.example.com/p/42?tag=dealsphere-20")),
+        # Seeded clicks all land in this month's partition, which carries its own copy of ix_deal_clicks_deal_id
+        ("clicks for a deal", f"deal_clicks_{datetime.utcnow():%Y_%m}_deal_id_idx",
+         select(DealClickModel.id).where(DealClickModel.deal_id == "deal-42")),
+    ]
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def plan_problems(plan: dict, index_name: str) -> list:
+    """Why ``plan`` fails the check: the expected index is not used, or a
+    table is read with a sequential scan. Empty when the plan is fine."""
+    nodes = list(plan_nodes(plan))
+    used = {node.get("Index Name") for node in nodes if node["Node Type"] in INDEX_NODES}
+    problems = []
+    if index_name not in used:
+        problems.append(f"expected {index_name}, used {sorted(i for i in used if i) or 'no index'}")
+    problems.extend(f"seq scan on {node['Relation Name']}" for node in nodes if node["Node Type"] == "Seq Scan")
+    return problems
+
+
+async def missing_indexes(conn, index_names) -> list:
+    result = await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = :schema"), {"schema": SCHEMA}
+    )
+    existing = set(result.scalars().all())
+    return sorted(set(index_names) - existing)
+
+
+async def explain(conn, query) -> dict:
+    compiled = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup or ())
+    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), args)
+    document = result.scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    return document[0]["Plan"]
+
+
+async def seed(engine, rows: int):
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        await conn.run_sync(Base.metadata.create_all)
+    await apply_migrations(engine)
+
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.execute(text(SEED_DEALS), {"rows": rows})
+        await conn.execute(text(SEED_CLICKS), {"rows": rows, "clicks": rows // 5})
+    print(f"Seeded {rows:,} deals in {time.perf_counter() - start:.1f}s")
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE deals")
+        await conn.exec_driver_sql("VACUUM ANALYZE deal_clicks")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded schema")
+    options = parser.parse_args()
+
+    engine = create_async_engine(
+        DATABASE_URL,
+        connect_args={**connect_args, "server_settings": {"search_path": SCHEMA}},
+    )
+    failures = []
+    try:
+        await seed(engine, options.rows)
+        async with engine.connect() as conn:
+            checks = cases(options.rows)
+            # A migration that no longer creates an index would otherwise only
+            # show up as a plan that does not use it
+            for index_name in await missing_indexes(conn, [index_name for _, index_name, _ in checks]):
+                print(f"FAIL index {index_name} does not exist")
+                failures.append(f"missing {index_name}")
+
+            for name, index_name, query in checks:
+                plan = await explain(conn, query)
+                problems = plan_problems(plan, index_name)
+                print(f"{'FAIL' if problems else 'ok  '} {name:<30} {plan['Node Type']:<18} "
+                      f"cost={plan['Total Cost']:<10} {'; '.join(problems)}")
+                if problems:
+                    failures.append(name)
+    finally:
+        if not options.keep:
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await engine.dispose()
+
+    # Non-zero exit status so CI fails on any regression
+    if failures:
+        raise SystemExit(f"Index check failed for: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,48 +6,109 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 # import asyncpg
 from dotenv import load_dotenv
 
+from utils.db_pools import InstrumentedQueuePool
+from utils.periodic import PeriodicTask
+from utils.replicas import Replica, ReplicaRouter
+from utils.sql_profiler import attach_profiler
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
-# Convert postgres:// to postgresql:// for SQLAlchemy
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-# For async support, we need to use postgresql+asyncpg
-if not DATABASE_URL.startswith("postgresql+asyncpg://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-
-# Handle SSL mode for asyncpg - convert sslmode parameter to connect_args
-if "?sslmode=require" in DATABASE_URL:
-    DATABASE_URL = DATABASE_URL.replace("?sslmode=require", "")
-    connect_args = {"ssl": "require"}
-elif "sslmode=require" in DATABASE_URL:
-    # Remove sslmode from URL and handle it in connect_args
-    parts = DATABASE_URL.split("?")
-    if len(parts) > 1:
-        params = parts[1].split("&")
-        filtered_params = [p for p in params if not p.startswith("sslmode=")]
-        if filtered_params:
-            DATABASE_URL = parts[0] + "?" + "&".join(filtered_params)
-        else:
-            DATABASE_URL = parts[0]
-    connect_args = {"ssl": "require"}
-else:
-    connect_args = {}
-
-# Create async engine with connection pooling
-engine = create_async_engine(
-    DATABASE_URL, 
-    connect_args=connect_args,
-    pool_size=20,
-    max_overflow=0,
-    pool_pre_ping=True,
-    pool_recycle=300
-)
+# Optional comma-separated replica URLs for read-only public endpoints
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+# Replicas further behind the primary than this are skipped until they catch up
+DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "5"))
+DATABASE_REPLICA_CHECK_SECONDS = int(os.getenv("DATABASE_REPLICA_CHECK_SECONDS", "5"))
+
+
+def _asyncpg_url(url: str):
+    """SQLAlchemy asyncpg URL and connect_args for a postgres:// URL"""
+    # Convert postgres:// to postgresql:// for SQLAlchemy
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    # For async support, we need to use postgresql+asyncpg
+    if not url.startswith("postgresql+asyncpg://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Handle SSL mode for asyncpg - convert sslmode parameter to connect_args
+    if "?sslmode=require" in url:
+        return url.replace("?sslmode=require", ""), {"ssl": "require"}
+    if "sslmode=require" in url:
+        # Remove sslmode from URL and handle it in connect_args
+        parts = url.split("?")
+        if len(parts) > 1:
+            params = parts[1].split("&")
+            filtered_params = [p for p in params if not p.startswith("sslmode=")]
+            if filtered_params:
+                url = parts[0] + "?" + "&".join(filtered_params)
+            else:
+                url = parts[0]
+        return url, {"ssl": "require"}
+    return url, {}
+
+
+DATABASE_URL, connect_args = _asyncpg_url(DATABASE_URL)
+
+# One pool per workload, so batch jobs and imports queue for their own
+# connections instead of the public API's. Each is sized from
+# DB_POOL_<NAME>_SIZE / _MAX_OVERFLOW / _TIMEOUT (seconds to wait for a
+# connection before failing).
+POOL_DEFAULTS = {
+    "web": {"size": 20, "max_overflow": 0, "timeout": 30},
+    "background": {"size": 5, "max_overflow": 0, "timeout": 30},
+    "bulk": {"size": 3, "max_overflow": 0, "timeout": 60},
+}
+# Applied to each replica (DB_POOL_REPLICA_SIZE etc.)
+REPLICA_POOL_DEFAULTS = {"size": 20, "max_overflow": 0, "timeout": 30}
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "300"))
+
+
+def _create_engine(name: str, url: str = DATABASE_URL, url_connect_args: dict = connect_args,
+                   defaults: dict = None):
+    settings = {
+        key: int(os.getenv(f"DB_POOL_{name.upper()}_{key.upper()}", str(default)))
+        for key, default in (defaults or POOL_DEFAULTS[name]).items()
+    }
+    pool_engine = create_async_engine(
+        url,
+        connect_args=url_connect_args,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings["size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["timeout"],
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS
+    )
+    # Per-request query counts and the slow-query log (see utils/metrics.py)
+    attach_profiler(pool_engine)
+    return pool_engine
+
+
+engines = {name: _create_engine(name) for name in POOL_DEFAULTS}
+# web: request handlers. background: periodic jobs, event ingestion,
+# schedulers and health checks. bulk: uploads, imports and bulk actions.
+engine = engines["web"]
+background_engine = engines["background"]
+bulk_engine = engines["bulk"]
+
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+background_session = async_sessionmaker(background_engine, class_=AsyncSession, expire_on_commit=False)
+bulk_session = async_sessionmaker(bulk_engine, class_=AsyncSession, expire_on_commit=False)
+
+read_replicas = ReplicaRouter(
+    [
+        Replica(f"replica-{index}", _create_engine("replica", *_asyncpg_url(url), defaults=REPLICA_POOL_DEFAULTS))
+        for index, url in enumerate(DATABASE_REPLICA_URLS)
+    ],
+    primary=async_session,
+    max_lag=DATABASE_REPLICA_MAX_LAG_SECONDS
+)
+engines.update((replica.name, replica.engine) for replica in read_replicas.replicas)
+replica_lag_check = PeriodicTask("Replica lag check", DATABASE_REPLICA_CHECK_SECONDS, read_replicas.check)
 
 Base = declarative_base()
 
@@ -58,6 +119,24 @@ async def get_db():
         finally:
             await session.close()
 
+async def get_read_db():
+    """Request session for read-only public endpoints, on a replica within
+    DATABASE_REPLICA_MAX_LAG_SECONDS of the primary or else on the primary.
+    Anything that writes, or must see a write it just made, uses get_db."""
+    async with read_replicas.session() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+async def get_bulk_db():
+    """Request session on the bulk pool, for handlers that write many rows"""
+    async with bulk_session() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
 async def init_database():
     """Initialize database tables"""
     async with engine.begin() as conn:
@@ -0,0 +1,202 @@
+-- Baseline: the schema SQLAlchemy's create_all produced before numbered
+-- migrations existed, plus the URL health columns that startup used to add.
+-- Everything is IF NOT EXISTS, so it is a no-op on a database created that
+-- way and only records version 0. Later changes (search vector, listing
+-- indexes, short URL sequence, click partitioning) live in their own files.
+
+CREATE TABLE IF NOT EXISTS admin_users (
+    id VARCHAR NOT NULL,
+    username VARCHAR NOT NULL,
+    email VARCHAR NOT NULL,
+    password_hash VARCHAR NOT NULL,
+    is_active BOOLEAN,
+    role VARCHAR,
+    permissions JSON,
+    created_by VARCHAR,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_admin_users_email ON admin_users (email);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_admin_users_username ON admin_users (username);
+
+CREATE TABLE IF NOT EXISTS affiliate_configs (
+    id SERIAL NOT NULL,
+    network_id VARCHAR(50),
+    network_name VARCHAR(200) NOT NULL,
+    config_data JSON,
+    compliance_terms JSON,
+    is_active BOOLEAN,
+    last_sync TIMESTAMP WITHOUT TIME ZONE,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_affiliate_configs_id ON affiliate_configs (id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_affiliate_configs_network_id ON affiliate_configs (network_id);
+
+CREATE TABLE IF NOT EXISTS affiliate_networks (
+    id SERIAL NOT NULL,
+    network_id VARCHAR(50),
+    name VARCHAR(200) NOT NULL,
+    description TEXT,
+    api_type VARCHAR(50),
+    base_url VARCHAR(500),
+    compliance_terms JSON,
+    is_active BOOLEAN,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_affiliate_networks_id ON affiliate_networks (id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_affiliate_networks_network_id ON affiliate_networks (network_id);
+
+CREATE TABLE IF NOT EXISTS banners (
+    id VARCHAR NOT NULL,
+    name VARCHAR NOT NULL,
+    position VARCHAR NOT NULL,
+    banner_type VARCHAR NOT NULL,
+    image_url TEXT,
+    link_url TEXT,
+    html_code TEXT,
+    alt_text VARCHAR,
+    sort_order INTEGER,
+    is_active BOOLEAN,
+    start_date TIMESTAMP WITHOUT TIME ZONE,
+    end_date TIMESTAMP WITHOUT TIME ZONE,
+    click_count INTEGER,
+    impression_count INTEGER,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS deals (
+    id VARCHAR NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    original_price NUMERIC(10, 2) NOT NULL,
+    sale_price NUMERIC(10, 2) NOT NULL,
+    discount_percentage INTEGER NOT NULL,
+    image_url TEXT,
+    affiliate_url TEXT NOT NULL,
+    store VARCHAR NOT NULL,
+    store_logo_url TEXT,
+    category VARCHAR NOT NULL,
+    rating NUMERIC(2, 1),
+    review_count INTEGER,
+    expires_at TIMESTAMP WITHOUT TIME ZONE,
+    is_active BOOLEAN,
+    is_ai_approved BOOLEAN,
+    status VARCHAR,
+    ai_score NUMERIC(3, 1),
+    ai_reasons JSON,
+    popularity INTEGER,
+    click_count INTEGER,
+    share_count INTEGER,
+    deal_type VARCHAR NOT NULL,
+    source_api VARCHAR,
+    coupon_code VARCHAR,
+    coupon_required BOOLEAN,
+    rejected_at TIMESTAMP WITHOUT TIME ZONE,
+    deleted_at TIMESTAMP WITHOUT TIME ZONE,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+-- Columns for services/url_health_checker.py, previously added on every boot;
+-- one statement, so the table lock is taken once
+ALTER TABLE deals
+    ADD COLUMN IF NOT EXISTS url_last_checked TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS url_check_failures INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS url_status VARCHAR DEFAULT 'unchecked',
+    ADD COLUMN IF NOT EXISTS url_flagged_at TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS sessions (
+    sid VARCHAR NOT NULL,
+    sess JSON NOT NULL,
+    expire TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (sid)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id VARCHAR NOT NULL,
+    email VARCHAR,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    profile_image_url VARCHAR,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id),
+    UNIQUE (email)
+);
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id VARCHAR NOT NULL,
+    admin_id VARCHAR NOT NULL,
+    admin_username VARCHAR NOT NULL,
+    action VARCHAR NOT NULL,
+    resource_type VARCHAR NOT NULL,
+    resource_id VARCHAR,
+    details JSON,
+    ip_address VARCHAR,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id),
+    FOREIGN KEY(admin_id) REFERENCES admin_users (id)
+);
+
+CREATE TABLE IF NOT EXISTS compliance_logs (
+    id SERIAL NOT NULL,
+    deal_id VARCHAR(36),
+    network_id VARCHAR(50),
+    compliance_check JSON,
+    is_compliant BOOLEAN,
+    issues_found JSON,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id),
+    FOREIGN KEY(deal_id) REFERENCES deals (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_compliance_logs_id ON compliance_logs (id);
+
+CREATE TABLE IF NOT EXISTS deal_clicks (
+    id VARCHAR NOT NULL,
+    deal_id VARCHAR NOT NULL,
+    ip_address VARCHAR,
+    user_agent TEXT,
+    referrer TEXT,
+    clicked_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id),
+    FOREIGN KEY(deal_id) REFERENCES deals (id)
+);
+
+CREATE TABLE IF NOT EXISTS short_urls (
+    id VARCHAR NOT NULL,
+    short_code VARCHAR NOT NULL,
+    original_url TEXT NOT NULL,
+    deal_id VARCHAR,
+    click_count INTEGER,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id),
+    FOREIGN KEY(deal_id) REFERENCES deals (id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_short_urls_short_code ON short_urls (short_code);
+
+CREATE TABLE IF NOT EXISTS social_shares (
+    id VARCHAR NOT NULL,
+    deal_id VARCHAR NOT NULL,
+    platform VARCHAR NOT NULL,
+    ip_address VARCHAR,
+    short_url VARCHAR,
+    shared_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id),
+    FOREIGN KEY(deal_id) REFERENCES deals (id)
+);
@@ -0,0 +1,29 @@
+-- Full-text search over deals: weighted tsvector (title > store/category >
+-- description) kept current by a trigger, with a GIN index for @@ matching.
+
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION deals_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.store, '') || ' ' || coalesce(NEW.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS deals_search_vector_trigger ON deals;
+
+CREATE TRIGGER deals_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, store, category ON deals
+    FOR EACH ROW EXECUTE FUNCTION deals_search_vector_update();
+
+-- Backfill rows written before the trigger existed
+UPDATE deals SET search_vector =
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(store, '') || ' ' || coalesce(category, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_deals_search_vector ON deals USING GIN (search_vector);
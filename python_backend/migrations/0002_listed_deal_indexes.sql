@@ -0,0 +1,43 @@
+-- migrate: no-transaction
+-- Indexes for the public deal listings and the deal foreign keys.
+-- The deal indexes are partial on the rows a public listing can return
+-- (is_active AND is_ai_approved) and follow the keyset orderings in
+-- services/deals_service.py, so each listing is an index range scan.
+-- Built CONCURRENTLY so deals stays writable while they build; that cannot
+-- run inside a transaction, hence the no-transaction marker above.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_listed_latest
+    ON deals (created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_listed_type_latest
+    ON deals (deal_type, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_listed_type_top
+    ON deals (deal_type, COALESCE(popularity, 0) DESC, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_listed_type_hot
+    ON deals (deal_type, COALESCE(click_count, 0) DESC, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_listed_category
+    ON deals (lower(category), created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_listed_store
+    ON deals (store, created_at DESC, id DESC)
+    WHERE is_active = true AND is_ai_approved = true;
+
+-- Duplicate detection on import (equality only)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_deals_affiliate_url ON deals USING HASH (affiliate_url);
+
+-- Not CONCURRENTLY, which partitioned tables do not support. On a new
+-- database deal_clicks is still a plain, empty table here, but databases
+-- from before schema_version ran every file on boot, so 0004 had already
+-- partitioned it when they first record 0002.
+CREATE INDEX IF NOT EXISTS ix_deal_clicks_deal_id ON deal_clicks (deal_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_social_shares_deal_id ON social_shares (deal_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_short_urls_deal_id ON short_urls (deal_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_compliance_logs_deal_id ON compliance_logs (deal_id);
@@ -0,0 +1,13 @@
+-- Sequence-backed short codes and one reusable short URL per (deal, platform).
+-- Each nextval() reserves a block of 100 ids for one worker; the increment
+-- must match SHORT_CODE_BLOCK_SIZE in services/short_code_allocator.py.
+-- Rows created before this migration keep their random 8-character codes
+-- and a NULL platform, so they are neither reused nor constrained.
+
+CREATE SEQUENCE IF NOT EXISTS short_url_code_seq START WITH 1 INCREMENT BY 100;
+
+ALTER TABLE short_urls ADD COLUMN IF NOT EXISTS platform VARCHAR;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_short_urls_deal_platform
+    ON short_urls (deal_id, platform)
+    WHERE platform IS NOT NULL;
@@ -0,0 +1,66 @@
+-- deal_clicks range-partitioned by month on clicked_at, plus hourly per-deal
+-- rollups that the dashboards read instead of the raw clicks.
+-- services/click_rollups.py keeps partitions created ahead of time, maintains
+-- the rollups and drops partitions past CLICK_RETENTION_MONTHS.
+
+CREATE OR REPLACE FUNCTION ensure_deal_click_partitions(from_day date, to_day date)
+RETURNS void AS $$
+DECLARE
+    partition_start date := date_trunc('month', from_day);
+BEGIN
+    WHILE partition_start <= to_day LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF deal_clicks FOR VALUES FROM (%L) TO (%L)',
+            'deal_clicks_' || to_char(partition_start, 'YYYY_MM'),
+            partition_start,
+            (partition_start + interval '1 month')::date
+        );
+        partition_start := partition_start + interval '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One-off conversion of an existing unpartitioned table; the primary key has
+-- to include the partition key, and clicked_at can no longer be NULL
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'deal_clicks'::regclass) THEN
+        ALTER TABLE deal_clicks RENAME TO deal_clicks_unpartitioned;
+        ALTER TABLE deal_clicks_unpartitioned DROP CONSTRAINT IF EXISTS deal_clicks_pkey;
+        DROP INDEX IF EXISTS ix_deal_clicks_deal_id;
+
+        CREATE TABLE deal_clicks (
+            id          VARCHAR     NOT NULL,
+            deal_id     VARCHAR     NOT NULL REFERENCES deals(id),
+            ip_address  VARCHAR,
+            user_agent  TEXT,
+            referrer    TEXT,
+            clicked_at  TIMESTAMP   NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, clicked_at)
+        ) PARTITION BY RANGE (clicked_at);
+        CREATE INDEX ix_deal_clicks_deal_id ON deal_clicks (deal_id);
+
+        PERFORM ensure_deal_click_partitions(
+            COALESCE((SELECT min(clicked_at) FROM deal_clicks_unpartitioned), now())::date,
+            now()::date
+        );
+        INSERT INTO deal_clicks (id, deal_id, ip_address, user_agent, referrer, clicked_at)
+        SELECT id, deal_id, ip_address, user_agent, referrer, COALESCE(clicked_at, now())
+        FROM deal_clicks_unpartitioned;
+        DROP TABLE deal_clicks_unpartitioned;
+    END IF;
+END
+$$;
+
+-- Current month and the next two, so inserts never miss a partition even if
+-- the maintenance job has not run for a while
+SELECT ensure_deal_click_partitions(now()::date, (now() + interval '2 months')::date);
+
+CREATE TABLE IF NOT EXISTS deal_click_rollups (
+    deal_id     VARCHAR     NOT NULL,
+    hour        TIMESTAMP   NOT NULL,
+    clicks      INTEGER     NOT NULL,
+    PRIMARY KEY (deal_id, hour)
+);
+
+CREATE INDEX IF NOT EXISTS ix_deal_click_rollups_hour ON deal_click_rollups (hour);
@@ -0,0 +1,49 @@
+-- migrate: no-transaction
+-- deals.created_at is the keyset pagination key (see KEYSET_ORDERINGS in
+-- services/deals_service.py), so it must never be NULL. Rows that predate
+-- the server default get their updated_at, or now().
+-- The scan that proves there are no NULLs runs as VALIDATE CONSTRAINT, which
+-- lets writes continue; SET NOT NULL then reuses the validated check instead
+-- of scanning again under an ACCESS EXCLUSIVE lock. Each statement below
+-- commits on its own and can be re-run, so the long validation is never
+-- held open together with the ACCESS EXCLUSIVE step.
+
+UPDATE deals SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'deals'::regclass AND conname = 'deals_created_at_not_null'
+    ) AND NOT (
+        SELECT attnotnull FROM pg_attribute
+        WHERE attrelid = 'deals'::regclass AND attname = 'created_at'
+    ) THEN
+        ALTER TABLE deals ADD CONSTRAINT deals_created_at_not_null CHECK (created_at IS NOT NULL) NOT VALID;
+    END IF;
+END
+$$;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'deals'::regclass AND conname = 'deals_created_at_not_null'
+              AND NOT convalidated
+    ) THEN
+        ALTER TABLE deals VALIDATE CONSTRAINT deals_created_at_not_null;
+    END IF;
+END
+$$;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'deals'::regclass AND conname = 'deals_created_at_not_null'
+    ) THEN
+        ALTER TABLE deals ALTER COLUMN created_at SET NOT NULL;
+        ALTER TABLE deals DROP CONSTRAINT deals_created_at_not_null;
+    END IF;
+END
+$$;
@@ -0,0 +1,8 @@
+-- The click rollup scans deal_clicks by clicked_at (WHERE clicked_at >= :since),
+-- which the (id, clicked_at) primary key cannot serve. Clicks are appended in
+-- time order, so a BRIN index fits: it is a few pages per partition and takes
+-- seconds to build. An index on a partitioned parent cannot be built
+-- CONCURRENTLY; this one is created on every partition, and on partitions
+-- created later, automatically.
+
+CREATE INDEX IF NOT EXISTS ix_deal_clicks_clicked_at ON deal_clicks USING brin (clicked_at);
@@ -0,0 +1,164 @@
+"""
+Schema Migrations
+Numbered SQL files applied once each, in order, and recorded in the
+schema_version table. Run them with ``python -m migrations``; application
+boot only compares the recorded version with the newest file.
+"""
+
+import logging
+import os
+import re
+from pathlib import Path
+from typing import List, Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent
+
+# Arbitrary application-wide key so two migration runs never overlap
+MIGRATION_LOCK_KEY = 727_001
+
+# Apply pending migrations at startup instead of only warning about them;
+# meant for single-instance and development setups, not for rolling restarts
+MIGRATE_ON_BOOT = os.getenv("MIGRATE_ON_BOOT", "false").lower() == "true"
+
+# First line of a file whose statements must each run in their own
+# transaction, e.g. CREATE INDEX CONCURRENTLY
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+CREATE_SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version     INTEGER     PRIMARY KEY,
+    name        VARCHAR     NOT NULL,
+    applied_at  TIMESTAMP   NOT NULL DEFAULT now()
+)
+"""
+
+CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE
+)
+
+INVALID_INDEX_SQL = text("""
+    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND pg_table_is_visible(c.oid) AND NOT i.indisvalid
+""")
+
+
+def migration_files() -> List[Path]:
+    return sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9][0-9]_*.sql"))
+
+
+def migration_version(path: Path) -> int:
+    return int(path.name[:4])
+
+
+def latest_version() -> int:
+    files = migration_files()
+    return migration_version(files[-1]) if files else 0
+
+
+def split_sql_statements(sql: str) -> List[str]:
+    """Split a migration file on top-level semicolons, keeping $$-quoted bodies intact"""
+    statements = []
+    current = []
+    in_dollar_quote = False
+
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not in_dollar_quote and (not stripped or stripped.startswith("--")):
+            continue
+
+        current.append(line)
+        if line.count("$$") % 2 == 1:
+            in_dollar_quote = not in_dollar_quote
+
+        if not in_dollar_quote and stripped.endswith(";"):
+            statements.append("\n".join(current).rstrip().rstrip(";"))
+            current = []
+
+    if current and "".join(current).strip():
+        statements.append("\n".join(current).rstrip().rstrip(";"))
+    return statements
+
+
+async def applied_versions(conn: AsyncConnection) -> Set[int]:
+    if await conn.scalar(text("SELECT to_regclass('schema_version')")) is None:
+        return set()
+    return set((await conn.scalars(text("SELECT version FROM schema_version"))).all())
+
+
+async def _drop_invalid_index(conn: AsyncConnection, statement: str):
+    # A CREATE INDEX CONCURRENTLY that failed part way leaves an invalid index
+    # behind, which IF NOT EXISTS would then silently accept
+    match = CONCURRENT_INDEX_RE.search(statement)
+    if match and await conn.scalar(INVALID_INDEX_SQL, {"name": match.group(1)}):
+        logger.warning(f"Dropping invalid index {match.group(1)} left by an earlier failed build")
+        await conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+
+async def _apply(engine: AsyncEngine, lock_conn: AsyncConnection, path: Path):
+    sql = path.read_text(encoding="utf-8")
+    statements = split_sql_statements(sql)
+    record = text("INSERT INTO schema_version (version, name) VALUES (:version, :name)")
+    params = {"version": migration_version(path), "name": path.name}
+
+    if sql.startswith(NO_TRANSACTION_MARKER):
+        # lock_conn is in autocommit mode, so each statement commits on its own;
+        # the statements must be idempotent for a rerun after a failure
+        for statement in statements:
+            await _drop_invalid_index(lock_conn, statement)
+            await lock_conn.exec_driver_sql(statement)
+        await lock_conn.execute(record, params)
+        return
+
+    async with engine.begin() as conn:
+        for statement in statements:
+            await conn.exec_driver_sql(statement)
+        await conn.execute(record, params)
+
+
+async def apply_migrations(engine: AsyncEngine) -> int:
+    """Apply every migration not yet recorded in schema_version, in order and
+    each in its own transaction, and return how many were applied"""
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            await lock_conn.exec_driver_sql(CREATE_SCHEMA_VERSION_SQL)
+            applied = await applied_versions(lock_conn)
+            pending = [path for path in migration_files() if migration_version(path) not in applied]
+            for path in pending:
+                logger.info(f"Applying migration {path.name}")
+                await _apply(engine, lock_conn, path)
+            return len(pending)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+async def check_schema_version(engine: AsyncEngine):
+    """Startup check: one query against schema_version. Warns when migrations
+    are pending, or applies them when MIGRATE_ON_BOOT is set."""
+    async with engine.connect() as conn:
+        try:
+            applied = await conn.scalar(text("SELECT MAX(version) FROM schema_version"))
+        except ProgrammingError:
+            # No schema_version table: a database that predates the migrations
+            await conn.rollback()
+            applied = None
+
+    latest = latest_version()
+    if applied is not None and applied > latest:
+        logger.warning(f"Database schema is at version {applied}, newer than this build ({latest})")
+    elif applied is None or applied < latest:
+        if MIGRATE_ON_BOOT:
+            logger.info(f"Schema at version {applied}, migrating to {latest} (MIGRATE_ON_BOOT)")
+            await apply_migrations(engine)
+        else:
+            logger.warning(
+                f"Database schema is at version {'none' if applied is None else applied} but this build needs "
+                f"{latest}; run `python -m migrations`"
+            )
@@ -0,0 +1,44 @@
+"""
+Schema migration command
+Applies pending migrations, or reports the recorded and latest versions.
+
+Usage (from python_backend/):
+    python -m migrations [upgrade|status]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from database import engines, engine
+from migrations import apply_migrations, applied_versions, latest_version, migration_files, migration_version
+
+
+async def status():
+    async with engine.connect() as conn:
+        applied = await applied_versions(conn)
+    for path in migration_files():
+        print(f"{'applied' if migration_version(path) in applied else 'pending'}  {path.name}")
+    print(f"Schema version {max(applied) if applied else 'none'}, latest {latest_version()}")
+
+
+async def upgrade():
+    count = await apply_migrations(engine)
+    print(f"Applied {count} migration(s); schema version {latest_version()}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations", description=__doc__.split("\n")[1])
+    parser.add_argument("command", nargs="?", choices=("upgrade", "status"), default="upgrade")
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        await (upgrade() if options.command == "upgrade" else status())
+    finally:
+        for pool_engine in engines.values():
+            await pool_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,16 @@
-from sqlalchemy import Column, String, Text, Numeric, Integer, Boolean, DateTime, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Numeric, Integer, Boolean, DateTime, JSON, ForeignKey, Index, Sequence, literal_column, text
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from typing_extensions import TypedDict
 from datetime import datetime
 from database import Base
 
+# Rows a public listing can return; predicate of the partial deal indexes
+LISTED_DEALS_PREDICATE = text("is_active = true AND is_ai_approved = true")
+
 # SQLAlchemy Models
 class Deal(Base):
     __tablename__ = "deals"
@@ -42,31 +47,69 @@ class Deal(Base):
     url_check_failures = Column(Integer, default=0)
     url_status = Column(String, default='unchecked')  # unchecked, healthy, broken
     url_flagged_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
+    # Weighted full-text document, maintained by a trigger (migrations/0001)
+    search_vector = deferred(Column(TSVECTOR))
+    # Keyset pagination key; NOT NULL since migrations/0005
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     clicks = relationship("DealClick", back_populates="deal")
     shares = relationship("SocialShare", back_populates="deal")
 
+    # Partial indexes over publicly listed deals, one per keyset ordering used
+    # by DealsService (see KEYSET_ORDERINGS). Mirrored by migrations/0002.
+    __table_args__ = (
+        Index("ix_deals_listed_latest", created_at.desc(), id.desc(), postgresql_where=LISTED_DEALS_PREDICATE),
+        Index("ix_deals_listed_type_latest", deal_type, created_at.desc(), id.desc(), postgresql_where=LISTED_DEALS_PREDICATE),
+        Index(
+            "ix_deals_listed_type_top",
+            deal_type, func.coalesce(popularity, literal_column("0")).desc(), created_at.desc(), id.desc(),
+            postgresql_where=LISTED_DEALS_PREDICATE
+        ),
+        Index(
+            "ix_deals_listed_type_hot",
+            deal_type, func.coalesce(click_count, literal_column("0")).desc(), created_at.desc(), id.desc(),
+            postgresql_where=LISTED_DEALS_PREDICATE
+        ),
+        Index("ix_deals_listed_category", func.lower(category), created_at.desc(), id.desc(), postgresql_where=LISTED_DEALS_PREDICATE),
+        Index("ix_deals_listed_store", store, created_at.desc(), id.desc(), postgresql_where=LISTED_DEALS_PREDICATE),
+        # Duplicate detection on import; hash because affiliate URLs can exceed the btree row limit
+        Index("ix_deals_affiliate_url", affiliate_url, postgresql_using="hash"),
+    )
+
 class DealClick(Base):
     __tablename__ = "deal_clicks"
     
     id = Column(String, primary_key=True)
-    deal_id = Column(String, ForeignKey("deals.id"), nullable=False)
+    deal_id = Column(String, ForeignKey("deals.id"), nullable=False, index=True)
     ip_address = Column(String)
     user_agent = Column(Text)
     referrer = Column(Text)
-    clicked_at = Column(DateTime, server_default=func.now())
+    # Partition key, so it is part of the primary key
+    clicked_at = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
     
     # Relationships
     deal = relationship("Deal", back_populates="clicks")
+    
+    # Monthly partitions are managed by services/click_rollups.py
+    __table_args__ = (
+        Index("ix_deal_clicks_clicked_at", clicked_at, postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (clicked_at)"},
+    )
+
+class DealClickRollup(Base):
+    __tablename__ = "deal_click_rollups"
+    
+    deal_id = Column(String, primary_key=True)
+    hour = Column(DateTime, primary_key=True, index=True)
+    clicks = Column(Integer, nullable=False)
 
 class SocialShare(Base):
     __tablename__ = "social_shares"
     
     id = Column(String, primary_key=True)
-    deal_id = Column(String, ForeignKey("deals.id"), nullable=False)
+    deal_id = Column(String, ForeignKey("deals.id"), nullable=False, index=True)
     platform = Column(String, nullable=False)
     ip_address = Column(String)
     short_url = Column(String)  # Store generated short URL
@@ -81,12 +124,21 @@ class ShortUrl(Base):
     id = Column(String, primary_key=True)
     short_code = Column(String, unique=True, nullable=False, index=True)
     original_url = Column(Text, nullable=False)
-    deal_id = Column(String, ForeignKey("deals.id"), nullable=True)
+    deal_id = Column(String, ForeignKey("deals.id"), nullable=True, index=True)
+    # Set on share links, which are reused per (deal, platform); NULL on legacy rows
+    platform = Column(String, nullable=True)
     click_count = Column(Integer, default=0)
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
     deal = relationship("Deal")
+    
+    __table_args__ = (
+        Index("ux_short_urls_deal_platform", deal_id, platform, unique=True, postgresql_where=text("platform IS NOT NULL")),
+    )
+
+# Source of short codes; each nextval() reserves a block of ``increment`` ids
+short_url_code_seq = Sequence("short_url_code_seq", start=1, increment=100, metadata=Base.metadata)
 
 class User(Base):
     __tablename__ = "users"
@@ -171,6 +223,36 @@ class DealResponse(DealBase):
     class Config:
         from_attributes = True
 
+class DealCard(TypedDict):
+    """DealResponse-shaped payload built directly from projected columns"""
+    title: str
+    description: Optional[str]
+    original_price: float
+    sale_price: float
+    discount_percentage: Optional[int]
+    image_url: Optional[str]
+    affiliate_url: str
+    store: str
+    store_logo_url: Optional[str]
+    category: str
+    rating: Optional[float]
+    review_count: Optional[int]
+    expires_at: Optional[datetime]
+    deal_type: str
+    source_api: Optional[str]
+    coupon_code: Optional[str]
+    coupon_required: Optional[bool]
+    id: str
+    is_active: bool
+    is_ai_approved: bool
+    ai_score: Optional[float]
+    ai_reasons: Optional[Dict[str, Any]]
+    popularity: int
+    click_count: int
+    share_count: int
+    created_at: datetime
+    updated_at: datetime
+
 class DealClickCreate(BaseModel):
     deal_id: str
     ip_address: Optional[str] = None
@@ -231,7 +313,7 @@ class ComplianceLog(Base):
     __tablename__ = "compliance_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    deal_id = Column(String(36), ForeignKey("deals.id"))
+    deal_id = Column(String(36), ForeignKey("deals.id"), index=True)
     network_id = Column(String(50))
     compliance_check = Column(JSON)
     is_compliant = Column(Boolean, default=True)
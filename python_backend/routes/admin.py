@@ -6,9 +6,9 @@ from datetime import datetime, timedelta
 from typing import List, Optional
 import uuid
 
-from database import get_db
+from database import get_db, get_bulk_db
 from models import (
-    Deal, AdminUser, DealClick, SocialShare, AuditLog,
+    Deal, AdminUser, DealClickRollup, SocialShare, AuditLog,
     AdminUserCreate, AdminUserLogin, AdminUserResponse, AdminMetrics,
     AdminUserUpdate, AuditLogResponse,
     DealCreate, DealResponse, AVAILABLE_PERMISSIONS
@@ -17,6 +17,7 @@ from admin_auth import (
     authenticate_admin, create_access_token, get_current_admin,
     create_admin_user, check_permission, log_audit, hash_password
 )
+from services.deals_service import deals_changed, keyset_filter, keyset_order_by, next_page_cursor
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -204,7 +205,8 @@ async def get_admin_metrics(
     pending_result = await db.execute(select(func.count(Deal.id)).where(and_(active_filter, Deal.status == "pending")))
     pending_deals = pending_result.scalar() or 0
     
-    clicks_result = await db.execute(select(func.count(DealClick.id)))
+    # Rollups keep all-time totals after old click partitions are dropped
+    clicks_result = await db.execute(select(func.sum(DealClickRollup.clicks)))
     total_clicks = clicks_result.scalar() or 0
     
     shares_result = await db.execute(select(func.count(SocialShare.id)))
@@ -293,6 +295,7 @@ async def get_admin_metrics(
 async def get_all_deals(
     page: int = 1, per_page: int = 25,
     search: str = "", category: str = "", deal_status: str = "",
+    cursor: Optional[str] = None,
     current_admin: AdminUser = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
@@ -348,8 +351,14 @@ async def get_all_deals(
     total_result = await db.execute(count_query)
     total = total_result.scalar() or 0
 
-    offset = (page - 1) * per_page
-    query = query.order_by(desc(Deal.created_at)).offset(offset).limit(per_page)
+    if cursor:
+        try:
+            query = query.where(keyset_filter("latest", cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        query = query.offset((page - 1) * per_page)
+    query = query.order_by(*keyset_order_by("latest")).limit(per_page)
     result = await db.execute(query)
     deals = result.scalars().all()
 
@@ -358,7 +367,8 @@ async def get_all_deals(
         "total": total,
         "page": page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page if total > 0 else 1
+        "total_pages": (total + per_page - 1) // per_page if total > 0 else 1,
+        "next_cursor": next_page_cursor(deals, "latest", per_page)
     }
 
 @router.post("/deals", response_model=DealResponse)
@@ -380,6 +390,7 @@ async def create_deal(
     db.add(deal)
     await db.commit()
     await db.refresh(deal)
+    deals_changed([deal])
     
     await log_audit(
         db, current_admin, "create_deal", "deal", deal.id,
@@ -400,11 +411,13 @@ async def update_deal(
     if not deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     
+    previous_category, previous_store = deal.category, deal.store
     for field, value in deal_data.model_dump().items():
         setattr(deal, field, value)
     deal.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(deal)
+    deals_changed([deal], categories=[previous_category], stores=[previous_store])
     
     await log_audit(
         db, current_admin, "update_deal", "deal", deal_id,
@@ -430,6 +443,7 @@ async def delete_deal(
     deal.deleted_at = datetime.utcnow()
     deal.updated_at = datetime.utcnow()
     await db.commit()
+    deals_changed([deal])
     
     await log_audit(
         db, current_admin, "delete_deal", "deal", deal_id,
@@ -455,6 +469,7 @@ async def approve_deal(
     deal.is_active = True
     deal.updated_at = datetime.utcnow()
     await db.commit()
+    deals_changed([deal])
     
     await log_audit(
         db, current_admin, "approve_deal", "deal", deal_id,
@@ -481,6 +496,7 @@ async def reject_deal(
     deal.rejected_at = datetime.utcnow()
     deal.updated_at = datetime.utcnow()
     await db.commit()
+    deals_changed([deal])
     
     await log_audit(
         db, current_admin, "reject_deal", "deal", deal_id,
@@ -547,6 +563,8 @@ async def cleanup_rejected_deals(
     for deal in old_rejected_deals:
         await db.delete(deal)
     await db.commit()
+    if old_rejected_deals:
+        deals_changed(old_rejected_deals)
     
     await log_audit(
         db, current_admin, "cleanup_rejected_deals", "deal", None,
@@ -567,6 +585,25 @@ async def get_url_health_stats_endpoint(
     stats["check_progress"] = progress
     return stats
 
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Hit/miss counters and sizes of this worker's in-memory caches"""
+    check_permission(current_admin, "view_analytics")
+    from services.deals_service import deals_cache
+    from services.page_cache import page_cache
+    from services.short_url_resolver import short_url_resolver
+    from services.counter_buffer import counter_buffer
+    from services.sitemaps import sitemap_shards
+    return {
+        "deals_queries": deals_cache.stats(),
+        "pages": page_cache.stats(),
+        "short_urls": short_url_resolver.stats(),
+        "counters": counter_buffer.stats(),
+        "sitemaps": sitemap_shards.stats(),
+    }
+
 @router.post("/url-health/check")
 async def trigger_url_health_check(
     request: Request,
@@ -624,7 +661,7 @@ async def json_import_deals(
     request: Request,
     body: JsonImportRequest,
     current_admin: AdminUser = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_bulk_db)
 ):
     check_permission(current_admin, "manage_deals")
     
@@ -632,6 +669,7 @@ async def json_import_deals(
     created = 0
     errors = 0
     error_details = []
+    created_deals = []
     
     for i, deal_data in enumerate(body.deals):
         missing = required_fields - set(deal_data.keys())
@@ -671,6 +709,7 @@ async def json_import_deals(
                 ai_score=8.5,
             )
             db.add(deal)
+            created_deals.append(deal)
             created += 1
         except Exception as e:
             errors += 1
@@ -678,6 +717,7 @@ async def json_import_deals(
     
     if created > 0:
         await db.commit()
+        deals_changed(created_deals)
     
     await log_audit(
         db, current_admin, "json_import_deals", "deals", None,
@@ -698,7 +738,7 @@ async def bulk_deal_action(
     request: Request,
     body: BulkActionRequest,
     current_admin: AdminUser = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_bulk_db)
 ):
     if body.action not in ("approve", "reject", "delete"):
         raise HTTPException(status_code=400, detail="Invalid action. Must be approve, reject, or delete.")
@@ -739,6 +779,7 @@ async def bulk_deal_action(
             affected += 1
 
     await db.commit()
+    deals_changed(deals)
     await log_audit(
         db, current_admin, f"bulk_{body.action}", "deal", None,
         {"deal_ids": body.deal_ids, "affected": affected},
@@ -1,40 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 from typing import List, Optional
 
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database import get_db
-from models import DealResponse, DealClickCreate, SocialShareCreate, Deal
+from database import get_db, get_read_db, read_replicas
+from models import DealResponse, DealClickCreate, SocialShareCreate
 from services.deals_service import DealsService
+from services.deal_suggester import deal_suggester
+from services.stats_snapshot import stats_snapshot
+from utils.http_cache import make_etag, not_modified
 
 router = APIRouter()
 
+async def _catalog_etag(request: Request) -> Optional[str]:
+    """ETag for a public catalog read, known before any query runs: the stats
+    snapshot's catalog version plus the request URL.
+
+    None while the version is younger than the replica lag bound, since a
+    replica could still return rows older than the version the tag names.
+    """
+    snapshot = await stats_snapshot.get()
+    if read_replicas.replicas and time.monotonic() - snapshot.version_since < read_replicas.max_lag:
+        return None
+    return make_etag(snapshot.catalog_version.encode(), request.url.path.encode(), request.url.query.encode())
+
 @router.get("/deals", response_model=List[DealResponse])
 async def get_deals(
+    request: Request,
     deal_type: Optional[str] = Query(None, description="Filter by deal type (top, hot, latest)"),
     category: Optional[str] = Query(None, description="Filter by category"),
     store: Optional[str] = Query(None, description="Filter by store"),
     search: Optional[str] = Query(None, description="Search across title, description, store, category"),
     limit: int = Query(20, ge=1, le=100, description="Number of deals to return"),
-    offset: int = Query(0, ge=0, description="Number of deals to skip"),
-    db: AsyncSession = Depends(get_db)
+    offset: int = Query(0, ge=0, description="Number of deals to skip (legacy, prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get deals with optional filtering - publicly accessible"""
+    """Get deals with optional filtering - publicly accessible.
+
+    The next page cursor is returned in the X-Next-Cursor header so the body
+    stays a plain list. The body is pre-serialized by the service, so
+    response_model only documents the shape. A matching If-None-Match is
+    answered from the catalog version without querying.
+    """
+    etag = await _catalog_etag(request)
+    cached = etag and not_modified(request, etag)
+    if cached:
+        return cached
+
     deals_service = DealsService(db)
-    deals = await deals_service.get_deals(
-        deal_type=deal_type,
-        category=category,
-        store=store,
-        search=search,
-        limit=limit,
-        offset=offset,
-        only_approved=True  # Only show approved deals to public
-    )
-    return deals
+    try:
+        body, next_cursor = await deals_service.get_deals_json(
+            deal_type=deal_type,
+            category=category,
+            store=store,
+            search=search,
+            limit=limit,
+            offset=offset,
+            only_approved=True,  # Only show approved deals to public
+            cursor=cursor,
+            version=etag
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"ETag": etag} if etag else {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/deals/search")
 async def search_deals(
@@ -42,116 +78,70 @@ async def search_deals(
     category: Optional[str] = Query(None, description="Filter by category"),
     store: Optional[str] = Query(None, description="Filter by store"),
     limit: int = Query(50, ge=1, le=500, description="Number of results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
-    db: AsyncSession = Depends(get_db)
+    offset: int = Query(0, ge=0, description="Offset for pagination (legacy, prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Search deals across all deal types in the database - publicly accessible"""
+    """Search deals across all deal types in the database - publicly accessible
+
+    Results are ranked by full-text relevance, newest first on ties
+    """
     deals_service = DealsService(db)
-    deals = await deals_service.get_deals(
-        search=q,
-        category=category,
-        store=store,
-        limit=limit,
-        offset=offset,
-        only_approved=True
-    )
-    total = await deals_service.count_search_results(q, category=category, store=store)
-    return {"deals": deals, "total": total, "query": q}
+    try:
+        deals, total, next_cursor = await deals_service.search_deals(
+            q,
+            category=category,
+            store=store,
+            limit=limit,
+            offset=offset,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"deals": deals, "total": total, "query": q, "next_cursor": next_cursor}
+
+@router.get("/deals/suggest")
+async def suggest_deals(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Number of suggestions")
+):
+    """Instant search suggestions from the in-memory prefix index - publicly accessible"""
+    return {"query": q, "suggestions": deal_suggester.suggest(q, limit=limit)}
 
 @router.get("/deals/count")
-async def get_deals_count(db: AsyncSession = Depends(get_db)):
+async def get_deals_count():
     """Get count of active and approved deals - publicly accessible"""
-    active_approved_result = await db.execute(
-        select(func.count(Deal.id)).where(
-            Deal.is_active == True,
-            Deal.is_ai_approved == True
-        )
-    )
-    count = active_approved_result.scalar() or 0
-    return {"count": count}
+    snapshot = await stats_snapshot.get()
+    return {"count": snapshot.listed_count}
 
 @router.get("/deals/stats")
-async def get_deals_stats(db: AsyncSession = Depends(get_db)):
-    """Get real-time hero stats - publicly accessible"""
-    from sqlalchemy import and_
-
-    active_filter = and_(Deal.is_active == True, Deal.status != "deleted")
-
-    count_result = await db.execute(
-        select(func.count(Deal.id)).where(and_(active_filter, Deal.is_ai_approved == True))
-    )
-    active_count = count_result.scalar() or 0
-
-    savings_result = await db.execute(
-        select(func.sum(Deal.original_price - Deal.sale_price)).where(
-            and_(
-                active_filter,
-                Deal.is_ai_approved == True,
-                Deal.original_price.isnot(None),
-                Deal.sale_price.isnot(None),
-                Deal.original_price > 0,
-                Deal.sale_price > 0,
-                Deal.sale_price < Deal.original_price
-            )
-        )
-    )
-    total_savings = float(savings_result.scalar() or 0)
-
-    total_result = await db.execute(
-        select(func.count(Deal.id)).where(active_filter)
-    )
-    total_count = total_result.scalar() or 1
-
-    ai_verified_result = await db.execute(
-        select(func.count(Deal.id)).where(and_(active_filter, Deal.is_ai_approved == True))
-    )
-    ai_verified = ai_verified_result.scalar() or 0
-    ai_pct = round((ai_verified / total_count) * 100) if total_count > 0 else 0
-
-    if total_savings >= 1_000_000:
-        savings_str = f"${total_savings / 1_000_000:.1f}M+"
-    elif total_savings >= 1_000:
-        savings_str = f"${total_savings / 1_000:.0f}K+"
-    else:
-        savings_str = f"${total_savings:.0f}"
-
-    return {
-        "active_deals": active_count,
-        "total_savings": savings_str,
-        "total_savings_raw": total_savings,
-        "ai_verified_pct": ai_pct
-    }
+async def get_deals_stats():
+    """Get hero stats from the in-memory snapshot - publicly accessible"""
+    snapshot = await stats_snapshot.get()
+    return snapshot.hero_stats()
 
 @router.get("/deals/latest-count")
-async def get_latest_deals_count(db: AsyncSession = Depends(get_db)):
+async def get_latest_deals_count():
     """Get total count of latest/regular deals - publicly accessible"""
-    from sqlalchemy import or_
-    result = await db.execute(
-        select(func.count(Deal.id)).where(
-            Deal.is_active == True,
-            Deal.is_ai_approved == True,
-            or_(Deal.deal_type == 'latest', Deal.deal_type == 'regular', Deal.deal_type.is_(None), Deal.deal_type == ''),
-            Deal.title.isnot(None),
-            Deal.original_price.isnot(None),
-            Deal.sale_price.isnot(None),
-            Deal.store.isnot(None),
-            Deal.category.isnot(None),
-            Deal.image_url.isnot(None),
-            Deal.image_url != ''
-        )
-    )
-    count = result.scalar() or 0
-    return {"count": count}
+    snapshot = await stats_snapshot.get()
+    return {"count": snapshot.latest_count}
 
 @router.get("/deals/{deal_id}", response_model=DealResponse)
-async def get_deal(deal_id: str, db: AsyncSession = Depends(get_db)):
+async def get_deal(deal_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     """Get a specific deal by ID - publicly accessible"""
+    etag = await _catalog_etag(request)
+    cached = etag and not_modified(request, etag)
+    if cached:
+        return cached
+
     deals_service = DealsService(db)
     deal = await deals_service.get_deal_by_id(deal_id)
     
     if not deal:
         raise HTTPException(status_code=404, detail="Deal not found")
     
+    if etag:
+        response.headers["ETag"] = etag
     return deal
 
 @router.post("/deals/{deal_id}/click")
@@ -223,15 +213,29 @@ async def redirect_short_url(
     return RedirectResponse(url=deal_url, status_code=302)
 
 @router.get("/categories", response_model=List[str])
-async def get_categories(db: AsyncSession = Depends(get_db)):
+async def get_categories(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     """Get all available categories - publicly accessible"""
+    etag = await _catalog_etag(request)
+    cached = etag and not_modified(request, etag)
+    if cached:
+        return cached
+
     deals_service = DealsService(db)
     categories = await deals_service.get_categories()
+    if etag:
+        response.headers["ETag"] = etag
     return categories
 
 @router.get("/stores", response_model=List[str])
-async def get_stores(db: AsyncSession = Depends(get_db)):
+async def get_stores(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     """Get all available stores - publicly accessible"""
+    etag = await _catalog_etag(request)
+    cached = etag and not_modified(request, etag)
+    if cached:
+        return cached
+
     deals_service = DealsService(db)
     stores = await deals_service.get_stores()
+    if etag:
+        response.headers["ETag"] = etag
     return stores
\ No newline at end of file
@@ -9,9 +9,10 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, R
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from database import get_db
+from database import get_bulk_db
 from admin_auth import get_current_admin, check_permission, log_audit
 from models import Deal, AdminUser
+from services.deals_service import deals_changed
 
 router = APIRouter()
 
@@ -22,7 +23,7 @@ async def upload_deal_file(
     network: str = Form(...),
     description: str = Form(""),
     current_admin: AdminUser = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_bulk_db)
 ):
     """Simple file upload endpoint"""
     check_permission(current_admin, "upload_deals")
@@ -93,6 +94,8 @@ async def upload_deal_file(
         
         # Commit all deals to database
         await db.commit()
+        if saved_deals:
+            deals_changed(saved_deals)
         
         await log_audit(db, current_admin, "upload_deals", "deals", details={"filename": file.filename, "network": network, "processed": processed_count, "valid": len(saved_deals)}, ip_address=request.client.host if request.client else None)
         return {
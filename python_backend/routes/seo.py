@@ -1,14 +1,15 @@
-import re
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, distinct
-from database import get_db
-from models import Deal as DealModel
-from datetime import datetime
+from database import get_read_db
+from services.sitemaps import sitemap_shards, SITEMAP_TTL_SECONDS
+from services.category_registry import category_registry
+from xml.sax.saxutils import escape
 
 router = APIRouter(tags=["seo"])
 
+SITEMAP_HEADERS = {"Cache-Control": f"public, max-age={SITEMAP_TTL_SECONDS}"}
+
 
 def _get_base_url(request: Request) -> str:
     forwarded_proto = request.headers.get("x-forwarded-proto", "https")
@@ -16,92 +17,35 @@ def _get_base_url(request: Request) -> str:
     return f"{forwarded_proto}://{host}"
 
 @router.get("/sitemap.xml")
-async def sitemap_xml(request: Request, db: AsyncSession = Depends(get_db)):
-    base_url = _get_base_url(request)
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-
-    result = await db.execute(
-        select(DealModel).where(
-            DealModel.is_active == True,
-            DealModel.is_ai_approved == True,
-            DealModel.status == "approved",
-        )
-    )
-    deals = result.scalars().all()
+async def sitemap_xml(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """Sitemap index: the pages sitemap plus one gzipped sitemap per deal shard"""
+    base_url = escape(_get_base_url(request))
+    shard_count = await sitemap_shards.shard_count(db)
 
-    cat_result = await db.execute(
-        select(distinct(DealModel.category)).where(
-            DealModel.is_active == True,
-            DealModel.is_ai_approved == True,
-            DealModel.status == "approved",
-        )
-    )
-    categories = [row[0] for row in cat_result.all() if row[0]]
-
-    urls = []
-
-    urls.append(
-        f"  <url>\n"
-        f"    <loc>{base_url}/</loc>\n"
-        f"    <lastmod>{today}</lastmod>\n"
-        f"    <changefreq>daily</changefreq>\n"
-        f"    <priority>1.0</priority>\n"
-        f"  </url>"
+    files = ["/sitemaps/pages.xml.gz"]
+    files.extend(f"/sitemaps/deals-{shard_count}-{number}.xml.gz" for number in range(1, shard_count + 1))
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        + "".join(f"  <sitemap>\n    <loc>{base_url}{path}</loc>\n  </sitemap>\n" for path in files)
+        + "</sitemapindex>\n"
     )
 
-    static_pages = [
-        ("/about", "0.5"),
-        ("/contact", "0.5"),
-        ("/blog", "0.6"),
-        ("/blog/how-to-find-best-deals", "0.5"),
-        ("/blog/ai-deal-verification", "0.5"),
-        ("/blog/coupon-strategies", "0.5"),
-        ("/blog/online-shopping-safety", "0.5"),
-        ("/blog/best-deal-categories", "0.5"),
-        ("/affiliate-disclosure", "0.4"),
-        ("/privacy-policy", "0.3"),
-        ("/terms-conditions", "0.3"),
-    ]
-    for path, priority in static_pages:
-        urls.append(
-            f"  <url>\n"
-            f"    <loc>{base_url}{path}</loc>\n"
-            f"    <lastmod>{today}</lastmod>\n"
-            f"    <changefreq>monthly</changefreq>\n"
-            f"    <priority>{priority}</priority>\n"
-            f"  </url>"
-        )
+    return Response(content=xml, media_type="application/xml", headers=SITEMAP_HEADERS)
 
-    for category in categories:
-        slug = re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-')
-        urls.append(
-            f"  <url>\n"
-            f"    <loc>{base_url}/category/{slug}</loc>\n"
-            f"    <lastmod>{today}</lastmod>\n"
-            f"    <changefreq>daily</changefreq>\n"
-            f"    <priority>0.8</priority>\n"
-            f"  </url>"
-        )
 
-    for deal in deals:
-        lastmod = deal.updated_at.strftime("%Y-%m-%d") if deal.updated_at else today
-        urls.append(
-            f"  <url>\n"
-            f"    <loc>{base_url}/deals/{deal.id}</loc>\n"
-            f"    <lastmod>{lastmod}</lastmod>\n"
-            f"    <changefreq>weekly</changefreq>\n"
-            f"    <priority>0.6</priority>\n"
-            f"  </url>"
-        )
+@router.get("/sitemaps/pages.xml.gz")
+async def sitemap_pages(request: Request):
+    data = await sitemap_shards.pages_file(_get_base_url(request))
+    return Response(content=data, media_type="application/gzip", headers=SITEMAP_HEADERS)
 
-    xml = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        + "\n".join(urls)
-        + "\n</urlset>\n"
-    )
 
-    return Response(content=xml, media_type="application/xml")
+@router.get("/sitemaps/deals-{shards:int}-{number:int}.xml.gz")
+async def sitemap_deals(shards: int, number: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    data = await sitemap_shards.deals_file(db, shards, number, _get_base_url(request))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    return Response(content=data, media_type="application/gzip", headers=SITEMAP_HEADERS)
 
 
 @router.get("/robots.txt")
@@ -120,28 +64,5 @@ async def robots_txt(request: Request):
 
 
 @router.get("/api/seo/categories")
-async def seo_categories(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(DealModel.category, func.count(DealModel.id).label("count"))
-        .where(
-            DealModel.is_active == True,
-            DealModel.is_ai_approved == True,
-            DealModel.status == "approved",
-        )
-        .group_by(DealModel.category)
-        .order_by(func.count(DealModel.id).desc())
-    )
-    rows = result.all()
-
-    categories = []
-    for row in rows:
-        if row.category:
-            categories.append(
-                {
-                    "name": row.category,
-                    "slug": re.sub(r'[^a-z0-9]+', '-', row.category.lower()).strip('-'),
-                    "count": row.count,
-                }
-            )
-
-    return categories
+async def seo_categories():
+    return [category.to_dict() for category in await category_registry.ranked()]
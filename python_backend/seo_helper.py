@@ -7,6 +7,14 @@ from typing import Optional, Dict, Any, List
 
 DEFAULT_OG_IMAGE_PATH = "/og-default.png"
 
+# Link-preview fetchers and search engine crawlers that need server-rendered meta tags
+CRAWLER_USER_AGENT_RE = re.compile(
+    r"bot|crawl|spider|slurp|facebookexternalhit|facebookcatalog|whatsapp|telegram|"
+    r"skypeuripreview|embedly|quora link preview|pinterest|vkshare|w3c_validator|redditbot|"
+    r"discord|slack|linkedin|applebot|bingpreview|google-inspectiontool",
+    re.IGNORECASE,
+)
+
 
 def escape_html(text: str) -> str:
     if not text:
@@ -14,6 +22,10 @@ def escape_html(text: str) -> str:
     return html.escape(str(text), quote=True)
 
 
+def is_crawler(user_agent: Optional[str]) -> bool:
+    return bool(user_agent) and CRAWLER_USER_AGENT_RE.search(user_agent) is not None
+
+
 def _slugify(text: str) -> str:
     return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
 
@@ -21,7 +21,7 @@ import io
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update
 
-from database import get_db
+from database import background_session
 from models import Deal, DealCreate, AffiliateNetwork, AffiliateConfig
 from services.ai_service import AIService
 import uuid
@@ -530,7 +530,7 @@ class AffiliateNetworkManager:
         all_deals = []
         
         # Get all active network configurations
-        async with get_db() as db:
+        async with background_session() as db:
             result = await db.execute(
                 select(AffiliateConfig).where(AffiliateConfig.is_active == True)
             )
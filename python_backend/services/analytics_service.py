@@ -6,7 +6,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from models import Deal as DealModel, DealClick as DealClickModel
+from models import Deal as DealModel, DealClickRollup as DealClickRollupModel
 from models import Analytics
 
 class AnalyticsService:
@@ -33,14 +33,14 @@ class AnalyticsService:
         # Pending review deals
         pending_review = total_deals - ai_approved
 
-        # Clicks today
+        # Clicks today, from the hourly rollups (up to one rollup interval behind)
         today = datetime.utcnow().date()
         tomorrow = today + timedelta(days=1)
         
-        clicks_today_query = select(func.count(DealClickModel.id)).where(
+        clicks_today_query = select(func.sum(DealClickRollupModel.clicks)).where(
             and_(
-                DealClickModel.clicked_at >= today,
-                DealClickModel.clicked_at < tomorrow
+                DealClickRollupModel.hour >= today,
+                DealClickRollupModel.hour < tomorrow
             )
         )
         clicks_today_result = await self.db.execute(clicks_today_query)
@@ -0,0 +1,138 @@
+"""
+Category Registry
+In-memory map of category slug -> canonical name, approved deal count and
+newest deals, rebuilt from two grouped queries
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func, and_
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import background_session
+from models import Deal as DealModel
+from utils.periodic import DebouncedTask, PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_REFRESH_SECONDS = int(os.getenv("CATEGORY_REFRESH_SECONDS", "300"))
+# Bursts of writes (imports, bulk actions) collapse into one rebuild
+CATEGORY_WRITE_DEBOUNCE_SECONDS = 2
+CATEGORY_TOP_DEALS = 10
+
+
+def category_slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _published_deals():
+    return and_(
+        DealModel.is_active == True,
+        DealModel.is_ai_approved == True,
+        DealModel.status == "approved",
+    )
+
+
+class CategoryEntry:
+    """Every category spelling that slugifies to ``slug``, merged"""
+
+    def __init__(self, slug: str, name: str, count: int, top_deals: list):
+        self.slug = slug
+        self.name = name
+        self.count = count
+        # Rows with id, title, sale_price and created_at, newest first
+        self.top_deals = top_deals
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "slug": self.slug, "count": self.count}
+
+
+class CategoryRegistry:
+    """Rebuilt on a schedule and shortly after deal writes in this process"""
+
+    def __init__(self):
+        self._entries: Dict[str, CategoryEntry] = {}
+        self._ranked: List[CategoryEntry] = []
+        self._built_at: Optional[float] = None
+        # Bumped on every rebuild; part of rendered category page cache keys
+        self.version = 0
+        self._lock = asyncio.Lock()
+        self._write_rebuild = DebouncedTask("Category registry rebuild", CATEGORY_WRITE_DEBOUNCE_SECONDS, self.rebuild)
+
+    async def get(self, slug: str) -> Optional[CategoryEntry]:
+        await self._ensure_built()
+        return self._entries.get(slug)
+
+    async def ranked(self) -> List[CategoryEntry]:
+        """All categories, most deals first"""
+        await self._ensure_built()
+        return self._ranked
+
+    async def _ensure_built(self):
+        if self._built_at is None:
+            await self.rebuild(if_missing=True)
+
+    async def rebuild(self, if_missing: bool = False):
+        async with self._lock:
+            if if_missing and self._built_at is not None:
+                return  # Built by a concurrent caller while we waited
+            started_at = time.monotonic()
+            counts_query = select(DealModel.category, func.count().label("count")).where(
+                _published_deals(), DealModel.category.isnot(None)
+            ).group_by(DealModel.category)
+
+            # Newest deals per spelling; served by ix_deals_listed_category
+            ranked = select(
+                DealModel.id, DealModel.title, DealModel.sale_price, DealModel.created_at, DealModel.category,
+                func.row_number().over(
+                    partition_by=func.lower(DealModel.category),
+                    order_by=(DealModel.created_at.desc(), DealModel.id.desc())
+                ).label("position")
+            ).where(_published_deals(), DealModel.category.isnot(None)).subquery()
+            top_query = select(ranked).where(ranked.c.position <= CATEGORY_TOP_DEALS)
+
+            async with background_session() as session:
+                counts = (await session.execute(counts_query)).all()
+                top_rows = (await session.execute(top_query)).all()
+
+            spellings: Dict[str, Counter] = defaultdict(Counter)
+            for row in counts:
+                slug = category_slug(row.category)
+                if slug:
+                    spellings[slug][row.category] += row.count
+            top_by_slug = defaultdict(list)
+            for row in top_rows:
+                top_by_slug[category_slug(row.category)].append(row)
+
+            entries = {}
+            for slug, names in spellings.items():
+                top_deals = sorted(top_by_slug[slug], key=lambda d: (d.created_at or datetime.min, d.id), reverse=True)
+                entries[slug] = CategoryEntry(
+                    slug=slug,
+                    name=names.most_common(1)[0][0],
+                    count=sum(names.values()),
+                    top_deals=top_deals[:CATEGORY_TOP_DEALS]
+                )
+            self._entries = entries
+            self._ranked = sorted(entries.values(), key=lambda e: (-e.count, e.slug))
+            self._built_at = time.monotonic()
+            self.version += 1
+            logger.debug(f"Category registry rebuilt: {len(entries)} categories in {time.monotonic() - started_at:.3f}s")
+
+    def deals_changed(self):
+        """Schedule a rebuild shortly after a write"""
+        self._write_rebuild.trigger()
+
+
+category_registry = CategoryRegistry()
+
+category_refresh = PeriodicTask("Category registry rebuild", CATEGORY_REFRESH_SECONDS, category_registry.rebuild)
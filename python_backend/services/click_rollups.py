@@ -0,0 +1,125 @@
+"""
+Click Rollups
+Hourly per-deal click counts maintained from the monthly deal_clicks
+partitions, and partition creation and retention
+"""
+
+import logging
+import os
+import re
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import background_engine, background_session
+from utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+CLICK_ROLLUP_INTERVAL_SECONDS = int(os.getenv("CLICK_ROLLUP_INTERVAL_SECONDS", "300"))
+# Hours before the newest rolled-up hour that are recounted on every run, so
+# clicks written late (queued or spilled events) still land in their hour
+CLICK_ROLLUP_LOOKBACK_HOURS = int(os.getenv("CLICK_ROLLUP_LOOKBACK_HOURS", "3"))
+# Raw clicks are kept this many whole months before the current one
+CLICK_RETENTION_MONTHS = int(os.getenv("CLICK_RETENTION_MONTHS", "13"))
+CLICK_PARTITIONS_AHEAD_MONTHS = 2
+
+# Only one worker runs the job at a time; the others skip that run
+CLICK_ROLLUP_LOCK_KEY = 727_002
+
+PARTITION_NAME_RE = re.compile(r"^deal_clicks_(\d{4})_(\d{2})$")
+
+ROLLUP_START_SQL = text("""
+    SELECT COALESCE(
+        (SELECT max(hour) FROM deal_click_rollups) - make_interval(hours => :lookback),
+        (SELECT date_trunc('hour', min(clicked_at)) FROM deal_clicks)
+    )
+""")
+
+# Whole hours from :since are recounted and replace what is stored, so
+# rerunning over the same hours is harmless
+ROLLUP_SQL = text("""
+    INSERT INTO deal_click_rollups (deal_id, hour, clicks)
+    SELECT deal_id, date_trunc('hour', clicked_at), count(*)
+    FROM deal_clicks
+    WHERE clicked_at >= :since
+    GROUP BY 1, 2
+    ON CONFLICT (deal_id, hour) DO UPDATE SET clicks = EXCLUDED.clicks
+    WHERE deal_click_rollups.clicks <> EXCLUDED.clicks
+""")
+
+PARTITIONS_SQL = text("""
+    SELECT child.relname, pg_inherits.inhdetachpending
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'deal_clicks'::regclass
+""")
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def roll_up_clicks():
+    """Create upcoming partitions, refresh recent rollups and drop expired partitions"""
+    # Session-level lock on an autocommit connection: DETACH PARTITION
+    # CONCURRENTLY cannot run inside a transaction block
+    async with background_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not await conn.scalar(text(f"SELECT pg_try_advisory_lock({CLICK_ROLLUP_LOCK_KEY})")):
+            return
+        try:
+            expired = await _refresh_rollups()
+            for name, detach_pending in expired:
+                await _drop_partition(conn, name, detach_pending)
+        finally:
+            await conn.execute(text(f"SELECT pg_advisory_unlock({CLICK_ROLLUP_LOCK_KEY})"))
+
+
+async def _refresh_rollups():
+    """Create upcoming partitions and refresh recent rollups; return the
+    (name, detach pending) pairs of partitions past retention"""
+    async with background_session() as session:
+        this_month = datetime.utcnow().date().replace(day=1)
+        await session.execute(
+            text("SELECT ensure_deal_click_partitions(:from_day, :to_day)"),
+            {"from_day": this_month, "to_day": _add_months(this_month, CLICK_PARTITIONS_AHEAD_MONTHS)}
+        )
+
+        since = await session.scalar(ROLLUP_START_SQL, {"lookback": CLICK_ROLLUP_LOOKBACK_HOURS})
+        if since is not None:
+            result = await session.execute(ROLLUP_SQL, {"since": since})
+            logger.debug(f"Click rollup from {since}: {result.rowcount} hours updated")
+
+        # A partition is only dropped once its whole month is rolled up
+        cutoff = _add_months(this_month, -CLICK_RETENTION_MONTHS)
+        expired = []
+        for name, detach_pending in (await session.execute(PARTITIONS_SQL)).all():
+            match = PARTITION_NAME_RE.match(name)
+            if not match:
+                continue
+            partition_end = _add_months(date(int(match.group(1)), int(match.group(2)), 1), 1)
+            if partition_end <= cutoff and since is not None and partition_end <= since.date():
+                expired.append((name, detach_pending))
+
+        await session.commit()
+        return expired
+
+
+async def _drop_partition(conn, name: str, detach_pending: bool):
+    # A plain DROP TABLE would hold ACCESS EXCLUSIVE on deal_clicks and block
+    # click inserts; a concurrent detach only needs SHARE UPDATE EXCLUSIVE.
+    # FINALIZE completes a detach an earlier run was interrupted in.
+    if detach_pending:
+        await conn.exec_driver_sql(f'ALTER TABLE deal_clicks DETACH PARTITION "{name}" FINALIZE')
+    else:
+        await conn.exec_driver_sql(f'ALTER TABLE deal_clicks DETACH PARTITION "{name}" CONCURRENTLY')
+    await conn.exec_driver_sql(f'DROP TABLE "{name}"')
+    logger.info(f"Dropped click partition {name} (retention {CLICK_RETENTION_MONTHS} months)")
+
+
+click_rollup = PeriodicTask("Click rollup", CLICK_ROLLUP_INTERVAL_SECONDS, roll_up_clicks)
@@ -9,8 +9,9 @@ from typing import Dict, List, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update
 
-from database import get_db
+from database import background_session
 from models import Deal, ComplianceLog, AffiliateConfig
+from services.deals_service import deals_changed
 
 logger = logging.getLogger(__name__)
 
@@ -200,7 +201,7 @@ class ComplianceManager:
         """Log compliance check results"""
         
         try:
-            async with get_db() as db:
+            async with background_session() as db:
                 compliance_log = ComplianceLog(
                     deal_id=deal_id,
                     network_id=network_id,
@@ -231,7 +232,7 @@ class ComplianceManager:
     async def get_compliance_summary(self, network_id: Optional[str] = None) -> Dict[str, Any]:
         """Get compliance summary for all deals or specific network"""
         
-        async with get_db() as db:
+        async with background_session() as db:
             query = select(ComplianceLog)
             if network_id:
                 query = query.where(ComplianceLog.network_id == network_id)
@@ -307,7 +308,7 @@ class ComplianceManager:
         
         fixes_applied = []
         
-        async with get_db() as db:
+        async with background_session() as db:
             # Get the deal
             result = await db.execute(select(Deal).where(Deal.id == deal_id))
             deal = result.scalar_one_or_none()
@@ -338,6 +339,8 @@ class ComplianceManager:
                     fixes_applied.append('Added Amazon Associate disclosure')
             
             await db.commit()
+            if fixes_applied:
+                deals_changed([deal])
         
         return {
             'success': True,
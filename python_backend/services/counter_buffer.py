@@ -0,0 +1,147 @@
+"""
+Counter Buffer
+Write-behind accumulation of per-deal click, share and popularity counts
+and short URL click counts, flushed to Postgres in one statement per table
+"""
+
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import background_session
+from models import Deal as DealModel
+from utils.lru_cache import LRUCache
+from utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FLUSH_INTERVAL_MS = int(os.getenv("COUNTER_FLUSH_INTERVAL_MS", "500"))
+AFFILIATE_URL_CACHE_SIZE = int(os.getenv("AFFILIATE_URL_CACHE_SIZE", "10000"))
+AFFILIATE_URL_CACHE_TTL_SECONDS = 300
+
+# unnest() keeps this one statement with four array parameters however many
+# deals are in the batch. Relative increments cannot lose concurrent updates.
+# updated_at is left alone: it versions rendered deal pages and sitemap
+# entries, which do not change with counts; the catalog version (ETags)
+# follows the counter totals instead.
+FLUSH_SQL = text("""
+    UPDATE deals AS d SET
+        click_count = COALESCE(d.click_count, 0) + v.clicks,
+        share_count = COALESCE(d.share_count, 0) + v.shares,
+        popularity = COALESCE(d.popularity, 0) + v.popularity
+    FROM unnest(
+        CAST(:ids AS varchar[]), CAST(:clicks AS integer[]),
+        CAST(:shares AS integer[]), CAST(:popularity AS integer[])
+    ) AS v(id, clicks, shares, popularity)
+    WHERE d.id = v.id
+""")
+
+SHORT_URL_FLUSH_SQL = text("""
+    UPDATE short_urls AS s SET
+        click_count = COALESCE(s.click_count, 0) + v.clicks
+    FROM unnest(CAST(:codes AS varchar[]), CAST(:clicks AS integer[])) AS v(short_code, clicks)
+    WHERE s.short_code = v.short_code
+""")
+
+
+class CounterBuffer:
+    """Per-deal [clicks, shares, popularity] and per-short-code click deltas
+    awaiting the next flush"""
+
+    def __init__(self):
+        self._deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        self._short_url_clicks: Dict[str, int] = defaultdict(int)
+        self._affiliate_urls = LRUCache(AFFILIATE_URL_CACHE_SIZE, ttl=AFFILIATE_URL_CACHE_TTL_SECONDS)
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    def add(self, deal_id: str, clicks: int = 0, shares: int = 0, popularity: int = 0):
+        delta = self._deltas[deal_id]
+        delta[0] += clicks
+        delta[1] += shares
+        delta[2] += popularity
+
+    def add_short_url_click(self, short_code: str):
+        self._short_url_clicks[short_code] += 1
+
+    @property
+    def pending(self) -> int:
+        return len(self._deltas) + len(self._short_url_clicks)
+
+    async def affiliate_url(self, db: AsyncSession, deal_id: str) -> Optional[str]:
+        """Affiliate URL of ``deal_id``, or None if there is no such deal"""
+        url = self._affiliate_urls.get(deal_id)
+        if url is None:
+            result = await db.execute(select(DealModel.affiliate_url).where(DealModel.id == deal_id))
+            url = result.scalar_one_or_none()
+            if url is not None:
+                self._affiliate_urls.set(deal_id, url)
+        return url
+
+    def forget(self, deal_ids: Iterable[str]):
+        """Drop cached affiliate URLs of edited or removed deals"""
+        for deal_id in deal_ids:
+            self._affiliate_urls.pop(deal_id)
+
+    async def flush(self):
+        if not self._deltas and not self._short_url_clicks:
+            return
+        batch, self._deltas = self._deltas, defaultdict(lambda: [0, 0, 0])
+        short_url_batch, self._short_url_clicks = self._short_url_clicks, defaultdict(int)
+        # Sorted so concurrent flushes from several workers lock rows in the same order
+        ids = sorted(batch)
+        codes = sorted(short_url_batch)
+        try:
+            async with background_session() as session:
+                if ids:
+                    await session.execute(FLUSH_SQL, {
+                        "ids": ids,
+                        "clicks": [batch[i][0] for i in ids],
+                        "shares": [batch[i][1] for i in ids],
+                        "popularity": [batch[i][2] for i in ids],
+                    })
+                if codes:
+                    await session.execute(SHORT_URL_FLUSH_SQL, {
+                        "codes": codes,
+                        "clicks": [short_url_batch[c] for c in codes],
+                    })
+                await session.commit()
+            self.flushed_rows += len(ids) + len(codes)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Counter flush of {len(ids)} deals and {len(codes)} short URLs failed, retrying next interval: {e}")
+            for deal_id in ids:
+                self.add(deal_id, *batch[deal_id])
+            for code in codes:
+                self._short_url_clicks[code] += short_url_batch[code]
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "affiliate_urls": self._affiliate_urls.stats(),
+        }
+
+
+counter_buffer = CounterBuffer()
+
+# finish_on_stop: a flush has swapped the deltas out before it writes them,
+# so cancelling it mid-write would lose that batch
+counter_flush = PeriodicTask(
+    "Counter flush", COUNTER_FLUSH_INTERVAL_MS / 1000, counter_buffer.flush, finish_on_stop=True
+)
+
+
+async def drain_counters():
+    """Stop the flush loop, letting a running flush finish, and write out
+    whatever is still buffered"""
+    await counter_flush.stop()
+    await counter_buffer.flush()
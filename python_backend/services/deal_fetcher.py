@@ -18,10 +18,11 @@ import base64
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from database import get_db
+from database import bulk_session
 from models import Deal, DealCreate
 from services.ai_service import AIService
 from services.affiliate_networks import AffiliateNetworkManager
+from services.deals_service import deals_changed
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -232,8 +233,9 @@ class DealFetcher:
         Save validated deals to the database
         """
         saved_count = 0
+        saved_deals = []
         
-        async with get_db() as db:
+        async with bulk_session() as db:
             for deal_data in deals:
                 try:
                     # Check for duplicates based on affiliate URL
@@ -251,12 +253,14 @@ class DealFetcher:
                     )
                     
                     db.add(deal)
+                    saved_deals.append(deal)
                     saved_count += 1
                     
                 except Exception as e:
                     logger.error(f"Error saving deal to database: {e}")
                     
             await db.commit()
+            deals_changed(saved_deals)
             
         return saved_count
 
@@ -0,0 +1,235 @@
+"""
+Deal Suggester
+In-process prefix index over approved deal titles, stores and categories
+for as-you-type suggestions without a database round trip
+"""
+
+import heapq
+import logging
+import os
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import background_session
+from models import Deal as DealModel
+from utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Full reload interval; picks up writes made by other workers or outside the API
+SUGGEST_REBUILD_SECONDS = int(os.getenv("DEAL_SUGGEST_REBUILD_SECONDS", "600"))
+# Titles are indexed from each of their first N words, so "pro" completes
+# "Apple AirPods Pro" as well as "Pro Display"
+TITLE_WORD_STARTS = 8
+# Prefixes matching more index entries than this are answered by walking the
+# phrases in weight order instead of scanning every match
+MAX_SCAN = 1000
+
+_WORD_RE = re.compile(r"\w+")
+
+PhraseKey = Tuple[str, str]  # (kind, normalized text)
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class _DealTerms(NamedTuple):
+    deal_id: str
+    popularity: int
+    phrases: Tuple[Tuple[str, str], ...]  # (kind, display text)
+
+
+class _Phrase:
+    __slots__ = ("kind", "text", "deals", "weight")
+
+    def __init__(self, kind: str, text: str):
+        self.kind = kind
+        self.text = text
+        self.deals: Dict[str, int] = {}
+        self.weight = 0
+
+
+def _is_listed(deal) -> bool:
+    # Rows returned by a bulk DELETE ... RETURNING carry only the key columns;
+    # a deal without listing flags has been removed and is never listed
+    return bool(
+        getattr(deal, "is_active", False)
+        and deal.is_ai_approved
+        and deal.status != 'deleted'
+        and deal.title
+    )
+
+
+def _deal_terms(deal) -> _DealTerms:
+    phrases = [("title", deal.title.strip())]
+    if deal.store:
+        phrases.append(("store", deal.store.strip()))
+    if deal.category:
+        phrases.append(("category", deal.category.strip()))
+    return _DealTerms(str(deal.id), deal.popularity or 0, tuple(phrases))
+
+
+class DealSuggester:
+    """Sorted array of (prefix key, phrase key) searched with bisect.
+
+    Each phrase weighs the combined popularity of every listed deal that
+    contributes it, so a store or category ranks by the popularity of its
+    deals. A second array keeps the phrases in rank order for prefixes too
+    short to scan.
+    """
+
+    def __init__(self):
+        self._index: List[Tuple[str, PhraseKey]] = []
+        self._ranked: List[Tuple[int, PhraseKey]] = []
+        self._phrases: Dict[PhraseKey, _Phrase] = {}
+        self._deals: Dict[str, _DealTerms] = {}
+        # Changes seen while a rebuild is loading, replayed onto the new index
+        self._pending: Optional[Dict[str, Optional[_DealTerms]]] = None
+        self.loaded = False
+
+    def suggest(self, query: str, limit: int = 8) -> List[dict]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        start = bisect_left(self._index, (prefix,))
+        end = bisect_left(self._index, (prefix + "\U0010ffff",), start)
+        if end - start <= MAX_SCAN:
+            matched = {phrase_key for _, phrase_key in self._index[start:end]}
+            best = heapq.nsmallest(limit, ((-self._phrases[key].weight, key) for key in matched))
+        else:
+            best = []
+            for entry in self._ranked:
+                if any(index_key.startswith(prefix) for index_key in self._index_keys(entry[1])):
+                    best.append(entry)
+                    if len(best) == limit:
+                        break
+
+        suggestions = []
+        for _, key in best:
+            phrase = self._phrases[key]
+            suggestion = {"text": phrase.text, "type": phrase.kind}
+            if phrase.kind == "title":
+                suggestion["deal_id"] = max(phrase.deals, key=phrase.deals.get)
+            suggestions.append(suggestion)
+        return suggestions
+
+    def deals_changed(self, deals):
+        """Apply approvals, edits and removals to the index"""
+        for deal in deals:
+            terms = _deal_terms(deal) if _is_listed(deal) else None
+            if self._pending is not None:
+                self._pending[str(deal.id)] = terms
+            self._apply(str(deal.id), terms)
+
+    async def rebuild(self):
+        """Reload every listed deal and swap in a freshly built index"""
+        self._pending = {}
+        try:
+            async with background_session() as session:
+                result = await session.execute(
+                    select(
+                        DealModel.id, DealModel.title, DealModel.store, DealModel.category,
+                        DealModel.popularity, DealModel.is_active, DealModel.is_ai_approved,
+                        DealModel.status
+                    ).where(
+                        DealModel.is_active == True,
+                        DealModel.is_ai_approved == True,
+                        DealModel.status != 'deleted'
+                    )
+                )
+                rows = result.all()
+
+            fresh = DealSuggester()
+            fresh._load(_deal_terms(row) for row in rows if _is_listed(row))
+            for deal_id, terms in self._pending.items():
+                fresh._apply(deal_id, terms)
+
+            self._index, self._ranked = fresh._index, fresh._ranked
+            self._phrases, self._deals = fresh._phrases, fresh._deals
+            self.loaded = True
+            logger.info(f"Suggestion index rebuilt: {len(self._phrases)} phrases from {len(self._deals)} deals")
+        finally:
+            self._pending = None
+
+    def _apply(self, deal_id: str, terms: Optional[_DealTerms]):
+        if deal_id in self._deals:
+            self._remove(deal_id)
+        if terms is not None:
+            self._add(terms)
+
+    def _load(self, all_terms):
+        """Bulk build: fill the maps, then sort both arrays once"""
+        for terms in all_terms:
+            self._deals[terms.deal_id] = terms
+            for key, phrase in self._phrases_of(terms):
+                phrase.deals[terms.deal_id] = terms.popularity
+                phrase.weight += terms.popularity
+        self._index = sorted(
+            (index_key, key) for key in self._phrases for index_key in self._index_keys(key)
+        )
+        self._ranked = sorted((-phrase.weight, key) for key, phrase in self._phrases.items())
+
+    def _add(self, terms: _DealTerms):
+        self._deals[terms.deal_id] = terms
+        for key, phrase in self._phrases_of(terms):
+            if not phrase.deals:
+                for index_key in self._index_keys(key):
+                    insort(self._index, (index_key, key))
+            else:
+                _discard(self._ranked, (-phrase.weight, key))
+            phrase.deals[terms.deal_id] = terms.popularity
+            phrase.weight += terms.popularity
+            insort(self._ranked, (-phrase.weight, key))
+
+    def _remove(self, deal_id: str):
+        terms = self._deals.pop(deal_id)
+        for kind, text in terms.phrases:
+            key = (kind, normalize(text))
+            phrase = self._phrases.get(key)
+            if phrase is None or deal_id not in phrase.deals:
+                continue
+            _discard(self._ranked, (-phrase.weight, key))
+            phrase.weight -= phrase.deals.pop(deal_id)
+            if phrase.deals:
+                insort(self._ranked, (-phrase.weight, key))
+                continue
+            del self._phrases[key]
+            for index_key in self._index_keys(key):
+                _discard(self._index, (index_key, key))
+
+    def _phrases_of(self, terms: _DealTerms):
+        for kind, text in terms.phrases:
+            key = (kind, normalize(text))
+            if not key[1]:
+                continue
+            phrase = self._phrases.get(key)
+            if phrase is None:
+                phrase = self._phrases[key] = _Phrase(kind, text)
+            yield key, phrase
+
+    @staticmethod
+    def _index_keys(key: PhraseKey) -> List[str]:
+        kind, normalized = key
+        if kind != "title":
+            return [normalized]
+        words = normalized.split(" ")
+        return list(dict.fromkeys(" ".join(words[i:]) for i in range(min(len(words), TITLE_WORD_STARTS))))
+
+
+def _discard(array: list, item):
+    position = bisect_left(array, item)
+    if position < len(array) and array[position] == item:
+        del array[position]
+
+
+deal_suggester = DealSuggester()
+
+suggester_rebuild = PeriodicTask("Suggestion index rebuild", SUGGEST_REBUILD_SECONDS, deal_suggester.rebuild)
@@ -1,7 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc, asc
+from sqlalchemy import select, func, and_, or_, desc, asc, tuple_, literal_column
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Optional, Iterable, Hashable, Tuple
+from collections import defaultdict
+import base64
+import json
 import uuid
 from datetime import datetime
 
@@ -9,9 +13,209 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from database import read_replicas
 from models import Deal as DealModel, DealClick as DealClickModel, SocialShare as SocialShareModel, ShortUrl as ShortUrlModel
-from models import DealResponse, DealCreate, DealClickCreate, SocialShareCreate, ShortUrlCreate
+from models import DealResponse, DealCard, DealCreate, DealClickCreate, SocialShareCreate, ShortUrlCreate
 from utils.deal_validator import DealValidator
+from utils.lru_cache import LRUCache
+from services.deal_suggester import deal_suggester
+from services.stats_snapshot import stats_snapshot
+from services.counter_buffer import counter_buffer
+from services.event_ingestion import event_ingestion
+from services.short_url_resolver import short_url_resolver
+from services.short_code_allocator import short_code_allocator
+from services.page_cache import page_cache
+from services.sitemaps import sitemap_shards
+from services.category_registry import category_registry
+from pydantic import TypeAdapter
+
+# Upper bound (seconds) on how long a worker may serve a listing that another
+# worker has since invalidated. Set to 0 to disable the listing cache.
+DEALS_CACHE_TTL_SECONDS = float(os.getenv("DEALS_CACHE_TTL_SECONDS", "30"))
+DEALS_CACHE_MAX_ENTRIES = int(os.getenv("DEALS_CACHE_MAX_ENTRIES", "512"))
+
+GLOBAL_TAG = "global"
+
+
+class DealsQueryCache:
+    """LRU + TTL cache of public deal listings with tag-based invalidation.
+
+    Listings filtered by category or store are tagged with that category/store;
+    unfiltered listings carry the global tag because any write can change them.
+    """
+
+    def __init__(self, max_entries: int = DEALS_CACHE_MAX_ENTRIES, ttl: float = DEALS_CACHE_TTL_SECONDS):
+        self.enabled = ttl > 0
+        self._entries = LRUCache(max_entries=max_entries, ttl=ttl, on_evict=self._forget)
+        self._key_tags = {}
+        self._tag_keys = defaultdict(set)
+        self.invalidations = 0
+
+    @staticmethod
+    def category_tag(category: str) -> str:
+        return f"category:{category.strip().lower()}"
+
+    @staticmethod
+    def store_tag(store: str) -> str:
+        return f"store:{store.strip()}"
+
+    @classmethod
+    def listing_tags(cls, category: Optional[str] = None, store: Optional[str] = None) -> Tuple[str, ...]:
+        tags = []
+        if category:
+            tags.append(cls.category_tag(category))
+        if store:
+            tags.append(cls.store_tag(store))
+        return tuple(tags) or (GLOBAL_TAG,)
+
+    def get(self, key: Hashable):
+        if not self.enabled:
+            return None
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, value, tags: Iterable[str]):
+        if not self.enabled:
+            return
+        self._entries.set(key, value)
+        self._key_tags[key] = tuple(tags)
+        for tag in self._key_tags[key]:
+            self._tag_keys[tag].add(key)
+
+    def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            for key in self._tag_keys.pop(tag, ()):
+                self._entries.pop(key)
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._tag_keys.clear()
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        stats = self._entries.stats()
+        stats["invalidations"] = self.invalidations
+        stats["ttl_seconds"] = self._entries.ttl
+        return stats
+
+    def _forget(self, key: Hashable):
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+
+deals_cache = DealsQueryCache()
+
+
+def deals_changed(deals: Iterable = (), categories: Iterable[str] = (), stores: Iterable[str] = ()):
+    """Purge cached listings affected by writes to ``deals``.
+
+    Pass the previous ``categories``/``stores`` as well when a write moves a
+    deal out of them, so listings it used to appear in are dropped too.
+    """
+    deals = list(deals)
+    tags = {GLOBAL_TAG}
+    for deal in deals:
+        if deal.category:
+            tags.add(DealsQueryCache.category_tag(deal.category))
+        if deal.store:
+            tags.add(DealsQueryCache.store_tag(deal.store))
+    tags.update(DealsQueryCache.category_tag(c) for c in categories if c)
+    tags.update(DealsQueryCache.store_tag(s) for s in stores if s)
+    deals_cache.invalidate_tags(*tags)
+    read_replicas.wrote()
+    deal_suggester.deals_changed(deals)
+    stats_snapshot.deals_changed()
+    deal_ids = [str(deal.id) for deal in deals]
+    counter_buffer.forget(deal_ids)
+    page_cache.deals_changed(deal_ids)
+    sitemap_shards.deals_changed(deal_ids)
+    category_registry.deals_changed()
+
+
+# Keyset orderings: every listing is sorted DESC on these columns, with id as
+# the final tie-breaker so the sort key is unique. The COALESCE default is a
+# literal (not a bind parameter) so the planner can match expression indexes.
+KEYSET_ORDERINGS = {
+    'latest': lambda: (DealModel.created_at, DealModel.id),
+    'top': lambda: (func.coalesce(DealModel.popularity, literal_column("0")), DealModel.created_at, DealModel.id),
+    'hot': lambda: (func.coalesce(DealModel.click_count, literal_column("0")), DealModel.created_at, DealModel.id),
+}
+
+
+def keyset_ordering(deal_type: Optional[str]) -> str:
+    return deal_type if deal_type in ('top', 'hot') else 'latest'
+
+
+def keyset_order_by(ordering: str):
+    return [desc(column) for column in KEYSET_ORDERINGS[ordering]()]
+
+
+def keyset_filter(ordering: str, cursor: str):
+    """Predicate selecting rows strictly after ``cursor`` in ``ordering``"""
+    values = decode_cursor(cursor, ordering)
+    return tuple_(*KEYSET_ORDERINGS[ordering]()) < tuple_(*values)
+
+
+def encode_cursor(ordering: str, deal) -> str:
+    """Build an opaque cursor pointing just past ``deal`` (ORM row or DealResponse)"""
+    key = [deal.created_at.isoformat(), deal.id]
+    if ordering == 'top':
+        key.insert(0, deal.popularity or 0)
+    elif ordering == 'hot':
+        key.insert(0, deal.click_count or 0)
+    elif ordering == 'relevance':
+        key.insert(0, deal.rank)
+    payload = json.dumps({"o": ordering, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, ordering: str) -> list:
+    """Decode a cursor made by encode_cursor; raises ValueError if it is malformed
+    or was issued for a different ordering"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_ordering, key = payload["o"], payload["k"]
+        if cursor_ordering == 'latest':
+            created_at, deal_id = key
+            values = [datetime.fromisoformat(created_at), str(deal_id)]
+        else:
+            rank, created_at, deal_id = key
+            rank = float(rank) if cursor_ordering == 'relevance' else int(rank)
+            values = [rank, datetime.fromisoformat(created_at), str(deal_id)]
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_ordering != ordering:
+        raise ValueError("Cursor does not match the requested ordering")
+    return values
+
+
+def next_page_cursor(deals: list, ordering: str, limit: int) -> Optional[str]:
+    """Cursor for the page after ``deals``, or None when this was the last page"""
+    if not deals or len(deals) < limit:
+        return None
+    return encode_cursor(ordering, deals[-1])
+
+
+# Columns a deal card needs; everything in DealResponse except ai_reasons/source_api,
+# which list responses have always returned as null.
+DEAL_CARD_COLUMNS = (
+    DealModel.id, DealModel.title, DealModel.description,
+    DealModel.original_price, DealModel.sale_price, DealModel.discount_percentage,
+    DealModel.image_url, DealModel.affiliate_url, DealModel.store, DealModel.store_logo_url,
+    DealModel.category, DealModel.rating, DealModel.review_count, DealModel.expires_at,
+    DealModel.is_active, DealModel.is_ai_approved, DealModel.ai_score,
+    DealModel.popularity, DealModel.click_count, DealModel.share_count,
+    DealModel.deal_type, DealModel.coupon_code, DealModel.coupon_required,
+    DealModel.created_at, DealModel.updated_at,
+)
+
+deal_cards_adapter = TypeAdapter(List[DealCard])
+
 
 class DealsService:
     def __init__(self, db: AsyncSession):
@@ -37,14 +241,13 @@ class DealsService:
             DealModel.image_url != ''
         )
 
+    def _search_query(self, search: str):
+        # regconfig as a literal: a bound VARCHAR would not resolve to the
+        # (regconfig, text) overload
+        return func.websearch_to_tsquery(literal_column("'english'::regconfig"), search)
+
     def _search_filter(self, search: str):
-        search_term = f"%{search.lower()}%"
-        return or_(
-            func.lower(DealModel.title).like(search_term),
-            func.lower(DealModel.description).like(search_term),
-            func.lower(DealModel.store).like(search_term),
-            func.lower(DealModel.category).like(search_term)
-        )
+        return DealModel.search_vector.op('@@')(self._search_query(search))
 
     async def count_search_results(self, search: str, category: Optional[str] = None, store: Optional[str] = None) -> int:
         query = select(func.count(DealModel.id)).where(
@@ -55,24 +258,78 @@ class DealsService:
             self._search_filter(search)
         )
         if category:
-            query = query.where(DealModel.category == category)
+            query = query.where(func.lower(DealModel.category) == category.lower())
         if store:
             query = query.where(DealModel.store == store)
         result = await self.db.execute(query)
         return result.scalar() or 0
 
-    async def get_deals(
-        self, 
-        deal_type: Optional[str] = None,
+    async def search_deals(
+        self,
+        search: str,
         category: Optional[str] = None,
         store: Optional[str] = None,
-        search: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
-        only_approved: bool = True
-    ) -> List[DealResponse]:
-        """Get deals with optional filtering"""
-        query = select(DealModel).where(self._base_filters())
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DealCard], int, Optional[str]]:
+        """Ranked full-text search over approved deals.
+
+        Returns (deals, total, next_cursor). The total comes from a window
+        count over the same match set, so there is no second scan.
+        Raises ValueError for a malformed cursor.
+        """
+        if cursor:
+            offset = 0
+        tsquery = self._search_query(search)
+        matches = select(
+            *DEAL_CARD_COLUMNS,
+            func.ts_rank_cd(DealModel.search_vector, tsquery).label('rank'),
+            func.count().over().label('total')
+        ).where(
+            self._base_filters(),
+            DealModel.is_ai_approved == True,
+            DealModel.search_vector.op('@@')(tsquery)
+        )
+        if category:
+            matches = matches.where(func.lower(DealModel.category) == category.lower())
+        if store:
+            matches = matches.where(DealModel.store == store)
+        matches = matches.subquery()
+
+        sort_key = (matches.c.rank, matches.c.created_at, matches.c.id)
+        query = select(matches)
+        if cursor:
+            query = query.where(tuple_(*sort_key) < tuple_(*decode_cursor(cursor, 'relevance')))
+        query = query.order_by(*[desc(column) for column in sort_key]).limit(limit)
+        if offset:
+            query = query.offset(offset)
+
+        result = await self.db.execute(query)
+        rows = result.all()
+
+        if rows:
+            total = rows[0].total
+        elif offset or cursor:
+            # Paged past the end: the window count has no row to ride on
+            total = await self.count_search_results(search, category=category, store=store)
+        else:
+            total = 0
+        deals = [self._to_deal_card(row) for row in rows]
+        return deals, total, next_page_cursor(rows, 'relevance', limit)
+
+    def _listing_query(
+        self,
+        query,
+        deal_type: Optional[str] = None,
+        category: Optional[str] = None,
+        store: Optional[str] = None,
+        search: Optional[str] = None,
+        only_approved: bool = True,
+        cursor: Optional[str] = None
+    ):
+        """Apply the public listing filters and keyset ordering to ``query``"""
+        query = query.where(self._base_filters())
         
         if only_approved:
             query = query.where(DealModel.is_ai_approved == True)
@@ -89,69 +346,186 @@ class DealsService:
         if search:
             query = query.where(self._search_filter(search))
         
-        # Order by popularity for 'top', created_at for others
-        if deal_type == 'top':
-            query = query.order_by(desc(DealModel.popularity), desc(DealModel.created_at))
-        elif deal_type == 'hot':
-            query = query.order_by(desc(DealModel.click_count), desc(DealModel.created_at))
-        else:  # latest or no deal_type
-            query = query.order_by(desc(DealModel.created_at))
-        
-        query = query.limit(limit).offset(offset)
+        # Order by popularity for 'top', clicks for 'hot', created_at for others
+        ordering = keyset_ordering(deal_type)
+        if cursor:
+            query = query.where(keyset_filter(ordering, cursor))
+        return query.order_by(*keyset_order_by(ordering))
+
+    def _to_deal_response(self, deal: DealModel) -> DealResponse:
+        # Sanitize and optimize the deal data
+        deal_dict = {
+            'title': deal.title,
+            'description': deal.description,
+            'original_price': deal.original_price,
+            'sale_price': deal.sale_price,
+            'store': deal.store,
+            'category': deal.category,
+            'affiliate_url': deal.affiliate_url,
+            'image_url': deal.image_url
+        }
+        sanitized_deal_data = self.validator.sanitize_deal_data(deal_dict)
+        
+        # Update the deal with sanitized image URL (external, properly sized)
+        deal.image_url = sanitized_deal_data.get('image_url', deal.image_url)
+        
+        # Ensure all required fields have proper defaults before validation
+        deal_dict_for_response = {
+            'id': deal.id,
+            'title': deal.title,
+            'description': deal.description,
+            'original_price': float(deal.original_price),
+            'sale_price': float(deal.sale_price),
+            'discount_percentage': deal.discount_percentage,
+            'image_url': deal.image_url,
+            'affiliate_url': deal.affiliate_url,
+            'store': deal.store,
+            'store_logo_url': deal.store_logo_url,
+            'category': deal.category,
+            'rating': float(deal.rating) if deal.rating else None,
+            'review_count': deal.review_count or 0,
+            'expires_at': deal.expires_at,
+            'is_active': deal.is_active,
+            'is_ai_approved': deal.is_ai_approved or False,
+            'ai_score': float(deal.ai_score) if deal.ai_score else 0.0,
+            'popularity': deal.popularity or 0,
+            'click_count': deal.click_count or 0,
+            'share_count': deal.share_count or 0,
+            'deal_type': deal.deal_type or 'latest',
+            'coupon_code': deal.coupon_code,
+            'coupon_required': deal.coupon_required or False,
+            'created_at': deal.created_at,
+            'updated_at': deal.updated_at
+        }
+        return DealResponse.model_validate(deal_dict_for_response)
+
+    def _to_deal_card(self, row) -> DealCard:
+        """Map a DEAL_CARD_COLUMNS row straight to the DealResponse JSON shape"""
+        image_url = row.image_url
+        if image_url:
+            image_url = self.validator.generate_responsive_image_url(image_url, 'card')
+        return {
+            'title': row.title,
+            'description': row.description,
+            'original_price': float(row.original_price),
+            'sale_price': float(row.sale_price),
+            'discount_percentage': row.discount_percentage,
+            'image_url': image_url,
+            'affiliate_url': row.affiliate_url,
+            'store': row.store,
+            'store_logo_url': row.store_logo_url,
+            'category': row.category,
+            'rating': float(row.rating) if row.rating else None,
+            'review_count': row.review_count or 0,
+            'expires_at': row.expires_at,
+            'deal_type': row.deal_type or 'latest',
+            'source_api': None,
+            'coupon_code': row.coupon_code,
+            'coupon_required': row.coupon_required or False,
+            'id': row.id,
+            'is_active': row.is_active,
+            'is_ai_approved': row.is_ai_approved or False,
+            'ai_score': float(row.ai_score) if row.ai_score else 0.0,
+            'ai_reasons': None,
+            'popularity': row.popularity or 0,
+            'click_count': row.click_count or 0,
+            'share_count': row.share_count or 0,
+            'created_at': row.created_at,
+            'updated_at': row.updated_at
+        }
+
+    async def get_deals(
+        self, 
+        deal_type: Optional[str] = None,
+        category: Optional[str] = None,
+        store: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        only_approved: bool = True,
+        cursor: Optional[str] = None
+    ) -> List[DealResponse]:
+        """Get deals with optional filtering.
+
+        Pages with ``cursor`` (keyset) when given, falling back to ``offset``.
+        Raises ValueError for a malformed cursor.
+        """
+        if cursor:
+            offset = 0
+
+        cache_key = None
+        if not search:
+            cache_key = (
+                "deals", deal_type or None, category.lower() if category else None,
+                store or None, limit, offset, cursor, only_approved, version
+            )
+            cached = deals_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+        query = self._listing_query(
+            select(DealModel), deal_type, category, store, search, only_approved, cursor
+        ).limit(limit)
+        if offset:
+            query = query.offset(offset)
         
         result = await self.db.execute(query)
         deals = result.scalars().all()
         
         # Convert to response format (all deals should now be valid)
-        valid_deals = []
-        for deal in deals:
-            # Sanitize and optimize the deal data
-            deal_dict = {
-                'title': deal.title,
-                'description': deal.description,
-                'original_price': deal.original_price,
-                'sale_price': deal.sale_price,
-                'store': deal.store,
-                'category': deal.category,
-                'affiliate_url': deal.affiliate_url,
-                'image_url': deal.image_url
-            }
-            sanitized_deal_data = self.validator.sanitize_deal_data(deal_dict)
-            
-            # Update the deal with sanitized image URL (external, properly sized)
-            deal.image_url = sanitized_deal_data.get('image_url', deal.image_url)
-            
-            # Ensure all required fields have proper defaults before validation
-            deal_dict_for_response = {
-                'id': deal.id,
-                'title': deal.title,
-                'description': deal.description,
-                'original_price': float(deal.original_price),
-                'sale_price': float(deal.sale_price),
-                'discount_percentage': deal.discount_percentage,
-                'image_url': deal.image_url,
-                'affiliate_url': deal.affiliate_url,
-                'store': deal.store,
-                'store_logo_url': deal.store_logo_url,
-                'category': deal.category,
-                'rating': float(deal.rating) if deal.rating else None,
-                'review_count': deal.review_count or 0,
-                'expires_at': deal.expires_at,
-                'is_active': deal.is_active,
-                'is_ai_approved': deal.is_ai_approved or False,
-                'ai_score': float(deal.ai_score) if deal.ai_score else 0.0,
-                'popularity': deal.popularity or 0,
-                'click_count': deal.click_count or 0,
-                'share_count': deal.share_count or 0,
-                'deal_type': deal.deal_type or 'latest',
-                'coupon_code': deal.coupon_code,
-                'coupon_required': deal.coupon_required or False,
-                'created_at': deal.created_at,
-                'updated_at': deal.updated_at
-            }
-            valid_deals.append(DealResponse.model_validate(deal_dict_for_response))
+        valid_deals = [self._to_deal_response(deal) for deal in deals]
         
-        return valid_deals
+        if cache_key is not None:
+            deals_cache.set(cache_key, valid_deals, DealsQueryCache.listing_tags(category, store))
+        return list(valid_deals)
+
+    async def get_deals_json(
+        self,
+        deal_type: Optional[str] = None,
+        category: Optional[str] = None,
+        store: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        only_approved: bool = True,
+        cursor: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> Tuple[bytes, Optional[str]]:
+        """Fast path for get_deals: same rows and JSON shape, returned as encoded bytes.
+
+        Selects only DEAL_CARD_COLUMNS (no ORM entities, no ai_reasons) and
+        serializes the whole page in one TypeAdapter call. Returns the body and
+        the cursor for the next page. A cached page is only reused under the
+        same catalog ``version``, so a page is never older than the ETag sent
+        with it.
+        """
+        if cursor:
+            offset = 0
+
+        cache_key = None
+        if not search:
+            cache_key = (
+                "deals_json", deal_type or None, category.lower() if category else None,
+                store or None, limit, offset, cursor, only_approved
+            )
+            cached = deals_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        query = self._listing_query(
+            select(*DEAL_CARD_COLUMNS), deal_type, category, store, search, only_approved, cursor
+        ).limit(limit)
+        if offset:
+            query = query.offset(offset)
+
+        result = await self.db.execute(query)
+        rows = result.all()
+
+        body = deal_cards_adapter.dump_json([self._to_deal_card(row) for row in rows])
+        page = (body, next_page_cursor(rows, keyset_ordering(deal_type), limit))
+        if cache_key is not None:
+            deals_cache.set(cache_key, page, DealsQueryCache.listing_tags(category, store))
+        return page
 
     async def get_deal_by_id(self, deal_id: str) -> Optional[DealResponse]:
         """Get a single deal by ID"""
@@ -212,116 +586,111 @@ class DealsService:
         self.db.add(deal)
         await self.db.commit()
         await self.db.refresh(deal)
+        deals_changed([deal])
         
         return DealResponse.model_validate(deal)
 
     async def track_deal_click(self, deal_id: str, click_data: DealClickCreate) -> str:
         """Track a deal click and return the affiliate URL"""
-        # First, get the deal
-        deal = await self.get_deal_by_id(deal_id)
-        if not deal:
+        affiliate_url = await counter_buffer.affiliate_url(self.db, deal_id)
+        if affiliate_url is None:
             raise ValueError("Deal not found")
         
-        # Create click record
-        click = DealClickModel(
-            id=str(uuid.uuid4()),
-            deal_id=deal_id,
-            ip_address=click_data.ip_address,
-            user_agent=click_data.user_agent,
-            referrer=click_data.referrer
-        )
-        
-        # Update deal click count
-        query = select(DealModel).where(DealModel.id == deal_id)
-        result = await self.db.execute(query)
-        deal_model = result.scalar_one_or_none()
-        
-        if deal_model:
-            deal_model.click_count = (deal_model.click_count or 0) + 1
-            deal_model.popularity = (deal_model.popularity or 0) + 1
-        
-        self.db.add(click)
-        await self.db.commit()
+        # Click record: queued for batched COPY unless ingestion is disabled
+        if event_ingestion.enabled:
+            event_ingestion.submit_click(
+                deal_id, click_data.ip_address, click_data.user_agent, click_data.referrer
+            )
+        else:
+            click = DealClickModel(
+                id=str(uuid.uuid4()),
+                deal_id=deal_id,
+                ip_address=click_data.ip_address,
+                user_agent=click_data.user_agent,
+                referrer=click_data.referrer
+            )
+            self.db.add(click)
+            await self.db.commit()
         
-        return deal.affiliate_url
+        # Counts are written behind in batches (see services/counter_buffer.py)
+        counter_buffer.add(deal_id, clicks=1, popularity=1)
+        return affiliate_url
 
     async def create_share_url(self, deal_id: str, share_data: SocialShareCreate) -> str:
-        """Create a short URL for sharing a deal"""
-        import random
-        import string
-        
-        # Generate short code
-        short_code = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
+        """Return the short URL for sharing a deal on a platform, creating it on first share"""
+        domain = os.getenv('REPLIT_DOMAINS', 'localhost:5000').split(',')[0]
         
-        # Create original URL pointing to deal page
-        original_url = f"https://{os.getenv('REPLIT_DOMAINS', 'localhost:5000').split(',')[0]}/deals/{deal_id}"
-        
-        # Create short URL record
-        short_url_record = ShortUrlModel(
-            id=str(uuid.uuid4()),
-            short_code=short_code,
-            original_url=original_url,
-            deal_id=deal_id
-        )
+        # Share links are reused per (deal, platform), so repeat shares only bump counters
+        short_code = short_url_resolver.share_code(deal_id, share_data.platform)
+        if short_code is None:
+            short_code = await self._get_or_create_share_code(deal_id, share_data.platform, f"https://{domain}/deals/{deal_id}")
         
         # Create share record with short URL
-        share_data.short_url = f"https://{os.getenv('REPLIT_DOMAINS', 'localhost:5000').split(',')[0]}/s/{short_code}"
-        share = SocialShareModel(
-            id=str(uuid.uuid4()),
-            **share_data.model_dump()
-        )
-        
-        # Update deal share count
-        query = select(DealModel).where(DealModel.id == deal_id)
-        result = await self.db.execute(query)
-        deal = result.scalar_one_or_none()
-        
-        if deal:
-            deal.share_count = (deal.share_count or 0) + 1
-            deal.popularity = (deal.popularity or 0) + 1
-        
-        self.db.add(short_url_record)
-        self.db.add(share)
+        share_data.short_url = f"https://{domain}/s/{short_code}"
+        self._record_share(share_data)
         await self.db.commit()
         
+        counter_buffer.add(deal_id, shares=1, popularity=1)
+        
         return share_data.short_url
     
+    async def _get_or_create_share_code(self, deal_id: str, platform: str, original_url: str) -> str:
+        """Short code of the share link for (deal_id, platform), inserting it if there is none yet"""
+        existing = select(ShortUrlModel.short_code, ShortUrlModel.original_url).where(
+            ShortUrlModel.deal_id == deal_id,
+            ShortUrlModel.platform == platform
+        )
+        link = (await self.db.execute(existing)).first()
+        
+        if link is None:
+            insert_link = pg_insert(ShortUrlModel).values(
+                id=str(uuid.uuid4()),
+                short_code=await short_code_allocator.allocate(self.db),
+                original_url=original_url,
+                deal_id=deal_id,
+                platform=platform
+            ).on_conflict_do_nothing(
+                index_elements=[ShortUrlModel.deal_id, ShortUrlModel.platform],
+                index_where=ShortUrlModel.platform.isnot(None)
+            ).returning(ShortUrlModel.short_code, ShortUrlModel.original_url)
+            link = (await self.db.execute(insert_link)).first()
+            if link is None:
+                # Another worker created it between our select and insert
+                link = (await self.db.execute(existing)).one()
+            # The short URL must exist before it is handed out
+            await self.db.commit()
+        
+        short_url_resolver.remember(link.short_code, link.original_url, deal_id, platform)
+        return link.short_code
+    
     async def resolve_short_url(self, short_code: str) -> str:
         """Resolve a short URL code to the original deal URL"""
-        query = select(ShortUrlModel).where(ShortUrlModel.short_code == short_code)
-        result = await self.db.execute(query)
-        short_url = result.scalar_one_or_none()
+        # Cached lookup; the click count is written behind by the counter buffer
+        link = await short_url_resolver.resolve(self.db, short_code)
         
-        if not short_url:
+        if not link:
             return None
-            
-        # Update click count
-        short_url.click_count = (short_url.click_count or 0) + 1
-        await self.db.commit()
         
-        return short_url.original_url
+        return link[0]
 
     async def track_social_share(self, share_data: SocialShareCreate) -> bool:
         """Track a social share"""
-        share = SocialShareModel(
-            id=str(uuid.uuid4()),
-            **share_data.model_dump()
-        )
-        
-        # Update deal share count
-        query = select(DealModel).where(DealModel.id == share_data.deal_id)
-        result = await self.db.execute(query)
-        deal_model = result.scalar_one_or_none()
-        
-        if deal_model:
-            deal_model.share_count = (deal_model.share_count or 0) + 1
-            deal_model.popularity = (deal_model.popularity or 0) + 2  # Shares count more than clicks
-        
-        self.db.add(share)
+        self._record_share(share_data)
         await self.db.commit()
         
+        counter_buffer.add(share_data.deal_id, shares=1, popularity=2)  # Shares count more than clicks
+        
         return True
 
+    def _record_share(self, share_data: SocialShareCreate):
+        """Queue the share row for batched COPY, or add it to the session if ingestion is disabled"""
+        if event_ingestion.enabled:
+            event_ingestion.submit_share(
+                share_data.deal_id, share_data.platform, share_data.ip_address, share_data.short_url
+            )
+        else:
+            self.db.add(SocialShareModel(id=str(uuid.uuid4()), **share_data.model_dump()))
+
     async def approve_deal(self, deal_id: str) -> bool:
         """Approve a deal (admin only)"""
         query = select(DealModel).where(DealModel.id == deal_id)
@@ -331,6 +700,7 @@ class DealsService:
         if deal:
             deal.is_ai_approved = True
             await self.db.commit()
+            deals_changed([deal])
             return True
         return False
 
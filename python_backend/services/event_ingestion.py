@@ -0,0 +1,284 @@
+"""
+Event Ingestion
+Bounded in-memory queue for deal click and share events, drained in
+batches into deal_clicks / social_shares with COPY
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import background_engine
+
+logger = logging.getLogger(__name__)
+
+# Set to false to write events inline in the request transaction (the old path)
+EVENT_INGESTION_ENABLED = os.getenv("EVENT_INGESTION_ENABLED", "true").lower() == "true"
+EVENT_QUEUE_MAX = int(os.getenv("EVENT_QUEUE_MAX", "10000"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "500"))
+EVENT_FLUSH_INTERVAL_MS = int(os.getenv("EVENT_FLUSH_INTERVAL_MS", "250"))
+# What to do with events when the queue is full or a batch cannot be written:
+# "drop" discards them, "spill" appends them to EVENT_SPILL_DIR for replay
+EVENT_OVERFLOW_POLICY = os.getenv("EVENT_OVERFLOW_POLICY", "drop")
+EVENT_SPILL_DIR = Path(os.getenv("EVENT_SPILL_DIR", "/tmp/dealsphere-events"))
+
+EVENT_TABLES = {
+    "deal_clicks": ("id", "deal_id", "ip_address", "user_agent", "referrer", "clicked_at"),
+    "social_shares": ("id", "deal_id", "platform", "ip_address", "short_url", "shared_at"),
+}
+
+Event = Tuple[str, tuple]  # (table, record in EVENT_TABLES column order)
+
+
+class EventIngestion:
+    """Accepts events without touching the database; a single writer task
+    copies them out in batches of up to EVENT_BATCH_SIZE"""
+
+    def __init__(self):
+        self.enabled = EVENT_INGESTION_ENABLED
+        self.policy = EVENT_OVERFLOW_POLICY
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._collecting: List[Event] = []
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed_batches = 0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created lazily so it binds to the running server loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=EVENT_QUEUE_MAX)
+        return self._queue
+
+    def submit_click(self, deal_id: str, ip_address: Optional[str], user_agent: Optional[str], referrer: Optional[str]):
+        self._submit("deal_clicks", (str(uuid.uuid4()), deal_id, ip_address, user_agent, referrer, datetime.utcnow()))
+
+    def submit_share(self, deal_id: str, platform: str, ip_address: Optional[str], short_url: Optional[str]):
+        self._submit("social_shares", (str(uuid.uuid4()), deal_id, platform, ip_address, short_url, datetime.utcnow()))
+
+    def _submit(self, table: str, record: tuple):
+        try:
+            self.queue.put_nowait((table, record))
+        except asyncio.QueueFull:
+            self._overflow([(table, record)])
+
+    def start(self):
+        if self.enabled and (self._writer is None or self._writer.done()):
+            self._writer = asyncio.create_task(self._run(), name="Event ingestion")
+
+    async def stop(self):
+        """Stop the writer after writing out everything already queued"""
+        if self._writer is None:
+            return
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+        if self._inflight is not None:
+            await self._inflight
+        batch, self._collecting = self._collecting, []
+        while batch or not self.queue.empty():
+            await self._write(self._take_batch(batch))
+            batch = []
+
+    async def _run(self):
+        interval = EVENT_FLUSH_INTERVAL_MS / 1000
+        while True:
+            # Events being collected stay visible to stop() if we are cancelled
+            self._collecting = batch = [await self.queue.get()]
+            deadline = time.monotonic() + interval
+            # Wait up to one interval for the batch to fill
+            while len(batch) < EVENT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._collecting = []
+            # Shielded so a shutdown mid-COPY still finishes the batch
+            self._inflight = asyncio.ensure_future(self._write(self._take_batch(batch)))
+            written = await asyncio.shield(self._inflight)
+            self._inflight = None
+            if written and self.queue.empty():
+                await self._replay_spill()
+
+    def _take_batch(self, batch: List[Event]) -> List[Event]:
+        while len(batch) < EVENT_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _write(self, batch: List[Event]) -> bool:
+        by_table: Dict[str, List[tuple]] = {}
+        for table, record in batch:
+            by_table.setdefault(table, []).append(record)
+        try:
+            async with background_engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                await self._copy(raw.driver_connection, by_table)
+            self.written += len(batch)
+            return True
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Writing {len(batch)} events failed: {e}")
+            self._overflow(batch)
+            return False
+
+    @staticmethod
+    async def _copy(connection, by_table: Dict[str, List[tuple]]):
+        import asyncpg
+
+        async with connection.transaction():
+            for table, records in by_table.items():
+                columns = EVENT_TABLES[table]
+                try:
+                    async with connection.transaction():
+                        await connection.copy_records_to_table(table, records=records, columns=columns)
+                except (asyncpg.ForeignKeyViolationError, asyncpg.UniqueViolationError):
+                    # A deal was hard-deleted while its events were queued, or a
+                    # replayed batch was already written before a crash: stage
+                    # the batch and keep only new rows whose deal still exists
+                    await connection.execute(
+                        f"CREATE TEMP TABLE IF NOT EXISTS {table}_staging "
+                        f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                    )
+                    await connection.copy_records_to_table(f"{table}_staging", records=records, columns=columns)
+                    await connection.execute(
+                        f"INSERT INTO {table} SELECT s.* FROM {table}_staging s "
+                        f"WHERE EXISTS (SELECT 1 FROM deals d WHERE d.id = s.deal_id) "
+                        f"ON CONFLICT DO NOTHING"
+                    )
+
+    def _overflow(self, events: List[Event]):
+        if self.policy != "spill":
+            self.dropped += len(events)
+            return
+        try:
+            EVENT_SPILL_DIR.mkdir(parents=True, exist_ok=True)
+            # One file per worker, so only its owner ever appends to it
+            path = EVENT_SPILL_DIR / f"events-{os.getpid()}.jsonl"
+            with open(path, "a", encoding="utf-8") as f:
+                for table, record in events:
+                    f.write(json.dumps([table, list(record[:-1]), record[-1].isoformat()]) + "\n")
+            self.spilled += len(events)
+        except OSError as e:
+            logger.error(f"Spilling {len(events)} events failed, dropping them: {e}")
+            self.dropped += len(events)
+
+    async def _replay_spill(self):
+        """Feed spilled events back through the writer once the queue is idle"""
+        if self.policy != "spill" or not EVENT_SPILL_DIR.exists():
+            return
+        for path in self._claim_spill_files():
+            count = await self._replay_file(path)
+            if count is None:
+                return  # The database is failing again; the rest keep for later
+            logger.info(f"Replayed {count} spilled events from {path.name}")
+
+    @staticmethod
+    def _claim_spill_files() -> List[Path]:
+        """Spill files this worker may replay, renamed so nothing appends to them.
+
+        That is its own spill file, its own replay files left by a cancelled
+        or failed replay, and any file whose worker is no longer running (a
+        crash, or a restart with new pids). Files of live workers are left
+        alone: they may still be appending to them.
+        """
+        pid = os.getpid()
+        claimed = []
+        for path in sorted([*EVENT_SPILL_DIR.glob("events-*.jsonl"), *EVENT_SPILL_DIR.glob("events-*.replaying")]):
+            owner = _spill_owner(path)
+            if owner == pid and path.suffix == ".replaying":
+                claimed.append(path)
+                continue
+            if owner != pid and owner is not None and _pid_alive(owner):
+                continue
+            replaying = EVENT_SPILL_DIR / f"events-{pid}-{uuid.uuid4().hex[:8]}.replaying"
+            try:
+                path.rename(replaying)
+            except OSError:
+                continue  # Another worker claimed it first
+            claimed.append(replaying)
+        return claimed
+
+    async def _replay_file(self, path: Path) -> Optional[int]:
+        """Write the events in ``path`` in batches from the end, truncating the
+        file behind each batch so an interrupted replay resumes where it
+        stopped. Returns the number of events, or None if a batch failed."""
+        offsets: List[int] = []
+        events: List[Event] = []
+        with open(path, "r+b") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                try:
+                    table, values, timestamp = json.loads(line)
+                    events.append((table, (*values, datetime.fromisoformat(timestamp))))
+                    offsets.append(offset)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable line in {path.name}")
+
+            end = len(events)
+            while end > 0:
+                start = max(0, end - EVENT_BATCH_SIZE)
+                written = await self._write(events[start:end])
+                # Written, or spilled again to this worker's spill file by _write
+                f.truncate(offsets[start])
+                f.flush()
+                end = start
+                if not written:
+                    return None
+        path.unlink()
+        return len(events)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "policy": self.policy,
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "failed_batches": self.failed_batches,
+        }
+
+
+def _spill_owner(path: Path) -> Optional[int]:
+    """Pid in events-<pid>.jsonl / events-<pid>[-<token>].replaying"""
+    try:
+        return int(path.name[len("events-"):].split(".")[0].split("-")[0])
+    except ValueError:
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+event_ingestion = EventIngestion()
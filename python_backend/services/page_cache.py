@@ -0,0 +1,84 @@
+"""
+Page Cache
+Fully rendered SEO pages for deals (including crawler share pages) and
+categories, held in memory
+"""
+
+import os
+from typing import Hashable, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from models import Deal as DealModel
+from utils.lru_cache import LRUCache
+
+DEAL_PAGE_CACHE_SIZE = int(os.getenv("DEAL_PAGE_CACHE_SIZE", "5000"))
+CATEGORY_PAGE_CACHE_SIZE = int(os.getenv("CATEGORY_PAGE_CACHE_SIZE", "500"))
+# How long a deal's updated_at is trusted without re-reading it. Writes in
+# this process drop it at once; this bounds staleness for other workers.
+DEAL_PAGE_VERSION_TTL_SECONDS = int(os.getenv("DEAL_PAGE_VERSION_TTL_SECONDS", "60"))
+
+_MISS = object()
+
+
+class PageCache:
+    """Deal pages are keyed by (deal_id, updated_at, base_url, variant), so an
+    edited deal is re-rendered as soon as its new updated_at is seen. Category
+    page keys carry the catalog version, and all category pages are dropped on
+    any deal write in this process.
+    """
+
+    def __init__(self):
+        self._deal_versions = LRUCache(DEAL_PAGE_CACHE_SIZE, ttl=DEAL_PAGE_VERSION_TTL_SECONDS)
+        self._deal_pages = LRUCache(DEAL_PAGE_CACHE_SIZE)
+        self._category_pages = LRUCache(CATEGORY_PAGE_CACHE_SIZE)
+
+    async def deal_version(self, db: AsyncSession, deal_id: str) -> Optional[tuple]:
+        """``(updated_at,)`` of the deal, or None if there is no such deal"""
+        version = self._deal_versions.get(deal_id, _MISS)
+        if version is _MISS:
+            result = await db.execute(select(DealModel.updated_at).where(DealModel.id == deal_id))
+            row = result.first()
+            version = (row.updated_at,) if row else None
+            self._deal_versions.set(deal_id, version)
+        return version
+
+    def deal_page(self, deal_id: str, version: tuple, base_url: str, variant: Hashable) -> Optional[bytes]:
+        return self._deal_pages.get((deal_id, version, base_url, variant))
+
+    def set_deal_page(self, deal, base_url: str, variant: Hashable, page: bytes):
+        """Store ``page`` rendered from the ``deal`` row under the row's own version"""
+        version = (deal.updated_at,)
+        self._deal_versions.set(deal.id, version)
+        self._deal_pages.set((deal.id, version, base_url, variant), page)
+
+    def category_page(self, key: Hashable) -> Optional[bytes]:
+        return self._category_pages.get(key)
+
+    def set_category_page(self, key: Hashable, page: bytes):
+        self._category_pages.set(key, page)
+
+    def deals_changed(self, deal_ids: Iterable[str]):
+        """Drop pages of written deals, and every category page"""
+        deal_ids = set(deal_ids)
+        for deal_id in deal_ids:
+            self._deal_versions.pop(deal_id)
+        if deal_ids:
+            for key in self._deal_pages.keys():
+                if key[0] in deal_ids:
+                    self._deal_pages.pop(key)
+        self._category_pages.clear()
+
+    def stats(self) -> dict:
+        return {
+            "deal_versions": self._deal_versions.stats(),
+            "deal_pages": self._deal_pages.stats(),
+            "category_pages": self._category_pages.stats(),
+        }
+
+
+page_cache = PageCache()
@@ -13,9 +13,10 @@ import time
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, text
 
-from database import get_db
+from database import background_session
 from models import Deal
 from services.deal_fetcher import run_deal_fetching_cycle
+from services.deals_service import deals_changed
 
 logger = logging.getLogger(__name__)
 
@@ -111,7 +112,7 @@ class DealScheduler:
             # Calculate cutoff time (24 hours ago)
             cutoff_time = datetime.utcnow() - timedelta(hours=24)
             
-            async with get_db() as db:
+            async with background_session() as db:
                 # Find rejected deals older than 24 hours
                 result = await db.execute(
                     select(Deal).where(
@@ -128,6 +129,8 @@ class DealScheduler:
                     deleted_count += 1
                 
                 await db.commit()
+                if old_rejected_deals:
+                    deals_changed(old_rejected_deals)
                 
                 logger.info(f"Cleaned up {deleted_count} rejected deals")
                 
@@ -145,7 +148,7 @@ class DealScheduler:
         try:
             logger.info("Starting deal statistics update")
             
-            async with get_db() as db:
+            async with background_session() as db:
                 # Update deal popularity scores based on clicks and shares
                 await db.execute(text("""
                     UPDATE deals 
@@ -181,20 +184,23 @@ class DealScheduler:
         try:
             logger.info("Starting daily maintenance")
             
-            async with get_db() as db:
+            async with background_session() as db:
                 # Remove very old deals (older than 30 days)
                 cutoff_date = datetime.utcnow() - timedelta(days=30)
                 
                 result = await db.execute(
                     delete(Deal).where(Deal.created_at < cutoff_date)
+                    .returning(Deal.id, Deal.category, Deal.store)
                 )
-                
-                deleted_count = result.rowcount
+                deleted_deals = result.all()
+                deleted_count = len(deleted_deals)
                 
                 # Clean up orphaned data
                 await db.execute(text("VACUUM ANALYZE;"))
                 
                 await db.commit()
+                if deleted_deals:
+                    deals_changed(deleted_deals)
                 
                 logger.info(f"Daily maintenance completed. Removed {deleted_count} old deals")
                 
@@ -210,7 +216,7 @@ class DealScheduler:
     async def _log_task_result(self, task_name: str, result: Dict[str, Any]):
         """Log task results to database"""
         try:
-            async with get_db() as db:
+            async with background_session() as db:
                 await db.execute(text("""
                     INSERT INTO task_logs (task_name, result_data, executed_at)
                     VALUES (:task_name, :result_data, :executed_at)
@@ -277,7 +283,7 @@ class DealScheduler:
     async def get_scheduler_status(self) -> Dict[str, Any]:
         """Get current scheduler status and recent task logs"""
         try:
-            async with get_db() as db:
+            async with background_session() as db:
                 # Get recent task logs
                 result = await db.execute(text("""
                     SELECT task_name, result_data, executed_at 
@@ -0,0 +1,79 @@
+"""
+Short Code Allocator
+Unique base62 short codes from a Postgres sequence, reserved in blocks
+"""
+
+import asyncio
+import os
+import string
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from models import short_url_code_seq
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+SHORT_CODE_LENGTH = 7
+SHORT_CODE_SPACE = len(BASE62_ALPHABET) ** SHORT_CODE_LENGTH
+# Ids handed out per nextval(); fixed by the sequence's INCREMENT BY
+SHORT_CODE_BLOCK_SIZE = short_url_code_seq.increment
+# Ids are scrambled with an invertible 42-bit mix before encoding, so
+# neighbouring ids give unrelated-looking codes (2^42 just covers 62^7)
+_MIX_BITS = 42
+_MIX_MASK = (1 << _MIX_BITS) - 1
+_MIX_MULTIPLIERS = (0x2545F4914F7, 0x1B873593A35)  # odd, so invertible mod 2^42
+
+
+def _scramble(x: int) -> int:
+    for multiplier in _MIX_MULTIPLIERS:
+        x = (x * multiplier) & _MIX_MASK
+        x ^= x >> (_MIX_BITS // 2)
+    return x
+
+
+def encode_short_code(n: int) -> str:
+    """Fixed-length base62 code for sequence id ``n``.
+
+    Always SHORT_CODE_LENGTH characters, so it can never equal one of the
+    legacy random 8-character codes.
+    """
+    if not 0 <= n < SHORT_CODE_SPACE:
+        raise ValueError(f"Short code id {n} is outside the {SHORT_CODE_LENGTH}-character space")
+    value = _scramble(n)
+    # Cycle-walk: re-mix until the value lands inside the code space, which
+    # keeps the mapping a bijection on [0, SHORT_CODE_SPACE)
+    while value >= SHORT_CODE_SPACE:
+        value = _scramble(value)
+    chars = []
+    for _ in range(SHORT_CODE_LENGTH):
+        value, digit = divmod(value, len(BASE62_ALPHABET))
+        chars.append(BASE62_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class ShortCodeAllocator:
+    """Hands out ids from the current block and fetches a new block when it runs out.
+
+    Ids left in a block when the process exits are simply never used.
+    """
+
+    def __init__(self):
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def allocate(self, db: AsyncSession) -> str:
+        async with self._lock:
+            if self._next >= self._end:
+                # nextval() is not transactional, so the block stays ours even on rollback
+                start = (await db.execute(select(short_url_code_seq.next_value()))).scalar_one()
+                self._next, self._end = start, start + SHORT_CODE_BLOCK_SIZE
+            n = self._next
+            self._next += 1
+        return encode_short_code(n)
+
+
+short_code_allocator = ShortCodeAllocator()
@@ -0,0 +1,70 @@
+"""
+Short URL Resolver
+In-process cache of short_code -> (original_url, deal_id) and of the share
+link of each (deal_id, platform)
+"""
+
+import os
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from models import ShortUrl as ShortUrlModel
+from services.counter_buffer import counter_buffer
+from utils.lru_cache import LRUCache
+
+SHORT_URL_CACHE_SIZE = int(os.getenv("SHORT_URL_CACHE_SIZE", "50000"))
+# Unknown codes are remembered briefly so scanners cannot hammer the database,
+# but a code created by another worker still resolves soon after
+SHORT_URL_NEGATIVE_TTL_SECONDS = 60
+
+_MISS = object()
+
+ShortLink = Tuple[str, Optional[str]]  # (original_url, deal_id)
+
+
+class ShortUrlResolver:
+    """Short links never change once created, so positive entries have no TTL"""
+
+    def __init__(self):
+        self._links = LRUCache(SHORT_URL_CACHE_SIZE)
+        self._share_codes = LRUCache(SHORT_URL_CACHE_SIZE)
+
+    async def resolve(self, db: AsyncSession, short_code: str) -> Optional[ShortLink]:
+        """Look up ``short_code`` and count the hit; None if the code does not exist"""
+        link = self._links.get(short_code, _MISS)
+        if link is _MISS:
+            result = await db.execute(
+                select(ShortUrlModel.original_url, ShortUrlModel.deal_id).where(
+                    ShortUrlModel.short_code == short_code
+                )
+            )
+            row = result.first()
+            link = (row.original_url, row.deal_id) if row else None
+            self._links.set(short_code, link, ttl=None if link else SHORT_URL_NEGATIVE_TTL_SECONDS)
+
+        if link is not None:
+            counter_buffer.add_short_url_click(short_code)
+        return link
+
+    def remember(self, short_code: str, original_url: str, deal_id: Optional[str], platform: Optional[str] = None):
+        self._links.set(short_code, (original_url, deal_id))
+        if deal_id and platform:
+            self._share_codes.set((deal_id, platform), short_code)
+
+    def share_code(self, deal_id: str, platform: str) -> Optional[str]:
+        """Short code of the existing share link for ``deal_id`` on ``platform``, if cached"""
+        return self._share_codes.get((deal_id, platform))
+
+    def stats(self) -> dict:
+        return {
+            "links": self._links.stats(),
+            "share_codes": self._share_codes.stats(),
+        }
+
+
+short_url_resolver = ShortUrlResolver()
@@ -0,0 +1,218 @@
+"""
+Sitemaps
+Sitemap index plus gzipped deal sitemap shards, generated by streaming deal
+ids and cached until the deals in them change
+"""
+
+import asyncio
+import gzip
+import io
+import os
+import time
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from models import Deal as DealModel
+from services.category_registry import category_registry
+from utils.lru_cache import LRUCache
+
+# Deals per shard the shard count is sized for, leaving headroom below the
+# protocol limit since ids only spread evenly on average
+SITEMAP_SHARD_TARGET_URLS = int(os.getenv("SITEMAP_SHARD_TARGET_URLS", "40000"))
+SITEMAP_MAX_URLS = 50000
+# Bounds how stale shards can be after writes made by other workers
+SITEMAP_TTL_SECONDS = int(os.getenv("SITEMAP_TTL_SECONDS", "3600"))
+SITEMAP_STREAM_BATCH = 5000
+SITEMAP_CACHE_SIZE = 256
+# Deal ids are uuid4 strings, so their first three hex digits are spread
+# evenly over ID_SPACE; shard boundaries are fixed points in that space
+ID_SPACE = 16 ** 3
+SITEMAP_MAX_SHARDS = ID_SPACE
+
+URLSET_OPEN = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = b"</urlset>\n"
+
+STATIC_PAGES = [
+    ("/about", "0.5"),
+    ("/contact", "0.5"),
+    ("/blog", "0.6"),
+    ("/blog/how-to-find-best-deals", "0.5"),
+    ("/blog/ai-deal-verification", "0.5"),
+    ("/blog/coupon-strategies", "0.5"),
+    ("/blog/online-shopping-safety", "0.5"),
+    ("/blog/best-deal-categories", "0.5"),
+    ("/affiliate-disclosure", "0.4"),
+    ("/privacy-policy", "0.3"),
+    ("/terms-conditions", "0.3"),
+]
+
+
+def _sitemap_deals():
+    return and_(
+        DealModel.is_active == True,
+        DealModel.is_ai_approved == True,
+        DealModel.status == "approved",
+    )
+
+
+def _url(loc: str, lastmod: str, changefreq: str, priority: str) -> str:
+    return (
+        f"  <url>\n"
+        f"    <loc>{loc}</loc>\n"
+        f"    <lastmod>{lastmod}</lastmod>\n"
+        f"    <changefreq>{changefreq}</changefreq>\n"
+        f"    <priority>{priority}</priority>\n"
+        f"  </url>\n"
+    )
+
+
+def shard_bounds(shards: int, number: int) -> Tuple[Optional[str], Optional[str]]:
+    """Id range [lower, upper) of shard ``number`` (1-based) out of ``shards``.
+
+    The first shard is open below and the last open above, so ids that are
+    not lowercase hex still land in exactly one shard.
+    """
+    lower = f"{(number - 1) * ID_SPACE // shards:03x}" if number > 1 else None
+    upper = f"{number * ID_SPACE // shards:03x}" if number < shards else None
+    return lower, upper
+
+
+def shard_of(deal_id: str, shards: int) -> int:
+    prefix = deal_id[:3]
+    if len(prefix) == 3 and all(c in "0123456789abcdef" for c in prefix):
+        return int(prefix, 16) * shards // ID_SPACE + 1
+    for number in range(1, shards):
+        if deal_id < shard_bounds(shards, number)[1]:
+            return number
+    return shards
+
+
+def valid_layout(shards: int, number: int) -> bool:
+    """``shards`` is a power of two no larger than SITEMAP_MAX_SHARDS"""
+    return 1 <= shards <= SITEMAP_MAX_SHARDS and shards & (shards - 1) == 0 and 1 <= number <= shards
+
+
+class SitemapShards:
+    """Deals are split into shards by fixed id ranges that depend only on the
+    shard count, which is part of every shard URL (deals-<shards>-<n>). Any
+    worker serves a given URL with the same deals, whatever count it would
+    pick itself, so an index from one worker never disagrees with a shard
+    from another. A write only invalidates the shard holding the deal.
+
+    The count is the smallest power of two that keeps shards under
+    SITEMAP_SHARD_TARGET_URLS; it is rechecked when it expires or a shard
+    outgrows SITEMAP_MAX_URLS.
+    """
+
+    def __init__(self):
+        self._shards = 1
+        self._counted_at: Optional[float] = None
+        self._files = LRUCache(SITEMAP_CACHE_SIZE, ttl=SITEMAP_TTL_SECONDS)
+        self._lock = asyncio.Lock()
+        self.generated = 0
+
+    async def shard_count(self, db: AsyncSession) -> int:
+        if self._counted_at is None or time.monotonic() - self._counted_at >= SITEMAP_TTL_SECONDS:
+            async with self._lock:
+                if self._counted_at is None or time.monotonic() - self._counted_at >= SITEMAP_TTL_SECONDS:
+                    await self._count(db)
+        return self._shards
+
+    async def _count(self, db: AsyncSession):
+        total = await db.scalar(select(func.count()).select_from(DealModel).where(_sitemap_deals()))
+        shards = 1
+        while shards < SITEMAP_MAX_SHARDS and total > shards * SITEMAP_SHARD_TARGET_URLS:
+            shards *= 2
+        self._shards = shards
+        self._counted_at = time.monotonic()
+
+    async def deals_file(self, db: AsyncSession, shards: int, number: int, base_url: str) -> Optional[bytes]:
+        """Gzipped urlset for shard ``number`` (1-based) of ``shards``, or None
+        for a layout this scheme never produces"""
+        if not valid_layout(shards, number):
+            return None
+        key = ("deals", shards, number, base_url)
+        data = self._files.get(key)
+        if data is None:
+            async with self._lock:
+                data = self._files.get(key)
+                if data is None:
+                    data = await self._generate_deals(db, shards, number, base_url)
+                    self._files.set(key, data)
+        return data
+
+    async def _generate_deals(self, db: AsyncSession, shards: int, number: int, base_url: str) -> bytes:
+        query = select(DealModel.id, DealModel.updated_at).where(_sitemap_deals())
+        lower, upper = shard_bounds(shards, number)
+        if lower is not None:
+            query = query.where(DealModel.id >= lower)
+        if upper is not None:
+            query = query.where(DealModel.id < upper)
+        query = query.order_by(DealModel.id).execution_options(yield_per=SITEMAP_STREAM_BATCH)
+
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        loc_prefix = f"{escape(base_url)}/deals/"
+        buffer = io.BytesIO()
+        count = 0
+        # Compressed as rows arrive; only the server-side cursor's current
+        # batch and the compressed output are held in memory
+        with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as out:
+            out.write(URLSET_OPEN)
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                count += len(rows)
+                out.write("".join(
+                    _url(
+                        loc_prefix + escape(row.id),
+                        row.updated_at.strftime("%Y-%m-%d") if row.updated_at else today,
+                        "weekly", "0.6"
+                    )
+                    for row in rows
+                ).encode("utf-8"))
+            out.write(URLSET_CLOSE)
+
+        if count > SITEMAP_MAX_URLS:
+            self._counted_at = None  # Recount on the next index fetch
+        self.generated += 1
+        return buffer.getvalue()
+
+    async def pages_file(self, base_url: str) -> bytes:
+        """Gzipped urlset for the home page, static pages and categories"""
+        categories = await category_registry.ranked()
+        key = ("pages", base_url, category_registry.version)
+        data = self._files.get(key)
+        if data is None:
+            today = datetime.utcnow().strftime("%Y-%m-%d")
+            base = escape(base_url)
+            urls = [_url(f"{base}/", today, "daily", "1.0")]
+            urls.extend(_url(f"{base}{path}", today, "monthly", priority) for path, priority in STATIC_PAGES)
+            for category in categories:
+                urls.append(_url(f"{base}/category/{category.slug}", today, "daily", "0.8"))
+
+            data = gzip.compress(URLSET_OPEN + "".join(urls).encode("utf-8") + URLSET_CLOSE, mtime=0)
+            self._files.set(key, data)
+        return data
+
+    def deals_changed(self, deal_ids: Iterable[str]):
+        """Drop the shards holding ``deal_ids``; the pages file follows the
+        category registry's version instead"""
+        deal_ids = list(deal_ids)
+        for key in self._files.keys():
+            if key[0] == "deals" and any(shard_of(deal_id, key[1]) == key[2] for deal_id in deal_ids):
+                self._files.pop(key)
+
+    def stats(self) -> dict:
+        stats = self._files.stats()
+        stats["shards"] = self._shards
+        stats["generated"] = self.generated
+        return stats
+
+
+sitemap_shards = SitemapShards()
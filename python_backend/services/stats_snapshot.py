@@ -0,0 +1,188 @@
+"""
+Stats Snapshot
+Hero-section and count aggregates computed in one pass over deals and
+served from memory
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import select, func, and_, or_
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import background_session
+from models import Deal as DealModel
+from utils.periodic import DebouncedTask, PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+STATS_REFRESH_SECONDS = int(os.getenv("STATS_REFRESH_SECONDS", "60"))
+# Readers never see a snapshot older than this; past it they wait for a refresh
+# (unless the database is unreachable, when the last snapshot is served)
+STATS_MAX_STALENESS_SECONDS = int(os.getenv("STATS_MAX_STALENESS_SECONDS", "300"))
+# Bursts of writes (imports, bulk actions) collapse into one refresh
+STATS_WRITE_DEBOUNCE_SECONDS = 2
+
+
+class StatsSnapshot:
+    """Immutable set of aggregates taken at ``taken_at`` (monotonic clock).
+
+    ``catalog_version`` changes whenever a deal is added, removed, edited or
+    counted; ``version_since`` is when this process first saw that version.
+    """
+
+    def __init__(
+        self,
+        listed_count: int,
+        active_count: int,
+        active_approved_count: int,
+        published_count: int,
+        latest_count: int,
+        total_savings: float,
+        catalog_version: str,
+        version_since: float,
+        taken_at: float
+    ):
+        self.listed_count = listed_count
+        self.active_count = active_count
+        self.active_approved_count = active_approved_count
+        self.published_count = published_count
+        self.latest_count = latest_count
+        self.total_savings = total_savings
+        self.catalog_version = catalog_version
+        self.version_since = version_since
+        self.taken_at = taken_at
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+    def hero_stats(self) -> dict:
+        total_savings = self.total_savings
+        if total_savings >= 1_000_000:
+            savings_str = f"${total_savings / 1_000_000:.1f}M+"
+        elif total_savings >= 1_000:
+            savings_str = f"${total_savings / 1_000:.0f}K+"
+        else:
+            savings_str = f"${total_savings:.0f}"
+
+        total_count = self.active_count or 1
+        ai_pct = round((self.active_approved_count / total_count) * 100)
+
+        return {
+            "active_deals": self.active_approved_count,
+            "total_savings": savings_str,
+            "total_savings_raw": total_savings,
+            "ai_verified_pct": ai_pct
+        }
+
+
+def _snapshot_query():
+    listed = and_(DealModel.is_active == True, DealModel.is_ai_approved == True)
+    active = and_(DealModel.is_active == True, DealModel.status != "deleted")
+    active_approved = and_(active, DealModel.is_ai_approved == True)
+    discounted = and_(
+        active_approved,
+        DealModel.original_price.isnot(None),
+        DealModel.sale_price.isnot(None),
+        DealModel.original_price > 0,
+        DealModel.sale_price > 0,
+        DealModel.sale_price < DealModel.original_price
+    )
+    latest = and_(
+        listed,
+        or_(DealModel.deal_type == 'latest', DealModel.deal_type == 'regular', DealModel.deal_type.is_(None), DealModel.deal_type == ''),
+        DealModel.title.isnot(None),
+        DealModel.original_price.isnot(None),
+        DealModel.sale_price.isnot(None),
+        DealModel.store.isnot(None),
+        DealModel.category.isnot(None),
+        DealModel.image_url.isnot(None),
+        DealModel.image_url != ''
+    )
+    return select(
+        func.count().filter(listed).label("listed_count"),
+        func.count().filter(active).label("active_count"),
+        func.count().filter(active_approved).label("active_approved_count"),
+        func.count().filter(and_(listed, DealModel.status == 'approved')).label("published_count"),
+        func.count().filter(latest).label("latest_count"),
+        func.sum(DealModel.original_price - DealModel.sale_price).filter(discounted).label("total_savings"),
+        # Catalog version: edits move updated_at, inserts and deletes the row
+        # count, and counter flushes the counter total
+        func.count().label("row_count"),
+        func.max(DealModel.updated_at).label("last_updated_at"),
+        func.sum(
+            func.coalesce(DealModel.click_count, 0)
+            + func.coalesce(DealModel.share_count, 0)
+            + func.coalesce(DealModel.popularity, 0)
+        ).label("counter_total")
+    ).select_from(DealModel)
+
+
+class StatsSnapshotService:
+    """Keeps one StatsSnapshot current.
+
+    Refreshed on a schedule, shortly after deal writes, and on read once the
+    snapshot is older than STATS_MAX_STALENESS_SECONDS. Concurrent readers
+    share a single refresh.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[StatsSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._write_refresh = DebouncedTask("Stats snapshot refresh", STATS_WRITE_DEBOUNCE_SECONDS, self.refresh)
+
+    async def get(self) -> StatsSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age < STATS_MAX_STALENESS_SECONDS:
+            return snapshot
+        return await self.refresh(max_age=STATS_MAX_STALENESS_SECONDS)
+
+    async def refresh(self, max_age: float = 0) -> StatsSnapshot:
+        """Recompute the aggregates unless another caller did within ``max_age`` seconds"""
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and max_age and snapshot.age < max_age:
+                return snapshot
+
+            taken_at = time.monotonic()
+            try:
+                async with background_session() as session:
+                    row = (await session.execute(_snapshot_query())).one()
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                logger.error(f"Stats snapshot refresh failed, serving snapshot from {snapshot.age:.0f}s ago: {e}")
+                return snapshot
+
+            catalog_version = f"{row.row_count}:{row.last_updated_at}:{row.counter_total or 0}"
+            if snapshot is not None and snapshot.catalog_version == catalog_version:
+                version_since = snapshot.version_since
+            else:
+                version_since = taken_at
+            self._snapshot = StatsSnapshot(
+                listed_count=row.listed_count,
+                active_count=row.active_count,
+                active_approved_count=row.active_approved_count,
+                published_count=row.published_count,
+                latest_count=row.latest_count,
+                total_savings=float(row.total_savings or 0),
+                catalog_version=catalog_version,
+                version_since=version_since,
+                taken_at=taken_at
+            )
+            return self._snapshot
+
+    def deals_changed(self):
+        """Schedule a refresh shortly after a write"""
+        self._write_refresh.trigger()
+
+
+stats_snapshot = StatsSnapshotService()
+
+stats_refresh = PeriodicTask("Stats snapshot refresh", STATS_REFRESH_SECONDS, stats_snapshot.refresh)
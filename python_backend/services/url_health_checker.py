@@ -13,8 +13,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database import async_session
+from database import background_session
 from models import Deal as DealModel
+from services.deals_service import deals_changed
 
 logger = logging.getLogger(__name__)
 
@@ -154,7 +155,7 @@ async def run_url_health_check(check_all: bool = False) -> Dict[str, Any]:
 
         try:
             deal_ids = []
-            async with async_session() as db:
+            async with background_session() as db:
                 query = select(DealModel.id).where(
                     and_(
                         DealModel.is_active == True,
@@ -185,7 +186,7 @@ async def run_url_health_check(check_all: bool = False) -> Dict[str, Any]:
             for batch_start in range(0, total_deals, BATCH_SIZE):
                 batch_ids = deal_ids[batch_start:batch_start + BATCH_SIZE]
 
-                async with async_session() as db:
+                async with background_session() as db:
                     result = await db.execute(
                         select(DealModel).where(DealModel.id.in_(batch_ids))
                     )
@@ -262,6 +263,7 @@ async def run_url_health_check(check_all: bool = False) -> Dict[str, Any]:
                                     stats["broken"] += 1
 
                     await db.commit()
+                    deals_changed(batch_deals)
 
                 _check_progress = {
                     "running": True,
@@ -295,7 +297,7 @@ async def cleanup_stale_flagged_deals() -> Dict[str, Any]:
     stats = {"removed": 0, "cutoff_time": cutoff.isoformat()}
 
     try:
-        async with async_session() as db:
+        async with background_session() as db:
             result = await db.execute(
                 select(DealModel).where(
                     and_(
@@ -318,6 +320,8 @@ async def cleanup_stale_flagged_deals() -> Dict[str, Any]:
                 )
 
             await db.commit()
+        if stale_deals:
+            deals_changed(stale_deals)
 
         logger.info(f"Stale deal cleanup completed: {stats['removed']} deals removed")
         return stats
@@ -341,7 +345,7 @@ async def cleanup_data_quality_issues() -> Dict[str, Any]:
     }
 
     try:
-        async with async_session() as db:
+        async with background_session() as db:
             quality_filter = or_(
                 DealModel.image_url == None,
                 DealModel.image_url == "",
@@ -417,6 +421,7 @@ async def cleanup_data_quality_issues() -> Dict[str, Any]:
                 )
 
             await db.commit()
+            deals_changed(bad_deals)
 
         stats["completed_at"] = datetime.utcnow().isoformat()
         logger.info(f"Data quality cleanup completed: {stats['removed']} deals removed")
@@ -430,7 +435,7 @@ async def cleanup_data_quality_issues() -> Dict[str, Any]:
 
 async def get_url_health_stats() -> Dict[str, Any]:
     try:
-        async with async_session() as db:
+        async with background_session() as db:
             total = await db.execute(
                 select(func.count(DealModel.id)).where(
                     DealModel.is_active == True,
@@ -1,122 +1,187 @@
 #!/usr/bin/env python3
 
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func, distinct
-from starlette.middleware.base import BaseHTTPMiddleware
+from sqlalchemy import select, update, func
 import uvicorn
+import hmac
+import json
+import logging
 import os
-import time
-from collections import defaultdict
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
-from database import get_db, init_database
+from database import get_db, get_read_db, read_replicas, replica_lag_check
 from models import Deal as DealModel
 from routes.admin import router as admin_router
+from services.stats_snapshot import stats_snapshot, stats_refresh
+from services.counter_buffer import counter_buffer, counter_flush, drain_counters
+from services.event_ingestion import event_ingestion
+from services.short_url_resolver import short_url_resolver
+from services.click_rollups import click_rollup
+from services.page_cache import page_cache
+from services.category_registry import category_registry, category_refresh
+from utils.http_cache import api_cache_control
 from seo_helper import (
     generate_deal_seo, generate_home_seo, generate_category_seo,
     generate_category_seo_with_deals,
     generate_about_seo, generate_contact_seo, generate_blog_seo,
     generate_blog_article_seo,
-    generate_generic_seo, inject_seo_into_html
+    generate_generic_seo, is_crawler
 )
+from utils.html_template import HtmlTemplate
+from utils.metrics import MetricsMiddleware, http_metrics, include_router
+from utils.rate_limit import RateLimitBackend, RateLimitRule, create_rate_limit_backend
 from routes.seo import router as seo_router
 
+logger = logging.getLogger(__name__)
+
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"camera=(), microphone=(), geolocation=()"),
+]
+HTML_NO_CACHE_HEADERS = [
+    (b"cache-control", b"no-store, no-cache, must-revalidate, max-age=0"),
+    (b"pragma", b"no-cache"),
+    (b"expires", b"0"),
+]
+_SECURITY_HEADER_NAMES = {name for name, _ in SECURITY_HEADERS}
+_HTML_HEADER_NAMES = {name for name, _ in HTML_NO_CACHE_HEADERS}
+
+
+class SecurityHeadersMiddleware:
+    """Adds the security headers to ``http.response.start`` as it passes
+    through, so the response body is never buffered or re-wrapped"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = self._headers(scope, message)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _headers(self, scope, message) -> list:
+        headers = []
+        content_type = b""
+        cache_control = False
+        for name, value in message.get("headers", ()):
+            lower = name.lower()
+            if lower in _SECURITY_HEADER_NAMES:
+                continue
+            if lower == b"content-type":
+                content_type = value
+            elif lower == b"cache-control":
+                cache_control = True
+            headers.append((name, value))
+        headers.extend(SECURITY_HEADERS)
+
+        if b"text/html" in content_type:
+            headers = [header for header in headers if header[0].lower() not in _HTML_HEADER_NAMES]
+            headers.extend(HTML_NO_CACHE_HEADERS)
+        elif not cache_control and scope["path"].startswith("/api/"):
+            policy = api_cache_control(scope["method"], scope["path"], message["status"])
+            headers.append((b"cache-control", policy.encode("latin-1")))
+        return headers
+
+
+def _json_429(detail: str):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    start = {
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
-        if request.url.path.startswith("/api/"):
-            response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate"
-        content_type = response.headers.get("content-type", "")
-        if "text/html" in content_type:
-            response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, login_limit: int = 5, login_window: int = 300,
-                 api_limit: int = 100, api_window: int = 60):
-        super().__init__(app)
-        self.login_limit = login_limit
-        self.login_window = login_window
-        self.api_limit = api_limit
-        self.api_window = api_window
-        self.login_attempts = defaultdict(list)
-        self.api_requests = defaultdict(list)
-
-    def _get_client_ip(self, request: Request) -> str:
-        forwarded = request.headers.get("x-forwarded-for")
-        if forwarded:
-            return forwarded.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
-
-    def _clean_old_entries(self, entries: list, window: int):
-        now = time.time()
-        while entries and entries[0] < now - window:
-            entries.pop(0)
-
-    async def dispatch(self, request: Request, call_next):
-        client_ip = self._get_client_ip(request)
-        now = time.time()
-
-        if request.url.path == "/api/admin/login" and request.method == "POST":
-            self._clean_old_entries(self.login_attempts[client_ip], self.login_window)
-            if len(self.login_attempts[client_ip]) >= self.login_limit:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Too many login attempts. Please try again later."}
-                )
-            self.login_attempts[client_ip].append(now)
-
-        elif request.url.path.startswith("/api/") and request.url.path != "/api/health":
-            self._clean_old_entries(self.api_requests[client_ip], self.api_window)
-            if len(self.api_requests[client_ip]) >= self.api_limit:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Rate limit exceeded. Please slow down."}
-                )
-            self.api_requests[client_ip].append(now)
 
-        response = await call_next(request)
-        return response
+LOGIN_RATE_LIMITED = _json_429("Too many login attempts. Please try again later.")
+API_RATE_LIMITED = _json_429("Rate limit exceeded. Please slow down.")
 
 
-async def _migrate_url_health_columns():
-    """Add URL health check columns if they don't exist"""
-    from sqlalchemy import text as sql_text
-    from database import engine
-    async with engine.begin() as conn:
-        for col, col_type, default in [
-            ("url_last_checked", "TIMESTAMP", None),
-            ("url_check_failures", "INTEGER", "0"),
-            ("url_status", "VARCHAR", "'unchecked'"),
-            ("url_flagged_at", "TIMESTAMP", None),
-        ]:
-            try:
-                default_clause = f" DEFAULT {default}" if default else ""
-                await conn.execute(sql_text(
-                    f"ALTER TABLE deals ADD COLUMN IF NOT EXISTS {col} {col_type}{default_clause}"
-                ))
-            except Exception:
-                pass
+class RateLimitMiddleware:
+    """Checks the client's bucket straight from the ASGI scope; rejected
+    requests get a prebuilt 429 without reaching the app"""
+
+    def __init__(self, app, login_limit: int = 5, login_window: int = 300,
+                 api_limit: int = 100, api_window: int = 60,
+                 backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.login_rule = RateLimitRule("login", login_limit, login_window)
+        self.api_rule = RateLimitRule("api", api_limit, api_window)
+        self.backend = backend or create_rate_limit_backend()
+
+    def _get_client_ip(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        rejection = None
+        if path == "/api/admin/login" and scope["method"] == "POST":
+            if not await self.backend.hit(f"login:{self._get_client_ip(scope)}", self.login_rule):
+                rejection = LOGIN_RATE_LIMITED
+
+        elif path.startswith("/api/") and path != "/api/health":
+            if not await self.backend.hit(f"api:{self._get_client_ip(scope)}", self.api_rule):
+                rejection = API_RATE_LIMITED
+
+        if rejection is not None:
+            start, body = rejection
+            # Copies, since outer middleware may rewrite the start message
+            await send({**start, "headers": list(start["headers"])})
+            await send(dict(body))
+            return
+
+        await self.app(scope, receive, send)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_database()
-    await _migrate_url_health_columns()
+    from database import engine
+    from migrations import check_schema_version
+    await check_schema_version(engine)
+    from services.deal_suggester import suggester_rebuild
+    suggester_rebuild.start()
+    stats_refresh.start()
+    counter_flush.start()
+    event_ingestion.start()
+    click_rollup.start()
+    category_refresh.start()
+    if read_replicas.replicas:
+        replica_lag_check.start()
     yield
+    await replica_lag_check.stop()
+    await category_refresh.stop()
+    await click_rollup.stop()
+    await event_ingestion.stop()
+    await drain_counters()
+    await stats_refresh.stop()
+    await suggester_rebuild.stop()
 
 app = FastAPI(
     title="DealSphere API",
@@ -128,8 +193,13 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 
+# Built at import, not on the first request, so a misconfigured backend keeps
+# the server from starting
+rate_limit_backend = create_rate_limit_backend()
+
 app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RateLimitMiddleware)
+app.add_middleware(RateLimitMiddleware, backend=rate_limit_backend)
+app.add_middleware(MetricsMiddleware)
 
 ALLOWED_ORIGINS = os.environ.get("ALLOWED_ORIGINS", "").split(",")
 ALLOWED_ORIGINS = [o.strip() for o in ALLOWED_ORIGINS if o.strip()]
@@ -140,46 +210,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
 # Include routers
-app.include_router(admin_router, prefix="/api")
+include_router(app, admin_router, prefix="/api")
 
 # Include deals router
 try:
     from routes.deals import router as deals_router
-    app.include_router(deals_router, prefix="/api")
+    include_router(app, deals_router, prefix="/api")
 except ImportError as e:
     print(f"Warning: Could not import deals router: {e}")
 
 # Include sample files router
 from routes.sample_files import router as sample_files_router
-app.include_router(sample_files_router, prefix="/api/admin/sample-files")
+include_router(app, sample_files_router, prefix="/api/admin/sample-files")
 
 # Include file upload router
 try:
     from routes.file_upload_simple import router as file_upload_router
-    app.include_router(file_upload_router, prefix="/api/admin")
+    include_router(app, file_upload_router, prefix="/api/admin")
 except ImportError as e:
     print(f"Warning: Could not import file upload router: {e}")
 
 # Import and include automation router
 try:
     from routes.automation import router as automation_router
-    app.include_router(automation_router, prefix="/api")
+    include_router(app, automation_router, prefix="/api")
 except ImportError as e:
     print(f"Warning: Could not import automation router: {e}")
 
 # Import and include affiliate management router
 try:
     from routes.affiliate_management import router as affiliate_router
-    app.include_router(affiliate_router, prefix="/api")
+    include_router(app, affiliate_router, prefix="/api")
 except ImportError as e:
     print(f"Warning: Could not import affiliate management router: {e}")
 
 try:
     from routes.banners import router as banners_router
-    app.include_router(banners_router, prefix="/api")
+    include_router(app, banners_router, prefix="/api")
 except ImportError as e:
     print(f"Warning: Could not import banners router: {e}")
 
@@ -187,57 +258,114 @@ except ImportError as e:
 async def health_check():
     return {"status": "healthy", "message": "DealSphere Python API is running"}
 
+
+# Static bearer token for Prometheus scrapers; admins can also use their JWT
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+async def _authorize_metrics(request: Request, db: AsyncSession):
+    from fastapi.security import HTTPAuthorizationCredentials
+    from admin_auth import verify_token, get_current_admin, check_permission
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    admin_id = verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    check_permission(await get_current_admin(admin_id, db), "view_analytics")
+
+
+@app.get("/api/metrics")
+async def get_metrics(request: Request, db: AsyncSession = Depends(get_db)):
+    """This worker's request and DB pool metrics in Prometheus text format"""
+    await _authorize_metrics(request, db)
+    from database import engines
+    return Response(
+        http_metrics.render(
+            {name: pool_engine.pool for name, pool_engine in engines.items()},
+            read_replicas.replicas
+        ),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+# Rows fetched per server-side cursor round trip in ?stream=ndjson mode
+DEALS_STREAM_CHUNK_SIZE = int(os.getenv("DEALS_STREAM_CHUNK_SIZE", "500"))
+
+
+def _public_deals_query():
+    from sqlalchemy import or_
+    # Only return active, approved deals for public website
+    return select(DealModel).where(
+        DealModel.is_active == True,
+        DealModel.is_ai_approved == True,
+        DealModel.status == 'approved',
+        or_(
+            DealModel.url_status.is_(None),
+            DealModel.url_status.in_(['unchecked', 'healthy']),
+        )
+    ).order_by(DealModel.created_at.desc(), DealModel.id.desc())
+
+
+def _deal_to_camel(deal) -> dict:
+    return {
+        "id": deal.id,
+        "title": deal.title,
+        "description": deal.description,
+        "originalPrice": str(deal.original_price),
+        "salePrice": str(deal.sale_price),
+        "discountPercentage": deal.discount_percentage,
+        "imageUrl": deal.image_url,
+        "affiliateUrl": deal.affiliate_url,
+        "store": deal.store,
+        "storeLogoUrl": deal.store_logo_url,
+        "category": deal.category,
+        "rating": str(deal.rating) if deal.rating else None,
+        "reviewCount": deal.review_count,
+        "expiresAt": deal.expires_at.isoformat() if deal.expires_at else None,
+        "isActive": deal.is_active,
+        "isAiApproved": deal.is_ai_approved,
+        "aiScore": str(deal.ai_score) if deal.ai_score else None,
+        "aiReasons": deal.ai_reasons,
+        "popularity": deal.popularity,
+        "clickCount": deal.click_count,
+        "shareCount": deal.share_count,
+        "dealType": deal.deal_type,
+        "sourceApi": deal.source_api,
+        "createdAt": deal.created_at.isoformat() if deal.created_at else None,
+        "updatedAt": deal.updated_at.isoformat() if deal.updated_at else None
+    }
+
+
+async def _stream_deals_ndjson():
+    """Yield every public deal as NDJSON, one server-side cursor chunk at a time"""
+    query = _public_deals_query().execution_options(yield_per=DEALS_STREAM_CHUNK_SIZE)
+    try:
+        # Own session: the request-scoped one may be closed before the body is sent
+        async with read_replicas.session() as session:
+            result = await session.stream(query)
+            async for chunk in result.scalars().partitions():
+                yield "".join(json.dumps(_deal_to_camel(deal)) + "\n" for deal in chunk).encode()
+    except Exception:
+        # Headers and earlier chunks are already sent, so the status cannot
+        # change; a final error line marks the export as incomplete
+        logger.exception("Error streaming deals")
+        yield (json.dumps({"error": "export incomplete"}) + "\n").encode()
+
+
 @app.get("/api/deals")
-async def get_deals(db: AsyncSession = Depends(get_db)):
+async def get_deals(
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    stream: Optional[str] = Query(None, description="Set to 'ndjson' to stream every deal"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if stream == "ndjson":
+        return StreamingResponse(_stream_deals_ndjson(), media_type="application/x-ndjson")
+    if stream:
+        raise HTTPException(status_code=400, detail="Unsupported stream format")
     try:
-        # Only return active, approved deals for public website
-        from sqlalchemy import or_
-        result = await db.execute(
-            select(DealModel).where(
-                DealModel.is_active == True,
-                DealModel.is_ai_approved == True,
-                DealModel.status == 'approved',
-                or_(
-                    DealModel.url_status.is_(None),
-                    DealModel.url_status.in_(['unchecked', 'healthy']),
-                )
-            ).order_by(DealModel.created_at.desc())
-        )
-        deals = result.scalars().all()
-        
-        # Convert to dict format for JSON response
-        deals_list = []
-        for deal in deals:
-            deal_dict = {
-                "id": deal.id,
-                "title": deal.title,
-                "description": deal.description,
-                "originalPrice": str(deal.original_price),
-                "salePrice": str(deal.sale_price),
-                "discountPercentage": deal.discount_percentage,
-                "imageUrl": deal.image_url,
-                "affiliateUrl": deal.affiliate_url,
-                "store": deal.store,
-                "storeLogoUrl": deal.store_logo_url,
-                "category": deal.category,
-                "rating": str(deal.rating) if deal.rating else None,
-                "reviewCount": deal.review_count,
-                "expiresAt": deal.expires_at.isoformat() if deal.expires_at else None,
-                "isActive": deal.is_active,
-                "isAiApproved": deal.is_ai_approved,
-                "aiScore": str(deal.ai_score) if deal.ai_score else None,
-                "aiReasons": deal.ai_reasons,
-                "popularity": deal.popularity,
-                "clickCount": deal.click_count,
-                "shareCount": deal.share_count,
-                "dealType": deal.deal_type,
-                "sourceApi": deal.source_api,
-                "createdAt": deal.created_at.isoformat() if deal.created_at else None,
-                "updatedAt": deal.updated_at.isoformat() if deal.updated_at else None
-            }
-            deals_list.append(deal_dict)
-        
-        return deals_list
+        result = await db.execute(_public_deals_query().limit(limit).offset(offset))
+        return [_deal_to_camel(deal) for deal in result.scalars()]
     except Exception as e:
         print(f"Error fetching deals: {e}")
         return []
@@ -245,18 +373,15 @@ async def get_deals(db: AsyncSession = Depends(get_db)):
 @app.post("/api/deals/{deal_id}/click")
 async def track_deal_click(deal_id: str, db: AsyncSession = Depends(get_db)):
     try:
-        # Get deal
-        result = await db.execute(select(DealModel).where(DealModel.id == deal_id))
-        deal = result.scalar_one_or_none()
+        affiliate_url = await counter_buffer.affiliate_url(db, deal_id)
         
-        if not deal:
+        if affiliate_url is None:
             return {"error": "Deal not found"}
         
-        # Increment click count
-        deal.click_count = (deal.click_count or 0) + 1
-        await db.commit()
+        # Increment click count (written behind in batches)
+        counter_buffer.add(deal_id, clicks=1)
         
-        return {"affiliateUrl": deal.affiliate_url}
+        return {"affiliateUrl": affiliate_url}
     except Exception as e:
         print(f"Error tracking click: {e}")
         return {"error": "Failed to track click"}
@@ -290,32 +415,23 @@ async def create_share_url(deal_id: str, platform: str = "general", db: AsyncSes
 async def redirect_short_url(short_code: str, request: Request, db: AsyncSession = Depends(get_db)):
     """Serve deal page with OG meta tags for social media crawlers, redirect browsers"""
     try:
-        from models import ShortUrl as ShortUrlModel
+        # Cached lookup; the click count is written behind by the counter buffer
+        link = await short_url_resolver.resolve(db, short_code)
         
-        query = select(ShortUrlModel).where(ShortUrlModel.short_code == short_code)
-        result = await db.execute(query)
-        short_url = result.scalar_one_or_none()
-        
-        if not short_url:
+        if not link:
             raise HTTPException(status_code=404, detail="Short URL not found")
         
-        short_url.click_count = (short_url.click_count or 0) + 1
-        await db.commit()
-        
-        if short_url.deal_id and frontend_dist_path.exists():
-            deal_result = await db.execute(select(DealModel).where(DealModel.id == short_url.deal_id))
-            deal = deal_result.scalar_one_or_none()
-            if deal:
-                base_url = _get_base_url(request)
-                html_content = _read_html()
-                seo_tags = generate_deal_seo(deal, base_url)
-                deal_page_url = f"{base_url}/deals/{deal.id}"
-                redirect_script = f'<script>window.location.replace("{deal_page_url}");</script>'
-                html_with_seo = inject_seo_into_html(html_content, seo_tags)
-                html_with_redirect = html_with_seo.replace('</head>', f'{redirect_script}</head>')
-                return Response(content=html_with_redirect, media_type="text/html")
+        original_url, deal_id = link
+        if deal_id and frontend_dist_path.exists():
+            base_url = _get_base_url(request)
+            if not is_crawler(request.headers.get("user-agent")):
+                return RedirectResponse(url=f"{base_url}/deals/{deal_id}", status_code=302)
+            
+            page = await _render_deal_page(db, deal_id, base_url, share=True)
+            if page is not None:
+                return Response(content=page, media_type="text/html")
         
-        return RedirectResponse(url=short_url.original_url, status_code=302)
+        return RedirectResponse(url=original_url, status_code=302)
     except HTTPException:
         raise
     except Exception as e:
@@ -323,15 +439,37 @@ async def redirect_short_url(short_code: str, request: Request, db: AsyncSession
         raise HTTPException(status_code=404, detail="Short URL not found")
 
 # Include SEO router (sitemap.xml, robots.txt, seo categories)
-app.include_router(seo_router)
+include_router(app, seo_router)
 
 # Serve static files for frontend (when built)
 frontend_dist_path = Path("../client/dist")
 HTML_PATH = "../client/dist/index.html"
 
-def _read_html():
-    with open(HTML_PATH, 'r', encoding='utf-8') as f:
-        return f.read()
+# Loaded once and reloaded when the frontend is rebuilt; SEO tags go before </head>
+index_template = HtmlTemplate(HTML_PATH)
+
+async def _render_deal_page(db: AsyncSession, deal_id: str, base_url: str, share: bool = False):
+    """Deal page HTML from the page cache, rendered on a miss; None if there is no such deal.
+
+    Share pages (served to crawlers on /s/ links) also redirect browsers to the deal page.
+    """
+    version = await page_cache.deal_version(db, deal_id)
+    if version is None:
+        return None
+    variant = ("share" if share else "page", index_template.version)
+    page = page_cache.deal_page(deal_id, version, base_url, variant)
+    if page is None:
+        result = await db.execute(select(DealModel).where(DealModel.id == deal_id))
+        deal = result.scalar_one_or_none()
+        if not deal:
+            return None
+        seo_tags = generate_deal_seo(deal, base_url)
+        if share:
+            deal_page_url = f"{base_url}/deals/{deal.id}"
+            seo_tags += f'<script>window.location.replace("{deal_page_url}");</script>'
+        page = index_template.render(seo_tags)
+        page_cache.set_deal_page(deal, base_url, variant, page)
+    return page
 
 def _get_base_url(request: Request) -> str:
     forwarded_proto = request.headers.get("x-forwarded-proto", "https")
@@ -342,98 +480,60 @@ if frontend_dist_path.exists():
     app.mount("/assets", StaticFiles(directory="../client/dist/assets"), name="assets")
 
     @app.get("/")
-    async def serve_home(request: Request, db: AsyncSession = Depends(get_db)):
+    async def serve_home(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         try:
-            result = await db.execute(
-                select(func.count()).select_from(DealModel).where(
-                    DealModel.is_active == True,
-                    DealModel.is_ai_approved == True,
-                    DealModel.status == 'approved'
-                )
-            )
-            deal_count = result.scalar() or 0
+            deal_count = (await stats_snapshot.get()).published_count
         except Exception:
             deal_count = 0
         seo_tags = generate_home_seo(base_url, deal_count)
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.api_route("/deals/{deal_id}", methods=["GET", "HEAD"])
-    async def serve_deal_page(deal_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    async def serve_deal_page(deal_id: str, request: Request, db: AsyncSession = Depends(get_read_db)):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         try:
-            result = await db.execute(select(DealModel).where(DealModel.id == deal_id))
-            deal = result.scalar_one_or_none()
-            if deal:
-                seo_tags = generate_deal_seo(deal, base_url)
-                return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+            page = await _render_deal_page(db, deal_id, base_url)
+            if page is not None:
+                return Response(content=page, media_type="text/html")
         except Exception as e:
             print(f"Error serving deal page: {e}")
-        return Response(content=html_content, media_type="text/html")
+        return Response(content=index_template.html, media_type="text/html")
 
     @app.get("/category/{category_slug}")
-    async def serve_category_page(category_slug: str, request: Request, db: AsyncSession = Depends(get_db)):
-        import re as _re
+    async def serve_category_page(category_slug: str, request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         try:
-            cat_result = await db.execute(
-                select(distinct(DealModel.category)).where(
-                    DealModel.is_active == True,
-                    DealModel.is_ai_approved == True,
-                    DealModel.status == 'approved'
+            category = await category_registry.get(category_slug)
+            cache_key = (category_slug, base_url, category_registry.version, index_template.version)
+        except Exception:
+            category = None
+            cache_key = None  # Don't cache the fallback page
+        page = page_cache.category_page(cache_key) if cache_key else None
+        if page is None:
+            if category:
+                seo_tags = generate_category_seo_with_deals(
+                    category.name, category_slug, base_url, category.count, category.top_deals
                 )
-            )
-            all_cats = [r[0] for r in cat_result.all() if r[0]]
-            category_name = None
-            for cat in all_cats:
-                slug = _re.sub(r'[^a-z0-9]+', '-', cat.lower()).strip('-')
-                if slug == category_slug:
-                    category_name = cat
-                    break
-            if not category_name:
+            else:
                 category_name = category_slug.replace('-', ' ').title()
-            
-            deals_result = await db.execute(
-                select(DealModel).where(
-                    DealModel.is_active == True,
-                    DealModel.is_ai_approved == True,
-                    DealModel.status == 'approved',
-                    func.lower(DealModel.category) == category_name.lower()
-                ).limit(10)
-            )
-            cat_deals = deals_result.scalars().all()
-            deal_count_result = await db.execute(
-                select(func.count()).select_from(DealModel).where(
-                    DealModel.is_active == True,
-                    DealModel.is_ai_approved == True,
-                    DealModel.status == 'approved',
-                    func.lower(DealModel.category) == category_name.lower()
-                )
-            )
-            deal_count = deal_count_result.scalar() or 0
-        except Exception:
-            category_name = category_slug.replace('-', ' ').title()
-            deal_count = 0
-            cat_deals = []
-        seo_tags = generate_category_seo_with_deals(category_name, category_slug, base_url, deal_count, cat_deals)
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+                seo_tags = generate_category_seo_with_deals(category_name, category_slug, base_url, 0, [])
+            page = index_template.render(seo_tags)
+            if cache_key:
+                page_cache.set_category_page(cache_key, page)
+        return Response(content=page, media_type="text/html")
 
     @app.get("/about")
     async def serve_about(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         seo_tags = generate_about_seo(base_url)
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.get("/contact")
     async def serve_contact(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         seo_tags = generate_contact_seo(base_url)
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     BLOG_ARTICLES = {
         "how-to-find-best-deals": {
@@ -471,7 +571,6 @@ if frontend_dist_path.exists():
     @app.get("/blog/{article_id}")
     async def serve_blog_article(article_id: str, request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         article = BLOG_ARTICLES.get(article_id)
         if article:
             seo_tags = generate_blog_article_seo(
@@ -484,14 +583,13 @@ if frontend_dist_path.exists():
                 "The article you're looking for could not be found.",
                 f"{base_url}/blog/{article_id}", base_url
             )
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.get("/blog")
     async def serve_blog(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         seo_tags = generate_blog_seo(base_url)
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.get("/admin")
     @app.get("/admin/dashboard")
@@ -501,35 +599,32 @@ if frontend_dist_path.exists():
     @app.get("/privacy-policy")
     async def serve_privacy(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         seo_tags = generate_generic_seo(
             "Privacy Policy | DealSphere",
             "Read DealSphere's privacy policy. Learn how we protect your data and handle information.",
             f"{base_url}/privacy-policy", base_url
         )
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.get("/terms-conditions")
     async def serve_terms(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         seo_tags = generate_generic_seo(
             "Terms & Conditions | DealSphere",
             "Read DealSphere's terms and conditions for using our deals and coupons platform.",
             f"{base_url}/terms-conditions", base_url
         )
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.get("/affiliate-disclosure")
     async def serve_affiliate_disclosure(request: Request):
         base_url = _get_base_url(request)
-        html_content = _read_html()
         seo_tags = generate_generic_seo(
             "Affiliate Disclosure | DealSphere",
             "DealSphere affiliate disclosure. As an Amazon Associate, we earn from qualifying purchases. Learn about our affiliate relationships and how we earn revenue.",
             f"{base_url}/affiliate-disclosure", base_url
         )
-        return Response(content=inject_seo_into_html(html_content, seo_tags), media_type="text/html")
+        return Response(content=index_template.render(seo_tags), media_type="text/html")
 
     @app.get("/{full_path:path}")
     async def serve_frontend(full_path: str, request: Request):
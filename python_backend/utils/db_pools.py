@@ -0,0 +1,44 @@
+"""
+Instrumented connection pool
+Queue pool that records how long each checkout waited for a connection and
+how many gave up at pool_timeout
+"""
+
+import time
+from bisect import bisect_left
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from utils.metrics import Histogram
+
+# Upper bounds in seconds; a healthy pool hands out connections in well
+# under a millisecond, anything in the upper buckets means it is exhausted
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait = Histogram(POOL_WAIT_BUCKETS)
+        self.timeouts = 0
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same series
+        pool = super().recreate()
+        pool.wait = self.wait
+        pool.timeouts = self.timeouts
+        return pool
+
+    def _do_get(self):
+        # Includes opening a new connection when the pool is below pool_size
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait.counts[bisect_left(POOL_WAIT_BUCKETS, waited)] += 1
+            self.wait.sum += waited
@@ -0,0 +1,61 @@
+"""
+Pre-split HTML page template
+The built index.html held in memory as the bytes before and from </head>
+"""
+
+import os
+import time
+from typing import Optional, Tuple
+
+HEAD_CLOSE = b"</head>"
+# How often the file's mtime is checked for a rebuilt frontend
+TEMPLATE_CHECK_INTERVAL_SECONDS = 1.0
+
+
+class HtmlTemplate:
+    """``render(head)`` returns the page with ``head`` inserted before </head>.
+
+    The file is read once and again only after its mtime or size changes, so a
+    render is a three-part join with no file I/O or string search.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._prefix = b""
+        self._suffix = b""
+        self.reloads = 0
+
+    def _parts(self) -> Tuple[bytes, bytes]:
+        now = time.monotonic()
+        if self._stamp is None or now - self._checked_at >= TEMPLATE_CHECK_INTERVAL_SECONDS:
+            self._checked_at = now
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp != self._stamp:
+                with open(self.path, "rb") as f:
+                    html = f.read()
+                split_at = html.find(HEAD_CLOSE)
+                if split_at == -1:
+                    split_at = len(html)
+                self._prefix, self._suffix = html[:split_at], html[split_at:]
+                self._stamp = stamp
+                self.reloads += 1
+        return self._prefix, self._suffix
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever the file is reloaded; part of rendered page cache keys"""
+        self._parts()
+        return self._stamp
+
+    def render(self, head: str = "") -> bytes:
+        prefix, suffix = self._parts()
+        return b"".join((prefix, head.encode("utf-8"), suffix))
+
+    @property
+    def html(self) -> bytes:
+        """The page as built, with nothing injected"""
+        prefix, suffix = self._parts()
+        return prefix + suffix
@@ -0,0 +1,62 @@
+"""
+HTTP caching helpers
+Entity tags, conditional GET and per-route Cache-Control policies
+"""
+
+import hashlib
+import re
+from typing import List, Optional, Pattern, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Applied to /api/ responses that do not set Cache-Control themselves; first
+# match wins. Only successful GETs are cacheable, everything else is no-store.
+API_CACHE_POLICIES: List[Tuple[Pattern, str]] = [
+    # Conditional: stored, but revalidated with If-None-Match on every use
+    (re.compile(r"^/api/deals$"), "public, no-cache"),
+    (re.compile(r"^/api/(categories|stores)$"), "public, max-age=60, must-revalidate"),
+    # Served from in-memory snapshots that are themselves up to a minute old
+    (re.compile(r"^/api/deals/(count|stats|latest-count)$"), "public, max-age=30"),
+    (re.compile(r"^/api/deals/suggest$"), "public, max-age=60"),
+    (re.compile(r"^/api/deals/search$"), "public, max-age=30"),
+    (re.compile(r"^/api/deals/[^/]+$"), "public, no-cache"),
+]
+DEFAULT_API_CACHE_CONTROL = "no-store, no-cache, must-revalidate"
+
+
+def api_cache_control(method: str, path: str, status_code: int) -> str:
+    if method in ("GET", "HEAD") and status_code in (200, 304):
+        for pattern, policy in API_CACHE_POLICIES:
+            if pattern.match(path):
+                return policy
+    return DEFAULT_API_CACHE_CONTROL
+
+
+def make_etag(*parts: bytes) -> str:
+    """Strong ETag hashed from ``parts``: a catalog version that every worker
+    derives from the database, plus whatever else the representation varies
+    with (path and query string)"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:24]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client already holds ``etag``, else None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
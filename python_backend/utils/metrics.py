@@ -0,0 +1,290 @@
+"""
+Request metrics
+Per-route request counts, latency, response size and DB query histograms
+and an in-flight gauge, recorded by an ASGI middleware and rendered in the
+Prometheus text exposition format
+"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from utils import sql_profiler
+from utils.sql_profiler import RequestProfile, current_profile, report_repeated
+
+# Upper bounds in seconds; the implicit last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Requests that matched no route share one label so scanners probing random
+# paths cannot create unbounded label sets
+UNMATCHED_ROUTE = "unmatched"
+# Adds an X-DB-Queries debug header with the request's query summary
+DB_QUERY_HEADER = os.getenv("DB_QUERY_HEADER", "false").lower() == "true"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # counts[i] holds observations in (bounds[i-1], bounds[i]]; not cumulative
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+
+class RouteMetrics:
+    __slots__ = ("statuses", "latency", "size", "queries", "db_seconds", "repeated")
+
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_seconds = 0.0
+        # Requests in which some statement shape repeated (likely N+1)
+        self.repeated = 0
+
+
+class HttpMetrics:
+    """One instance per worker process. Everything is updated from the event
+    loop thread only, so plain ints and dicts need no locking."""
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.in_flight = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float, size: int,
+               profile: Optional[RequestProfile] = None):
+        key = (method, route)
+        metrics = self._routes.get(key)
+        if metrics is None:
+            metrics = self._routes[key] = RouteMetrics()
+        statuses = metrics.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+        # Bucket updates inlined; this runs on every request
+        latency = metrics.latency
+        latency.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        latency.sum += seconds
+        size_histogram = metrics.size
+        size_histogram.counts[bisect_left(SIZE_BUCKETS, size)] += 1
+        size_histogram.sum += size
+        if profile is not None:
+            queries = metrics.queries
+            queries.counts[bisect_left(QUERY_COUNT_BUCKETS, profile.queries)] += 1
+            queries.sum += profile.queries
+            metrics.db_seconds += profile.seconds
+            if profile.queries >= sql_profiler.REPEATED_QUERY_THRESHOLD and profile.repeated():
+                metrics.repeated += 1
+                report_repeated(profile)
+
+    def render(self, pools: Optional[Dict[str, object]] = None, replicas: Optional[List[object]] = None) -> str:
+        """Prometheus text format; ``pools`` maps pool names to SQLAlchemy
+        pools and ``replicas`` lists utils.replicas.Replica objects whose
+        state is reported alongside"""
+        routes = sorted(self._routes.items())
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), metrics in routes:
+            labels = _labels(method, route)
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Time from request start to the last response byte.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), metrics in routes:
+            _histogram_lines(lines, "http_request_duration_seconds", _labels(method, route), metrics.latency)
+
+        lines += [
+            "# HELP http_response_size_bytes Response body size.",
+            "# TYPE http_response_size_bytes histogram",
+        ]
+        for (method, route), metrics in routes:
+            _histogram_lines(lines, "http_response_size_bytes", _labels(method, route), metrics.size)
+
+        lines += [
+            "# HELP http_request_db_queries SQL statements executed per request.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        for (method, route), metrics in routes:
+            _histogram_lines(lines, "http_request_db_queries", _labels(method, route), metrics.queries)
+
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent executing SQL statements.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), metrics in routes:
+            lines.append(f"http_request_db_seconds_total{{{_labels(method, route)}}} {_number(metrics.db_seconds)}")
+
+        lines += [
+            "# HELP http_requests_repeated_queries_total Requests that ran one statement shape repeatedly (likely N+1).",
+            "# TYPE http_requests_repeated_queries_total counter",
+        ]
+        for (method, route), metrics in routes:
+            if metrics.repeated:
+                lines.append(f"http_requests_repeated_queries_total{{{_labels(method, route)}}} {metrics.repeated}")
+
+        lines += [
+            "# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS, in or out of requests.",
+            "# TYPE db_slow_queries_total counter",
+            f"db_slow_queries_total {sql_profiler.slow_queries}",
+            "# HELP http_requests_in_flight Requests currently being handled by this worker.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        if pools:
+            _pool_lines(lines, pools)
+        if replicas:
+            lines += [
+                "# HELP db_replica_healthy 1 while the read replica is in rotation.",
+                "# TYPE db_replica_healthy gauge",
+            ]
+            lines += [f'db_replica_healthy{{replica="{r.name}"}} {int(r.healthy)}' for r in replicas]
+            lines += [
+                "# HELP db_replica_lag_seconds Replication lag at the last check (absent while unreachable).",
+                "# TYPE db_replica_lag_seconds gauge",
+            ]
+            lines += [f'db_replica_lag_seconds{{replica="{r.name}"}} {r.lag}' for r in replicas if r.lag is not None]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{method}",route="{_escape(route)}"'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(lines: List[str], name: str, labels: str, histogram: Histogram):
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    cumulative += histogram.counts[-1]
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {_number(histogram.sum)}")
+    lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+POOL_GAUGES = [
+    ("db_pool_size", "Connections the pool keeps open.", "size"),
+    ("db_pool_checked_out", "Connections currently in use.", "checkedout"),
+    ("db_pool_checked_in", "Idle connections held by the pool.", "checkedin"),
+    ("db_pool_overflow", "Connections open beyond pool_size (negative while below it).", "overflow"),
+]
+
+
+def _pool_lines(lines: List[str], pools: Dict[str, object]):
+    for name, help_text, method in POOL_GAUGES:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for pool_name, pool in pools.items():
+            lines.append(f'{name}{{pool="{pool_name}"}} {getattr(pool, method)()}')
+
+    # Only InstrumentedQueuePool (utils/db_pools.py) records waits
+    instrumented = [(pool_name, pool) for pool_name, pool in pools.items() if hasattr(pool, "wait")]
+    if not instrumented:
+        return
+    lines += [
+        "# HELP db_pool_checkout_wait_seconds Time a checkout waited for a connection.",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+    ]
+    for pool_name, pool in instrumented:
+        _histogram_lines(lines, "db_pool_checkout_wait_seconds", f'pool="{pool_name}"', pool.wait)
+    lines += [
+        "# HELP db_pool_checkout_timeouts_total Checkouts that gave up after pool_timeout.",
+        "# TYPE db_pool_checkout_timeouts_total counter",
+    ]
+    for pool_name, pool in instrumented:
+        lines.append(f'db_pool_checkout_timeouts_total{{pool="{pool_name}"}} {pool.timeouts}')
+
+
+http_metrics = HttpMetrics()
+
+
+# id(route) -> prefix its router was included under, recorded by
+# include_router(); routes live as long as the app
+_route_prefixes: Dict[int, str] = {}
+
+
+def include_router(app, router, prefix: str = "", **kwargs):
+    """``app.include_router()`` that also records ``prefix`` for each of the
+    router's routes: the route FastAPI leaves in the scope carries only the
+    router's own path (/deals/{deal_id} for /api/deals/1)"""
+    app.include_router(router, prefix=prefix, **kwargs)
+    for route in router.routes:
+        _route_prefixes[id(route)] = prefix
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled the request"""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    # Routes added to the app itself are only prefixed by a mount, if any
+    return _route_prefixes.get(id(route), scope.get("root_path", "")) + template
+
+
+class MetricsMiddleware:
+    """Records every HTTP request into ``metrics`` and reports the handler
+    and DB time to the browser as a ``Server-Timing`` header.
+
+    A RequestProfile is made current for the request so the SQL profiler's
+    engine events can attribute queries to it.
+
+    The route label is the matched route's path template, read from the
+    scope after routing, so /api/deals/{deal_id} is one series however many
+    deals are requested.
+    """
+
+    def __init__(self, app, metrics: HttpMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        profile = RequestProfile(f"{scope['method']} {scope['path']}")
+
+        async def send_with_timing(message):
+            nonlocal status, size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", b"db;dur=%.1f, app;dur=%.1f" % (
+                    profile.seconds * 1000, (time.perf_counter() - started) * 1000
+                )))
+                if DB_QUERY_HEADER:
+                    headers.append((b"x-db-queries", profile.header_value().encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        token = current_profile.set(profile)
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.in_flight -= 1
+            current_profile.reset(token)
+            metrics.record(
+                scope["method"], route_template(scope),
+                status, time.perf_counter() - started, size, profile
+            )
@@ -0,0 +1,96 @@
+"""
+Periodic and debounced background jobs on the server's event loop
+Periodic tasks are started and stopped from the application lifespan
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Runs ``job`` immediately and then every ``interval`` seconds until stopped.
+
+    A failing run is logged and retried at the next interval. With
+    ``finish_on_stop``, a run in progress when the task is stopped is shielded
+    from the cancellation and awaited by stop(), for jobs that must not be
+    interrupted half way (e.g. ones that have already taken buffered data).
+    """
+
+    def __init__(self, name: str, interval: float, job: Callable[[], Awaitable[None]], finish_on_stop: bool = False):
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self.finish_on_stop = finish_on_stop
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._inflight is not None:
+            try:
+                await self._inflight
+            except Exception as e:
+                logger.error(f"{self.name} failed: {e}")
+            self._inflight = None
+
+    async def _loop(self):
+        while True:
+            try:
+                if self.finish_on_stop:
+                    self._inflight = asyncio.ensure_future(self.job())
+                    await asyncio.shield(self._inflight)
+                    self._inflight = None
+                else:
+                    await self.job()
+            except Exception as e:
+                logger.error(f"{self.name} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+class DebouncedTask:
+    """Runs ``job`` once, ``delay`` seconds after the first trigger() of a
+    burst; triggers while a run is already scheduled join that run. A failing
+    run is logged. Used to refresh in-memory state shortly after writes."""
+
+    def __init__(self, name: str, delay: float, job: Callable[[], Awaitable[None]]):
+        self.name = name
+        self.delay = delay
+        self.job = job
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def trigger(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._handle is None:
+            self._handle = loop.call_later(self.delay, self._run)
+
+    def _run(self):
+        self._handle = None
+        self._task = asyncio.ensure_future(self._run_quietly())
+
+    async def _run_quietly(self):
+        try:
+            await self.job()
+        except Exception as e:
+            logger.error(f"{self.name} failed: {e}")
@@ -0,0 +1,198 @@
+"""
+Token-bucket rate limiting
+O(1) state per client key, kept in process (LRU-bounded) or in Redis so
+limits hold across workers
+"""
+
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# memory: per-process buckets. redis: buckets shared by every worker, with the
+# memory backend standing in while Redis is unreachable.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# After a Redis error, skip Redis for this long before one request retries it;
+# doubled after every failed retry, up to the maximum
+RATE_LIMIT_REDIS_RETRY_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_RETRY_SECONDS", "1"))
+RATE_LIMIT_REDIS_MAX_RETRY_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_MAX_RETRY_SECONDS", "30"))
+# Buckets kept by the memory backend; the least recently seen key is evicted
+# first, and an evicted key simply starts again with a full bucket
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class RateLimitRule:
+    """``limit`` requests per ``window`` seconds, as a bucket of ``limit`` tokens
+    refilled continuously at ``limit / window`` tokens per second"""
+
+    def __init__(self, name: str, limit: int, window: float):
+        self.name = name
+        self.capacity = float(limit)
+        self.refill_rate = limit / window
+
+    @property
+    def idle_seconds(self) -> float:
+        """Time after which an untouched bucket is full again"""
+        return self.capacity / self.refill_rate
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def hit(self, key: str, rule: RateLimitRule) -> bool:
+        """Take one token from ``key``'s bucket; False if it is empty"""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max(1, max_keys)
+        # key -> [tokens, updated_at]; ordered least recently seen first
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.evictions = 0
+        self.rejected = 0
+
+    async def hit(self, key: str, rule: RateLimitRule) -> bool:
+        return self.hit_now(key, rule, time.monotonic())
+
+    def hit_now(self, key: str, rule: RateLimitRule, now: float) -> bool:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [rule.capacity, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.refill_rate)
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            self.rejected += 1
+            return False
+        bucket[0] -= 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+        }
+
+
+# Same bucket arithmetic as the memory backend, atomically on the Redis side
+# with Redis' clock, so every worker draws from one bucket per key. Keys
+# expire once they would be full again, so idle clients cost nothing.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return allowed
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Shared buckets in Redis; falls back to a local memory backend on errors
+    so an outage degrades limits to per-process instead of failing requests.
+
+    While Redis is failing, requests go straight to the fallback without
+    waiting on the socket timeout; a single request retries Redis once the
+    backoff has passed.
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, key_prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+        self._key_prefix = key_prefix
+        self._fallback = MemoryRateLimitBackend()
+        self._failing = False
+        self._probing = False
+        self._backoff = RATE_LIMIT_REDIS_RETRY_SECONDS
+        self._retry_at = 0.0
+        self.fallbacks = 0
+        self.rejected = 0
+
+    async def hit(self, key: str, rule: RateLimitRule) -> bool:
+        if self._failing and (self._probing or time.monotonic() < self._retry_at):
+            self.fallbacks += 1
+            return await self._fallback.hit(key, rule)
+
+        probe = self._failing
+        self._probing = probe
+        try:
+            allowed = bool(await self._script(
+                keys=[f"{self._key_prefix}{key}"], args=[rule.capacity, rule.refill_rate]
+            ))
+        except Exception as e:
+            # Only the first failure and failed retries move the backoff, not
+            # requests that were already waiting on Redis when it went down
+            if probe:
+                self._probing = False
+                self._backoff = min(self._backoff * 2, RATE_LIMIT_REDIS_MAX_RETRY_SECONDS)
+                self._retry_at = time.monotonic() + self._backoff
+            elif not self._failing:
+                logger.error(f"Redis rate limiting unavailable, using per-process limits: {e}")
+                self._failing = True
+                self._backoff = RATE_LIMIT_REDIS_RETRY_SECONDS
+                self._retry_at = time.monotonic() + self._backoff
+            self.fallbacks += 1
+            return await self._fallback.hit(key, rule)
+
+        if probe:
+            self._probing = False
+        if self._failing:
+            logger.info("Redis rate limiting restored")
+            self._failing = False
+        if not allowed:
+            self.rejected += 1
+        return allowed
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "failing": self._failing,
+            "retry_in_seconds": max(0.0, self._retry_at - time.monotonic()) if self._failing else 0.0,
+            "fallbacks": self.fallbacks,
+            "rejected": self.rejected,
+            "fallback": self._fallback.stats(),
+        }
+
+
+def create_rate_limit_backend(name: Optional[str] = None) -> RateLimitBackend:
+    name = (name or RATE_LIMIT_BACKEND).lower()
+    if name == "redis":
+        # Falling back to per-process limits here would silently multiply the
+        # configured limits by the number of workers
+        try:
+            return RedisRateLimitBackend()
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis but the redis package is not installed; "
+                "install the redis extra (pip install redis) or set RATE_LIMIT_BACKEND=memory"
+            ) from e
+    elif name != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND {name!r}; using memory")
+    return MemoryRateLimitBackend()
@@ -0,0 +1,111 @@
+"""
+Read replicas
+Round-robin routing of read-only sessions across Postgres replicas, skipping
+any that lag the primary by more than a threshold or cannot be reached
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 while the replica has
+# replayed everything it received (an idle primary writes nothing, so the
+# replay timestamp alone would read as growing lag). A server that is not in
+# recovery counts as caught up, which lets two standalone local instances
+# stand in for a primary and a replica in development.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+REPLICA_CHECK_TIMEOUT_SECONDS = 2
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        # None until the first successful check
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.checked = False
+
+
+class ReplicaRouter:
+    """Replicas start out unhealthy, so reads stay on the primary until the
+    first lag check (started from the application lifespan) has passed"""
+
+    def __init__(self, replicas: List[Replica], primary: async_sessionmaker, max_lag: float):
+        self.replicas = replicas
+        self.primary = primary
+        self.max_lag = max_lag
+        self._next = itertools.count()
+        self._primary_until = 0.0
+        self.replica_sessions = 0
+        self.primary_fallbacks = 0
+        self.primary_after_writes = 0
+
+    def session(self) -> AsyncSession:
+        """A session on the next healthy replica, or on the primary"""
+        if not self.replicas:
+            return self.primary()
+        if time.monotonic() < self._primary_until:
+            self.primary_after_writes += 1
+            return self.primary()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_fallbacks += 1
+            return self.primary()
+        self.replica_sessions += 1
+        return healthy[next(self._next) % len(healthy)].sessionmaker()
+
+    def wrote(self):
+        """Read from the primary until replicas can have replayed a write this
+        process just committed, so caches invalidated by the write are not
+        refilled from a replica that still has the old rows"""
+        self._primary_until = time.monotonic() + self.max_lag
+
+    async def check(self):
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(REPLICA_LAG_SQL), REPLICA_CHECK_TIMEOUT_SECONDS)
+            replica.lag = float(lag or 0)
+            healthy = replica.lag <= self.max_lag
+            reason = f"lag {replica.lag:.1f}s"
+        except Exception as e:
+            replica.lag = None
+            healthy = False
+            reason = f"unreachable: {e}"
+
+        if healthy != replica.healthy or not replica.checked:
+            if healthy:
+                logger.info(f"Read replica {replica.name} in rotation ({reason})")
+            else:
+                logger.warning(f"Read replica {replica.name} out of rotation ({reason})")
+        replica.healthy = healthy
+        replica.checked = True
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {"name": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag}
+                for replica in self.replicas
+            ],
+            "max_lag_seconds": self.max_lag,
+            "replica_sessions": self.replica_sessions,
+            "primary_fallbacks": self.primary_fallbacks,
+            "primary_after_writes": self.primary_after_writes,
+        }
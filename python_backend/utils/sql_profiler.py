@@ -0,0 +1,107 @@
+"""
+SQL profiler
+Per-request query count, DB time and slowest statement, collected from
+SQLAlchemy cursor events, with a slow-query log and repeated-statement
+(N+1) detection
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(f"{__name__}.slow")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# A statement shape run this many times in one request is reported as a
+# likely N+1 (a query per row of an earlier result)
+REPEATED_QUERY_THRESHOLD = int(os.getenv("REPEATED_QUERY_THRESHOLD", "5"))
+STATEMENT_LOG_CHARS = 500
+
+
+class RequestProfile:
+    __slots__ = ("label", "queries", "seconds", "slowest", "slowest_statement", "shapes")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = ""
+        # Statement text -> executions. Statements are compiled with bound
+        # parameters, so the text is the query's shape, not its values.
+        self.shapes: Dict[str, int] = {}
+
+    def add(self, statement: str, seconds: float):
+        self.queries += 1
+        self.seconds += seconds
+        if seconds > self.slowest:
+            self.slowest = seconds
+            self.slowest_statement = statement
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        """Shapes executed at least REPEATED_QUERY_THRESHOLD times, most first"""
+        return sorted(
+            ((statement, count) for statement, count in self.shapes.items() if count >= REPEATED_QUERY_THRESHOLD),
+            key=lambda item: -item[1]
+        )
+
+    def header_value(self) -> str:
+        return (
+            f"count={self.queries}, time_ms={self.seconds * 1000:.1f}, "
+            f"slowest_ms={self.slowest * 1000:.1f}, repeated={len(self.repeated())}"
+        )
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+slow_queries = 0
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > STATEMENT_LOG_CHARS:
+        return statement[:STATEMENT_LOG_CHARS] + "..."
+    return statement
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global slow_queries
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add(statement, seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        slow_queries += 1
+        where = f" during {profile.label}" if profile is not None and profile.label else ""
+        slow_query_logger.warning(f"Slow query ({seconds * 1000:.0f} ms){where}: {_shorten(statement)}")
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def attach_profiler(engine):
+    """Instrument ``engine`` (sync or async); idempotent"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def report_repeated(profile: RequestProfile):
+    for statement, count in profile.repeated():
+        logger.warning(f"Possible N+1 in {profile.label or 'unknown request'}: ran {count}x: {_shorten(statement)}")
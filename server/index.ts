@@ -3,9 +3,9 @@ import { join } from 'path';
 
 console.log('Starting DealSphere Python Backend...');
 
-// Change to python_backend directory and start the server
+// Change to python_backend directory, apply pending schema migrations and start the server
 const pythonBackendPath = join(process.cwd(), 'python_backend');
-const command = `cd "${pythonBackendPath}" && PORT=5000 python3 simple_server.py`;
+const command = `cd "${pythonBackendPath}" && python3 -m migrations && PORT=5000 python3 simple_server.py`;
 
 console.log(`Executing: ${command}`);
 
@@ -28,6 +28,9 @@ def main():
     print(f"🌍 Environment: {'production' if is_production else 'development'}")
     
     try:
+        # Apply pending schema migrations before starting the server
+        subprocess.run([sys.executable, "-m", "migrations"], check=True)
+
         # Start the server
         cmd = [
             sys.executable, "-m", "uvicorn", 